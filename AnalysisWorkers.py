@@ -0,0 +1,324 @@
+import multiprocessing as mp
+import threading
+import time
+import numpy as np
+from FrameRing import SharedFrameRing
+
+
+# Models are loaded once per worker process; the GUI process only keeps
+# these thin proxies.  "spawn" is used on every platform so the children
+# never inherit Qt / TensorFlow / torch state from the parent.
+_ctx = mp.get_context("spawn")
+
+
+def _face_worker_main(conn, analyzer_args, ring_lock):
+    from FaceAnalysis import FaceAnalyzer
+    analyzer = FaceAnalyzer(**analyzer_args)
+    ring = None
+    conn.send(("ready", None))
+    while True:
+        try:
+            msg = conn.recv()
+        except EOFError:
+            break
+        kind = msg[0]
+        if kind == "stop":
+            break
+        elif kind == "ring":
+            if ring is not None:
+                ring.close()
+            ring = SharedFrameRing.attach(msg[1], ring_lock)
+        elif kind == "calibration":
+            _, calib, baseline_v, baseline_h = msg
+            if calib:
+                analyzer.calibration_data = calib
+            analyzer.baseline_vertical_ratio = baseline_v
+            analyzer.baseline_horizontal_ratio = baseline_h
+        elif kind == "slot":
+            _, idx, seq, skip_emotion = msg
+            frame = ring.acquire_read(idx, seq) if ring is not None else None
+            if frame is None:
+                conn.send(("error", "frame slot was reused before analysis"))
+                continue
+            analyzer.skip_emotion = skip_emotion
+            try:
+                # only the small structured results go back over the pipe
+                conn.send(("result", analyzer.analyze_frame(frame)))
+            except Exception as e:
+                conn.send(("error", str(e)))
+            finally:
+                del frame
+                ring.release(idx)
+    if ring is not None:
+        ring.close()
+
+
+def _ia_worker_main(conn, model_args):
+    from IAModel import IntentionalActionRecognizer
+    model = IntentionalActionRecognizer(**model_args)
+    conn.send(("ready", None))
+    while True:
+        try:
+            msg = conn.recv()
+        except EOFError:
+            break
+        kind = msg[0]
+        if kind == "stop":
+            break
+        elif kind == "actions":
+            model.set_defined_actions(msg[1])
+        elif kind == "detect":
+            _, frame, threshold, neutral_action = msg
+            try:
+                conn.send(("result", model.is_action_detected_blocking(frame, threshold, neutral_action)))
+            except Exception as e:
+                conn.send(("error", str(e)))
+
+
+class WorkerProcess:
+    # Owns one child process and its duplex pipe.  A dead or hung child is
+    # detected on the next call, killed and respawned; `on_restart` lets the
+    # proxy replay its state (calibration, actions) into the new process.
+
+    def __init__(self, name, target, args, ready_timeout=120.0, on_restart=None):
+        self.name = name
+        self.target = target
+        self.args = args
+        self.ready_timeout = ready_timeout
+        self.on_restart = on_restart
+        self.restarts = 0
+        self.proc = None
+        self.conn = None
+        self._lock = threading.RLock()
+        self._start()
+
+    def _start(self):
+        parent_conn, child_conn = _ctx.Pipe(duplex=True)
+        self.proc = _ctx.Process(target=self.target, args=(child_conn,) + tuple(self.args),
+                                 name=self.name, daemon=True)
+        self.proc.start()
+        child_conn.close()
+        self.conn = parent_conn
+        # the child says "ready" once its models are loaded
+        self._ready = False
+        self._started_at = time.perf_counter()
+
+    def restart(self, reason):
+        print(f"[Workers] {self.name} {reason}; restarting.")
+        self.kill()
+        self.restarts += 1
+        self._start()
+        if self.on_restart:
+            self.on_restart()
+
+    def kill(self):
+        try:
+            if self.conn is not None:
+                self.conn.close()
+        except OSError:
+            pass
+        if self.proc is not None and self.proc.is_alive():
+            self.proc.terminate()
+            self.proc.join(timeout=2)
+            if self.proc.is_alive():
+                self.proc.kill()
+
+    def send(self, msg):
+        # fire-and-forget; returns False (after restarting) if the child is gone
+        with self._lock:
+            try:
+                if not self.proc.is_alive():
+                    raise BrokenPipeError("process exited")
+                self.conn.send(msg)
+                return True
+            except (OSError, EOFError, ValueError) as e:
+                self.restart(f"crashed ({e})")
+                return False
+
+    def poll_reply(self, timeout=0.0):
+        # returns the next ("result"|"error", payload) or None if none is waiting
+        with self._lock:
+            try:
+                while self.conn.poll(timeout):
+                    kind, payload = self.conn.recv()
+                    if kind != "ready":
+                        return kind, payload
+                    self._ready = True
+                if not self.proc.is_alive():
+                    raise EOFError("process exited")
+                if not self._ready and time.perf_counter() - self._started_at > self.ready_timeout:
+                    raise TimeoutError("models did not load in time")
+                return None
+            except (OSError, EOFError, TimeoutError) as e:
+                self.restart(f"crashed ({e})")
+                return None
+
+    def request(self, msg, timeout):
+        # blocking round trip; a hung child (ready but silent past `timeout`) is restarted
+        generation = self.restarts
+        if not self.send(msg):
+            return None
+        sent_at = time.perf_counter()
+        while self.restarts == generation:
+            reply = self.poll_reply(timeout=0.05)
+            if reply is not None:
+                return reply
+            if not self._ready:
+                sent_at = time.perf_counter()  # still loading models; don't count that
+            elif time.perf_counter() - sent_at > timeout:
+                self.restart(f"did not answer within {timeout:.1f}s")
+        return None
+
+    def stop(self):
+        with self._lock:
+            try:
+                self.conn.send(("stop",))
+            except (OSError, ValueError):
+                pass
+            self.proc.join(timeout=2)
+        self.kill()
+
+
+class RemoteFaceAnalyzer:
+    # Drop-in for FaceAnalyzer inside FocusMonitor's loop; analyze_frame runs
+    # in a dedicated process.  Frames are handed over through a
+    # SharedFrameRing; the pipe only carries (slot, seq) and the result lists.
+
+    def __init__(self, use_dlib=False, use_emotion=True, max_faces=1, timeout=5.0, ring_slots=3):
+        self.use_dlib = use_dlib
+        self.use_emotion = use_emotion
+        self.max_faces = max_faces
+        self.timeout = timeout
+        self.ring_slots = ring_slots
+        self.skip_emotion = False
+        self.calibration_data = None
+        self.baseline_vertical_ratio = None
+        self.baseline_horizontal_ratio = None
+        self.ring = None
+        self._ring_stale = False
+        self._reserved = None
+        self._ring_lock = mp.get_context("spawn").Lock()
+        self.worker = WorkerProcess(
+            "FaceAnalyzerWorker", _face_worker_main, (dict(use_dlib=use_dlib, use_emotion=use_emotion, max_faces=max_faces), self._ring_lock),
+            on_restart=self._on_restart,
+        )
+
+    def _on_restart(self):
+        # The dead child may have died holding a pin, so start over with a
+        # fresh ring on the next frame (the old one is still released by the
+        # analyze_frame call that is unwinding right now).
+        self._ring_stale = True
+        self._push_calibration()
+
+    def _ring_for(self, shape):
+        if self.ring is None or self._ring_stale or self.ring.shape != tuple(shape):
+            # first frame, worker restarted, or analysis size changed (watchdog)
+            self._ring_stale = False
+            if self.ring is not None:
+                self.ring.close()
+            self.ring = SharedFrameRing.create(self._ring_lock, shape, n_slots=self.ring_slots)
+            self._reserved = None
+            self.worker.send(("ring", self.ring.spec()))
+        return self.ring
+
+    def frame_buffer(self, shape):
+        # Writable shared slot for the next frame, so the capture pipeline can
+        # render straight into it (dst=...) and analyze_frame skips the copy.
+        slot = self._ring_for(shape).acquire_write_slot()
+        self._reserved = slot
+        return slot[1] if slot is not None else None
+
+    def set_calibration(self, calib, baseline_v, baseline_h):
+        self.calibration_data = calib
+        self.baseline_vertical_ratio = baseline_v
+        self.baseline_horizontal_ratio = baseline_h
+        self._push_calibration()
+
+    def _push_calibration(self):
+        self.worker.send(("calibration", self.calibration_data,
+                          self.baseline_vertical_ratio, self.baseline_horizontal_ratio))
+
+    def analyze_frame(self, frame):
+        ring = self._ring_for(frame.shape)
+        slot, self._reserved = self._reserved, None
+        if slot is None or not np.may_share_memory(frame, slot[1]):
+            slot = ring.acquire_write_slot()
+            if slot is None:
+                raise RuntimeError("no free frame slot")
+            np.copyto(slot[1], frame)
+        idx = slot[0]
+        seq = ring.commit(idx)
+
+        reply = self.worker.request(("slot", idx, seq, bool(self.skip_emotion)), self.timeout)
+        if reply is None:
+            raise RuntimeError("face worker unavailable")
+        kind, payload = reply
+        if kind == "error":
+            raise RuntimeError(payload)
+        return payload
+
+    def close(self):
+        self.worker.stop()
+        if self.ring is not None:
+            self.ring.close()
+            self.ring = None
+
+
+class RemoteIntentionalActionRecognizer:
+    # Same async surface as IntentionalActionRecognizer (trigger / poll);
+    # CLIP runs in its own process so torch never holds the GUI's GIL.
+
+    def __init__(self, model_name="openai/clip-vit-base-patch32", timeout=15.0):
+        self.defined_actions = []
+        self.timeout = timeout  # per detection, once CLIP is loaded
+        self._last_result = (False, None, 0.0)
+        self._pending = False
+        self._sent_at = 0.0
+        self.worker = WorkerProcess(
+            "IAWorker", _ia_worker_main, (dict(model_name=model_name),),
+            on_restart=self._on_restart,
+        )
+
+    def _on_restart(self):
+        self._pending = False
+        self.worker.send(("actions", list(self.defined_actions)))
+
+    def set_defined_actions(self, actions):
+        self.defined_actions = list(actions)
+        self.worker.send(("actions", self.defined_actions))
+        print(f"[IA] Set defined actions: {actions}")
+
+    def trigger_async_detection(self, frame, threshold=0.4, neutral_action="sitting and working"):
+        # one detection in flight at a time, like the threaded version
+        if self._pending:
+            self._collect()
+        if not self._pending:
+            self._pending = self.worker.send(("detect", frame, threshold, neutral_action))
+            self._sent_at = time.perf_counter()
+
+    def _collect(self):
+        reply = self.worker.poll_reply()
+        if reply is None:
+            # a hung child (ready but silent past timeout) is restarted, as in
+            # WorkerProcess.request; _on_restart clears _pending
+            if not self._pending:
+                return
+            if not self.worker._ready:
+                self._sent_at = time.perf_counter()  # still loading CLIP; don't count that
+            elif time.perf_counter() - self._sent_at > self.timeout:
+                self.worker.restart(f"did not answer within {self.timeout:.1f}s")
+            return
+        self._pending = False
+        kind, payload = reply
+        if kind == "result":
+            self._last_result = tuple(payload)
+        else:
+            print(f"[IA] Worker error: {payload}")
+
+    def get_last_result(self):
+        if self._pending:
+            self._collect()
+        return self._last_result
+
+    def close(self):
+        self.worker.stop()
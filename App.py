@@ -1,12 +1,26 @@
-from FocusMonitor import FocusMonitor, generate_alert_audio
-generate_alert_audio()
-
 import sys
+import threading
 from PyQt6.QtWidgets import QApplication
 from GUI import MainWindow
 
+
+def _ensure_default_alert_audio():
+    # Off the startup path: only synthesizes (network + decode) when alert.wav
+    # is missing or stale, and never delays the login window.
+    try:
+        from FocusMonitor import ensure_alert_audio
+        ensure_alert_audio()
+    except Exception as e:
+        print(f"[App] Could not prepare default alert audio: {e}")
+
+
 if __name__ == "__main__":
     app = QApplication(sys.argv)
     window = MainWindow()
     window.show()
+
+    # inside the main guard: analysis worker processes are spawned and
+    # re-import this module, and must not touch the alert audio
+    threading.Thread(target=_ensure_default_alert_audio, daemon=True).start()
+
     sys.exit(app.exec())
\ No newline at end of file
@@ -0,0 +1,94 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+
+# Content-addressed, size-capped store of synthesized alert clips.  A clip is
+# keyed by sha256 of (text, voice, TTS engine, engine version), so any user or
+# setting that asks for the same words in the same voice reuses the file, and
+# an engine upgrade naturally misses.  Recency is the file's mtime: get()
+# touches it and eviction removes the oldest files first.
+
+DEFAULT_FOLDER = os.path.join("alerts", "cache")
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+
+
+def clip_key(text, voice, engine, engine_version):
+    payload = json.dumps([text, voice, engine, engine_version], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class AudioCache:
+
+    def __init__(self, folder=DEFAULT_FOLDER, max_bytes=DEFAULT_MAX_BYTES, suffix=".wav"):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self._lock = threading.Lock()
+
+    def path(self, key):
+        return os.path.join(self.folder, key + self.suffix)
+
+    def get(self, key):
+        # path of the cached clip (and mark it recently used), or None
+        path = self.path(key)
+        try:
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+
+    def put(self, key, data):
+        # store bytes atomically (temp file + rename) and trim the cache
+        os.makedirs(self.folder, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(suffix=self.suffix + ".tmp", dir=self.folder)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, self.path(key))
+        except BaseException:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            raise
+        self.evict(keep=key)
+        return self.path(key)
+
+    def evict(self, keep=None):
+        # drop least recently used clips until the cache fits max_bytes
+        with self._lock:
+            try:
+                names = [n for n in os.listdir(self.folder) if n.endswith(self.suffix)]
+            except OSError:
+                return
+            entries = []
+            for name in names:
+                p = os.path.join(self.folder, name)
+                try:
+                    st = os.stat(p)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, p))
+            total = sum(size for _, size, _ in entries)
+            keep_path = self.path(keep) if keep else None
+            for _, size, p in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                if p == keep_path:
+                    continue
+                try:
+                    os.remove(p)
+                    total -= size
+                    print(f"[AudioCache] Evicted {os.path.basename(p)}")
+                except OSError:
+                    pass
+
+    def size_bytes(self):
+        try:
+            return sum(os.path.getsize(os.path.join(self.folder, n))
+                       for n in os.listdir(self.folder) if n.endswith(self.suffix))
+        except OSError:
+            return 0
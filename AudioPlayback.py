@@ -0,0 +1,301 @@
+import io
+import os
+import queue
+import threading
+import time
+import wave
+from collections import deque
+
+import numpy as np
+
+
+# Resident alert player.  One sounddevice OutputStream stays open on the
+# user's output_device; the current alert is held in memory as float32 PCM
+# already resampled to the device rate, so play() only swaps a pointer that
+# the audio callback picks up on its next block - no thread, file I/O or
+# mixer setup per alert.  Volume is applied in the callback.
+#
+# Trigger-to-audio latency (call to play() until the first sample is due at
+# the DAC) is measured in the callback and logged by one reporter thread.
+# Without sounddevice / an output device it falls back to pygame.
+
+
+def volume_gain_db(volume_pct):
+    # perceptual volume curve: 0-100% -> -60..0 dB
+    v = max(0, min(int(volume_pct), 100)) / 100.0
+    if v <= 0.0:
+        return -60.0
+    if v >= 1.0:
+        return 0.0
+    return -60.0 * (1.0 - (v ** 0.5))
+
+
+def volume_scale(volume_pct):
+    # volume_gain_db as a linear amplitude factor (mixer volume / sample scale)
+    return 10.0 ** (volume_gain_db(volume_pct) / 20.0)
+
+
+def load_wav(filename):
+    # (mono float32 samples in [-1, 1], sample rate) from a PCM WAV file or
+    # file-like object
+    with wave.open(filename, "rb") as w:
+        rate = w.getframerate()
+        channels = w.getnchannels()
+        width = w.getsampwidth()
+        raw = w.readframes(w.getnframes())
+    if width == 2:
+        pcm = np.frombuffer(raw, dtype="<i2").astype(np.float32) / 32768.0
+    elif width == 4:
+        pcm = np.frombuffer(raw, dtype="<i4").astype(np.float32) / 2147483648.0
+    elif width == 1:
+        pcm = (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    else:
+        raise ValueError(f"unsupported sample width: {width}")
+    if channels > 1:
+        pcm = pcm.reshape(-1, channels).mean(axis=1)
+    return pcm, rate
+
+
+def decode_mp3(data):
+    # (mono float32 samples, sample rate) from mp3 bytes, decoded in-process
+    # with miniaudio.  Without it pydub is used, which starts ffmpeg.
+    try:
+        import miniaudio
+    except ImportError:
+        miniaudio = None
+    if miniaudio is not None:
+        decoded = miniaudio.decode(data, output_format=miniaudio.SampleFormat.FLOAT32, nchannels=1)
+        return np.frombuffer(decoded.samples, dtype=np.float32), decoded.sample_rate
+    print("[Audio] miniaudio not installed, decoding mp3 with pydub/ffmpeg")
+    from pydub import AudioSegment
+    seg = AudioSegment.from_file(io.BytesIO(data), format="mp3").set_channels(1).set_sample_width(2)
+    return np.array(seg.get_array_of_samples(), dtype=np.float32) / 32768.0, seg.frame_rate
+
+
+def wav_bytes(pcm, rate):
+    # 16-bit mono PCM WAV file contents for float32 samples in [-1, 1]
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(int(rate))
+        w.writeframes((np.clip(pcm, -1.0, 1.0) * 32767.0).astype("<i2").tobytes())
+    return buf.getvalue()
+
+
+def resample(pcm, rate, target_rate):
+    # linear interpolation; plenty for a short spoken alert
+    if rate == target_rate or len(pcm) == 0:
+        return pcm.astype(np.float32, copy=False)
+    n = int(round(len(pcm) * target_rate / rate))
+    x = np.linspace(0.0, len(pcm) - 1, n)
+    return np.interp(x, np.arange(len(pcm)), pcm).astype(np.float32)
+
+
+class _Playback:
+    __slots__ = ("buf", "pos", "scale", "t0", "done")
+
+    def __init__(self, buf, scale, t0):
+        self.buf = buf
+        self.pos = 0
+        self.scale = scale
+        self.t0 = t0
+        self.done = False
+
+
+class AlertPlayer:
+
+    def __init__(self, device=None, blocksize=256):
+        self.device = device or None  # name from sounddevice.query_devices(), None = default
+        self.blocksize = blocksize
+        self.volume_scale = 1.0
+        self._lock = threading.Lock()
+        self._stream = None
+        self._rate = None
+        self._channels = 1
+        self._clip = None          # (filename, mtime, samples at device rate)
+        self._current = None       # _Playback read by the audio callback
+        self._latencies = queue.SimpleQueue()
+        self.latency_ms = deque(maxlen=50)
+        self._reporter = None
+        self._unavailable = False
+
+    # --- configuration ----------------------------------------------------
+
+    def set_device(self, name):
+        name = name or None
+        if name in ("Default Output",):
+            name = None
+        with self._lock:
+            if name == self.device:
+                return
+            self.device = name
+            self._close_stream()
+            self._unavailable = False
+            clip = self._clip
+        if clip is not None:
+            self.load(clip[0], force=True)  # resample for the new device rate
+
+    def set_volume(self, volume_pct):
+        self.volume_scale = volume_scale(volume_pct)
+
+    def load(self, filename, force=False):
+        # Preload a clip into memory (and open the stream).  Cheap if it is
+        # already loaded and unchanged on disk.
+        try:
+            mtime = os.path.getmtime(filename)
+        except OSError:
+            return False
+        clip = self._clip
+        if not force and clip is not None and clip[0] == filename and clip[1] == mtime:
+            return True
+        if not self._ensure_stream():
+            return False
+        pcm, rate = load_wav(filename)
+        self._clip = (filename, mtime, resample(pcm, rate, self._rate))
+        return True
+
+    # --- playback ---------------------------------------------------------
+
+    def play(self, filename=None, volume_pct=None):
+        # Non-blocking.  Plays the preloaded clip (loading `filename` first if
+        # it is a different file; call load() after regenerating the same
+        # file).  Returns False if it had to fall back.
+        t0 = time.perf_counter()
+        if volume_pct is not None:
+            self.set_volume(volume_pct)
+        clip = self._clip
+        if filename is not None and (clip is None or clip[0] != filename):
+            try:
+                if not self.load(filename):
+                    return self._fallback(filename)
+            except Exception as e:
+                print(f"[Audio] Could not load {filename}: {e}")
+                return self._fallback(filename)
+        clip = self._clip
+        if clip is None or self._stream is None:
+            return self._fallback(filename or (clip[0] if clip else None))
+        self._current = _Playback(clip[2], self.volume_scale, t0)
+        return True
+
+    def play_samples(self, pcm, rate, volume_pct=None):
+        # play an in-memory mono float32 buffer (previews) without touching the preloaded alert
+        t0 = time.perf_counter()
+        if volume_pct is not None:
+            self.set_volume(volume_pct)
+        if not self._ensure_stream():
+            print("[Audio] No output stream for preview")
+            return False
+        self._current = _Playback(resample(pcm, rate, self._rate), self.volume_scale, t0)
+        return True
+
+    def stop(self):
+        self._current = None
+
+    def close(self):
+        with self._lock:
+            self._close_stream()
+
+    # --- internals --------------------------------------------------------
+
+    def _device_index(self, sd):
+        if self.device is None:
+            return None
+        for i, d in enumerate(sd.query_devices()):
+            if d["name"] == self.device and d["max_output_channels"] > 0:
+                return i
+        print(f"[Audio] Output device not found, using default: {self.device}")
+        return None
+
+    def _ensure_stream(self):
+        with self._lock:
+            if self._stream is not None:
+                return True
+            if self._unavailable:
+                return False
+            try:
+                import sounddevice as sd
+                index = self._device_index(sd)
+                info = sd.query_devices(index, "output")
+                self._rate = int(info["default_samplerate"])
+                self._channels = max(1, min(2, int(info["max_output_channels"])))
+                stream = sd.OutputStream(device=index, samplerate=self._rate, channels=self._channels,
+                                         dtype="float32", blocksize=self.blocksize,
+                                         latency="low", callback=self._callback)
+                stream.start()
+            except Exception as e:
+                print(f"[Audio] Could not open output stream ({e}); falling back to pygame")
+                self._unavailable = True
+                return False
+            self._stream = stream
+            print(f"[Audio] Output stream open on {info['name']} at {self._rate} Hz")
+            if self._reporter is None:
+                self._reporter = threading.Thread(target=self._report, name="AlertLatency", daemon=True)
+                self._reporter.start()
+            return True
+
+    def _close_stream(self):
+        stream, self._stream = self._stream, None
+        self._current = None
+        if stream is not None:
+            try:
+                stream.stop()
+                stream.close()
+            except Exception as e:
+                print(f"[Audio] Error closing stream: {e}")
+
+    def _callback(self, outdata, frames, time_info, status):
+        pb = self._current
+        if pb is None or pb.done:
+            outdata.fill(0)
+            return
+        if pb.pos == 0:
+            # first block of this alert: time until its first sample reaches the DAC
+            dac_delay = max(0.0, time_info.outputBufferDacTime - time_info.currentTime)
+            self._latencies.put((time.perf_counter() - pb.t0 + dac_delay) * 1000.0)
+        chunk = pb.buf[pb.pos:pb.pos + frames]
+        n = len(chunk)
+        outdata[:n] = (chunk * pb.scale)[:, None]
+        outdata[n:] = 0
+        pb.pos += n
+        if pb.pos >= len(pb.buf):
+            pb.done = True
+
+    def _report(self):
+        while True:
+            ms = self._latencies.get()
+            self.latency_ms.append(ms)
+            print(f"[Audio] Trigger-to-audio latency: {ms:.1f} ms "
+                  f"(median {float(np.median(self.latency_ms)):.1f} ms over {len(self.latency_ms)})")
+
+    def _fallback(self, filename):
+        if not filename or not os.path.exists(filename):
+            print("[Audio] Nothing to play")
+            return False
+        scale = self.volume_scale
+
+        def _play():
+            try:
+                import pygame
+                if not pygame.mixer.get_init():
+                    pygame.mixer.init()
+                pygame.mixer.music.load(filename)
+                pygame.mixer.music.set_volume(scale)
+                pygame.mixer.music.play()
+            except Exception as e:
+                print(f"[Pygame Playback Error] {e}")
+        threading.Thread(target=_play, daemon=True).start()
+        return False
+
+
+_player = None
+_player_lock = threading.Lock()
+
+
+def alert_player():
+    # process-wide resident player
+    global _player
+    with _player_lock:
+        if _player is None:
+            _player = AlertPlayer()
+        return _player
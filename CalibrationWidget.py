@@ -0,0 +1,257 @@
+import threading
+import time
+
+import cv2
+from PyQt6.QtCore import Qt, QTimer, QPointF
+from PyQt6.QtGui import QPainter, QPen, QColor, QFont, QPolygonF
+from PyQt6.QtWidgets import QWidget
+
+from FaceAnalysis import CALIBRATION_POINTS, GazeConvergence
+
+
+class CalibrationSession:
+    # Worker-thread side of calibration.  Reads frames from the capture (a
+    # CameraLease or cv2.VideoCapture) and runs them through the analyzer's
+    # FaceMesh path; the widget only reads snapshot() and calls proceed() /
+    # cancel(), so the Qt event loop never waits on the camera or the model.
+    #
+    # Each point samples until GazeConvergence says the estimate is stable
+    # (convergence: its keyword arguments).  A point that ends with too few
+    # valid FaceMesh samples is asked for once more, then kept but flagged.
+
+    def __init__(self, analyzer, cap, convergence=None, retries=1):
+        self.analyzer = analyzer
+        self.cap = cap
+        self.convergence = convergence or {}
+        self.retries = retries
+        self._lock = threading.Lock()
+        self._proceed = threading.Event()
+        self._cancel = threading.Event()
+        self._state = {
+            "index": 0,
+            "phase": "waiting",    # waiting | sampling | done | cancelled | failed
+            "progress": 0.0,       # 0..1 while sampling
+            "face_found": False,
+            "message": "",
+        }
+        self.result = None
+        self._thread = threading.Thread(target=self._run, name="Calibration", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._state)
+
+    def proceed(self):
+        # user is looking at the current point (SPACE)
+        self._proceed.set()
+
+    def cancel(self):
+        self._cancel.set()
+        self._proceed.set()
+
+    def _set(self, **kw):
+        with self._lock:
+            self._state.update(kw)
+
+    def _next_sample(self):
+        # (v, h) or (None, None) for the next frame; False if the camera is gone
+        ret, frame = self.cap.read()
+        if not ret:
+            return False
+        return self.analyzer.gaze_ratios(cv2.flip(frame, 1))
+
+    def _run(self):
+        data = {}
+        try:
+            for index, (label, _) in enumerate(CALIBRATION_POINTS):
+                name = label.replace('_', ' ')
+                self._set(message="")
+                point = self._sample_point(index)
+                for _ in range(self.retries):
+                    if point is False or (point is not None and not point["low_samples"]):
+                        break
+                    self._set(message=f"Not enough face samples at {name}. Press SPACE to try this point again.")
+                    print(f"[Calibration] {self._state['message']}")
+                    point = self._sample_point(index)
+                if point is False:
+                    return
+                if point is None:
+                    self._set(phase="failed", message=f"No face found while looking at {name}.")
+                    return
+                data[label] = point
+                print(f"[Calibration] {label}: v={point['v']:.3f} h={point['h']:.3f} "
+                      f"({point['n']} samples in {point['seconds']:.1f}s, spread {point['spread']:.3f}"
+                      f"{', converged' if point['converged'] else ''}"
+                      f"{', LOW SAMPLES' if point['low_samples'] else ''})")
+
+            self.result = data
+            self._set(phase="done", message="")
+        except Exception as e:
+            print(f"[Calibration] Error: {e}")
+            self._set(phase="failed", message=str(e))
+
+    def _sample_point(self, index):
+        # GazeConvergence.result() for one point, None without any valid
+        # sample, or False if the session ended (cancelled / camera gone)
+        self._proceed.clear()
+        self._set(index=index, phase="waiting", progress=0.0)
+        # keep checking for a face so the user can see it's being tracked
+        while not self._proceed.is_set():
+            sample = self._next_sample()
+            if sample is False:
+                self._set(phase="failed", message="Camera stopped delivering frames.")
+                return False
+            self._set(face_found=sample[0] is not None)
+        if self._cancel.is_set():
+            self._set(phase="cancelled")
+            return False
+
+        self._set(phase="sampling", message="")
+        tracker = GazeConvergence(**self.convergence)
+        start = time.monotonic()
+        elapsed = 0.0
+        while not tracker.done(elapsed):
+            if self._cancel.is_set():
+                self._set(phase="cancelled")
+                return False
+            sample = self._next_sample()
+            if sample is False:
+                self._set(phase="failed", message="Camera stopped delivering frames.")
+                return False
+            tracker.add(*sample)
+            elapsed = time.monotonic() - start
+            self._set(progress=tracker.progress(elapsed), face_found=sample[0] is not None)
+        return tracker.result(elapsed)
+
+
+class CalibrationWidget(QWidget):
+    # Full-screen calibration targets.  A QTimer polls the session ~30 times a
+    # second for repaints; on_done(calibration_data or None) runs on the GUI
+    # thread once the session ends.  SPACE confirms a point, ESC cancels.
+
+    def __init__(self, analyzer, cap, on_done, convergence=None, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Calibration")
+        self.setWindowModality(Qt.WindowModality.ApplicationModal)
+        self.setFocusPolicy(Qt.FocusPolicy.StrongFocus)
+        self.on_done = on_done
+        self.session = CalibrationSession(analyzer, cap, convergence=convergence)
+        self._state = self.session.snapshot()
+        self._finished = False
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(33)
+        self.timer.timeout.connect(self._poll)
+
+    def start(self):
+        self.showFullScreen()
+        self.activateWindow()
+        self.session.start()
+        self.timer.start()
+
+    def _poll(self):
+        state = self.session.snapshot()
+        if state != self._state:
+            self._state = state
+            self.update()
+        if state["phase"] in ("done", "cancelled", "failed"):
+            if state["message"]:
+                print(f"[Calibration] {state['message']}")
+            self._finish(self.session.result if state["phase"] == "done" else None)
+
+    def _finish(self, result):
+        if self._finished:
+            return
+        self._finished = True
+        self.timer.stop()
+        self.session.cancel()
+        self.close()
+        self.on_done(result)
+
+    def keyPressEvent(self, event):
+        if event.key() == Qt.Key.Key_Space:
+            self.session.proceed()
+        elif event.key() == Qt.Key.Key_Escape:
+            self._finish(None)
+        else:
+            super().keyPressEvent(event)
+
+    def closeEvent(self, event):
+        # closing the window (Alt+F4 etc.) cancels
+        if not self._finished:
+            self._finished = True
+            self.timer.stop()
+            self.session.cancel()
+            self.on_done(None)
+        super().closeEvent(event)
+
+    def paintEvent(self, event):
+        state = self._state
+        label, (fx, fy) = CALIBRATION_POINTS[state["index"]]
+        w, h = self.width(), self.height()
+        px, py = int(fx * w), int(fy * h)
+
+        p = QPainter(self)
+        p.setRenderHint(QPainter.RenderHint.Antialiasing)
+        p.fillRect(self.rect(), QColor(20, 20, 20))
+
+        font = QFont(p.font())
+        font.setPointSize(16)
+        p.setFont(font)
+        p.setPen(QColor(255, 255, 255))
+        if state["index"] == 0 and state["phase"] == "waiting":
+            lines = ["Calibration beginning...",
+                     "Press SPACE for each calibration dot and",
+                     "stare at the dot for as long as it appears.",
+                     "Press ESC to cancel."]
+            for i, line in enumerate(lines):
+                p.drawText(0, int(h * 0.35) + i * 32, w, 32, Qt.AlignmentFlag.AlignHCenter, line)
+
+        # arrow pointing at the dot from the inside of the screen
+        dx = 0 if fx == 0.5 else (1 if fx < 0.5 else -1)
+        dy = -1 if fy == 0.5 else (1 if fy < 0.5 else -1)
+        tip = QPointF(px + 15 * dx, py + 15 * dy)
+        base = QPointF(tip.x() + 50 * dx, tip.y() + 50 * dy)
+        p.setPen(QPen(QColor(255, 130, 130), 2))
+        p.drawLine(base, tip)
+        ux, uy = (tip.x() - base.x()), (tip.y() - base.y())
+        norm = max((ux * ux + uy * uy) ** 0.5, 1e-6)
+        ux, uy = ux / norm, uy / norm
+        head = QPolygonF([tip,
+                          QPointF(tip.x() - 12 * ux - 6 * uy, tip.y() - 12 * uy + 6 * ux),
+                          QPointF(tip.x() - 12 * ux + 6 * uy, tip.y() - 12 * uy - 6 * ux)])
+        p.setBrush(QColor(255, 130, 130))
+        p.drawPolygon(head)
+
+        # dot, with a progress ring while sampling
+        p.setPen(Qt.PenStyle.NoPen)
+        p.setBrush(QColor(0, 255, 0))
+        p.drawEllipse(QPointF(px, py), 6, 6)
+        if state["phase"] == "sampling":
+            p.setBrush(Qt.BrushStyle.NoBrush)
+            p.setPen(QPen(QColor(0, 255, 0), 3))
+            p.drawArc(px - 18, py - 18, 36, 36, 90 * 16, -int(360 * 16 * state["progress"]))
+
+        font.setPointSize(11)
+        p.setFont(font)
+        text_x = px + (70 if fx < 0.5 else (-220 if fx > 0.5 else -75))
+        text_y = py + (70 if fy < 0.5 else (-70 if fy > 0.5 else -80))
+        if state["phase"] == "sampling":
+            p.setPen(QColor(0, 255, 0))
+            p.drawText(text_x, text_y, "Calibrating...")
+        else:
+            p.setPen(QColor(255, 100, 100))
+            p.drawText(text_x, text_y, f"Look here ({label.replace('_', ' ')}), then press SPACE")
+
+        if state["message"]:
+            p.setPen(QColor(255, 200, 80))
+            p.drawText(0, h - 70, w, 30, Qt.AlignmentFlag.AlignHCenter, state["message"])
+
+        # face tracking indicator
+        p.setPen(QColor(102, 187, 106) if state["face_found"] else QColor(239, 83, 80))
+        p.drawText(0, h - 40, w, 30, Qt.AlignmentFlag.AlignHCenter,
+                   "Face detected" if state["face_found"] else "No face detected - face the camera")
+        p.end()
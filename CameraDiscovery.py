@@ -0,0 +1,296 @@
+import ctypes
+import glob
+import os
+import re
+import sys
+import threading
+import time
+
+
+# Finds webcams without opening capture streams.  On Linux every /dev/video*
+# node is queried through V4L2 ioctls (QUERYCAP, ENUM_FMT, ENUM_FRAMESIZES,
+# ENUM_FRAMEINTERVALS), which only reads driver metadata and never starts the
+# sensor.  Elsewhere it falls back to probing indices with cv2.  Enumeration
+# runs on a background thread; results are cached and only refreshed when the
+# set of device nodes changes (hot-plug) or refresh() is called.
+#
+# Each camera is a dict:
+#   {"index": 0, "path": "/dev/video0", "name": "Integrated Camera",
+#    "driver": "uvcvideo", "bus": "usb-0000:00:14.0-5",
+#    "modes": [{"format": "MJPG", "width": 1280, "height": 720, "fps": [30.0]}, ...]}
+
+
+# --- V4L2 (linux/videodev2.h) ------------------------------------------------
+
+def _iowr(nr, size, read_only=False):
+    direction = 2 if read_only else 3  # _IOR / _IOWR
+    return (direction << 30) | (size << 16) | (ord('V') << 8) | nr
+
+
+class _Capability(ctypes.Structure):
+    _fields_ = [
+        ("driver", ctypes.c_char * 16),
+        ("card", ctypes.c_char * 32),
+        ("bus_info", ctypes.c_char * 32),
+        ("version", ctypes.c_uint32),
+        ("capabilities", ctypes.c_uint32),
+        ("device_caps", ctypes.c_uint32),
+        ("reserved", ctypes.c_uint32 * 3),
+    ]
+
+
+class _FmtDesc(ctypes.Structure):
+    _fields_ = [
+        ("index", ctypes.c_uint32),
+        ("type", ctypes.c_uint32),
+        ("flags", ctypes.c_uint32),
+        ("description", ctypes.c_char * 32),
+        ("pixelformat", ctypes.c_uint32),
+        ("mbus_code", ctypes.c_uint32),
+        ("reserved", ctypes.c_uint32 * 3),
+    ]
+
+
+class _FrmSizeEnum(ctypes.Structure):
+    _fields_ = [
+        ("index", ctypes.c_uint32),
+        ("pixel_format", ctypes.c_uint32),
+        ("type", ctypes.c_uint32),
+        # discrete: (width, height); stepwise: (min_w, max_w, step_w, min_h, max_h, step_h)
+        ("u", ctypes.c_uint32 * 6),
+        ("reserved", ctypes.c_uint32 * 2),
+    ]
+
+
+class _FrmIvalEnum(ctypes.Structure):
+    _fields_ = [
+        ("index", ctypes.c_uint32),
+        ("pixel_format", ctypes.c_uint32),
+        ("width", ctypes.c_uint32),
+        ("height", ctypes.c_uint32),
+        ("type", ctypes.c_uint32),
+        # discrete: (numerator, denominator); stepwise: min, max, step fractions
+        ("u", ctypes.c_uint32 * 6),
+        ("reserved", ctypes.c_uint32 * 2),
+    ]
+
+
+VIDIOC_QUERYCAP = _iowr(0, ctypes.sizeof(_Capability), read_only=True)
+VIDIOC_ENUM_FMT = _iowr(2, ctypes.sizeof(_FmtDesc))
+VIDIOC_ENUM_FRAMESIZES = _iowr(74, ctypes.sizeof(_FrmSizeEnum))
+VIDIOC_ENUM_FRAMEINTERVALS = _iowr(75, ctypes.sizeof(_FrmIvalEnum))
+
+V4L2_CAP_VIDEO_CAPTURE = 0x00000001
+V4L2_CAP_DEVICE_CAPS = 0x80000000
+V4L2_BUF_TYPE_VIDEO_CAPTURE = 1
+V4L2_FRMSIZE_TYPE_DISCRETE = 1
+V4L2_FRMIVAL_TYPE_DISCRETE = 1
+
+
+def _fourcc(code):
+    return "".join(chr((code >> (8 * i)) & 0xFF) for i in range(4)).strip()
+
+
+def _ioctl_iter(fd, request, struct_type, **fields):
+    # yield filled structs for index 0, 1, ... until the driver says EINVAL
+    import fcntl
+    index = 0
+    while True:
+        s = struct_type(index=index, **fields)
+        try:
+            fcntl.ioctl(fd, request, s)
+        except OSError:
+            return
+        yield s
+        index += 1
+
+
+def _frame_rates(fd, pixelformat, width, height):
+    rates = []
+    for iv in _ioctl_iter(fd, VIDIOC_ENUM_FRAMEINTERVALS, _FrmIvalEnum,
+                          pixel_format=pixelformat, width=width, height=height):
+        if iv.type != V4L2_FRMIVAL_TYPE_DISCRETE:
+            # stepwise / continuous: report the fastest rate
+            num, den = iv.u[0], iv.u[1]
+            if num:
+                rates.append(round(den / num, 2))
+            break
+        if iv.u[0]:
+            rates.append(round(iv.u[1] / iv.u[0], 2))
+    return sorted(set(rates), reverse=True)
+
+
+def _v4l2_modes(fd):
+    modes = []
+    for fmt in _ioctl_iter(fd, VIDIOC_ENUM_FMT, _FmtDesc, type=V4L2_BUF_TYPE_VIDEO_CAPTURE):
+        for fs in _ioctl_iter(fd, VIDIOC_ENUM_FRAMESIZES, _FrmSizeEnum, pixel_format=fmt.pixelformat):
+            if fs.type == V4L2_FRMSIZE_TYPE_DISCRETE:
+                w, h = fs.u[0], fs.u[1]
+            else:
+                w, h = fs.u[1], fs.u[4]  # largest stepwise size
+            modes.append({
+                "format": _fourcc(fmt.pixelformat),
+                "width": int(w),
+                "height": int(h),
+                "fps": _frame_rates(fd, fmt.pixelformat, w, h),
+            })
+            if fs.type != V4L2_FRMSIZE_TYPE_DISCRETE:
+                break
+    return modes
+
+
+def _query_v4l2(path):
+    # camera dict for a capture-capable node, or None (metadata nodes, busy, ...)
+    import fcntl
+    m = re.search(r"(\d+)$", path)
+    if not m:
+        return None
+    try:
+        fd = os.open(path, os.O_RDWR | os.O_NONBLOCK)
+    except OSError:
+        return None
+    try:
+        cap = _Capability()
+        try:
+            fcntl.ioctl(fd, VIDIOC_QUERYCAP, cap)
+        except OSError:
+            return None
+        caps = cap.device_caps if cap.capabilities & V4L2_CAP_DEVICE_CAPS else cap.capabilities
+        if not caps & V4L2_CAP_VIDEO_CAPTURE:
+            return None  # e.g. the UVC metadata node that sits next to each camera
+        return {
+            "index": int(m.group(1)),
+            "path": path,
+            "name": cap.card.decode(errors="replace") or os.path.basename(path),
+            "driver": cap.driver.decode(errors="replace"),
+            "bus": cap.bus_info.decode(errors="replace"),
+            "modes": _v4l2_modes(fd),
+        }
+    finally:
+        os.close(fd)
+
+
+def _device_nodes():
+    return sorted(glob.glob("/dev/video*"), key=lambda p: int(re.sub(r"\D", "", p) or 0))
+
+
+def _probe_cv2(max_index=5):
+    # non-Linux fallback: this does open each device, but only off the UI thread
+    import cv2
+    backend = cv2.CAP_DSHOW if sys.platform == "win32" else cv2.CAP_ANY
+    cams = []
+    for idx in range(max_index):
+        cap = cv2.VideoCapture(idx, backend)
+        if cap.isOpened():
+            cams.append({"index": idx, "path": None, "name": f"Camera {idx}",
+                         "driver": "", "bus": "", "modes": []})
+        cap.release()
+    return cams
+
+
+def enumerate_cameras():
+    # Synchronous enumeration; prefer CameraDiscovery for anything on the UI thread.
+    if sys.platform.startswith("linux"):
+        cams = [c for c in (_query_v4l2(p) for p in _device_nodes()) if c]
+        # several nodes can belong to one camera; keep the first per bus + name
+        seen, unique = set(), []
+        for c in cams:
+            key = (c["bus"], c["name"])
+            if c["bus"] and key in seen:
+                continue
+            seen.add(key)
+            unique.append(c)
+        return unique
+    return _probe_cv2()
+
+
+class CameraDiscovery:
+    # Background, cached camera list.  Listeners are called from the discovery
+    # thread with the new list whenever it changes; Qt code should marshal the
+    # call back to the GUI thread (e.g. through a signal).
+
+    def __init__(self, poll_seconds=2.0):
+        self.poll_seconds = poll_seconds
+        self._lock = threading.Lock()
+        self._cameras = None
+        self._nodes = None
+        self._listeners = []
+        self._wake = threading.Event()
+        self._thread = None
+        self.last_scan_seconds = None
+
+    def start(self):
+        # idempotent; the first scan begins immediately
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="CameraDiscovery", daemon=True)
+            self._thread.start()
+
+    def cameras(self):
+        # cached list, or None if the first scan has not finished yet
+        with self._lock:
+            return None if self._cameras is None else list(self._cameras)
+
+    def refresh(self):
+        # force a rescan on the discovery thread
+        with self._lock:
+            self._nodes = None
+        self.start()
+        self._wake.set()
+
+    def add_listener(self, callback):
+        with self._lock:
+            self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        with self._lock:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+
+    def _run(self):
+        linux = sys.platform.startswith("linux")
+        while True:
+            self._wake.clear()
+            # hot-plug check: listing /dev is cheap, a rescan only happens when it changes
+            nodes = tuple(_device_nodes()) if linux else ()
+            with self._lock:
+                changed = self._cameras is None or self._nodes is None or nodes != self._nodes
+            if changed:
+                t0 = time.perf_counter()
+                try:
+                    cams = enumerate_cameras()
+                except Exception as e:
+                    print(f"[Cameras] Enumeration failed: {e}")
+                    cams = []
+                self.last_scan_seconds = time.perf_counter() - t0
+                with self._lock:
+                    self._cameras = cams
+                    self._nodes = nodes
+                    listeners = list(self._listeners)
+                print(f"[Cameras] Found {len(cams)} camera(s) in {self.last_scan_seconds * 1000:.0f} ms")
+                for cb in listeners:
+                    try:
+                        cb(list(cams))
+                    except Exception as e:
+                        print(f"[Cameras] Listener error: {e}")
+            # without /dev nodes to watch (non-Linux) only explicit refresh() rescans
+            self._wake.wait(self.poll_seconds if linux else None)
+
+
+_discovery = None
+
+
+def camera_discovery():
+    # process-wide instance, started on first use
+    global _discovery
+    if _discovery is None:
+        _discovery = CameraDiscovery()
+    _discovery.start()
+    return _discovery
+
+
+def camera_label(cam):
+    best = max(cam["modes"], key=lambda m: m["width"] * m["height"], default=None)
+    suffix = f" ({best['width']}x{best['height']})" if best else ""
+    return f"{cam['index']}: {cam['name']}{suffix}"
@@ -0,0 +1,251 @@
+import sys
+import threading
+import time
+
+import cv2
+
+
+# Owns the selected webcam for the whole session.  The device is opened once,
+# on a background thread, with format / size / fps applied at open time, and
+# then kept streaming so calibrate -> monitor -> pause -> resume never pays the
+# open latency again.  Consumers get a CameraLease, which looks like a
+# cv2.VideoCapture (read / isOpened / get / release) but release() only hands
+# the camera back.  Only the newest lease receives frames.
+#
+# While nobody holds a lease the stream is kept alive with grab() (no decode);
+# after keep_warm_seconds without one the device is closed to free it.
+
+
+def _default_backend():
+    if sys.platform == "win32":
+        return cv2.CAP_DSHOW
+    if sys.platform.startswith("linux"):
+        return cv2.CAP_V4L2
+    return cv2.CAP_ANY
+
+
+class CameraLease:
+
+    def __init__(self, manager, lease_id, name):
+        self._manager = manager
+        self._id = lease_id
+        self.name = name
+        self._seen = 0
+
+    def read(self):
+        # (True, newest frame not yet returned to this lease) or (False, None)
+        # when the lease was superseded / released or the camera failed.
+        frame, self._seen = self._manager._next_frame(self._id, self._seen)
+        return (frame is not None), frame
+
+    def isOpened(self):
+        return self._manager._lease_id == self._id and self._manager.is_open()
+
+    def get(self, prop):
+        return self._manager.get(prop)
+
+    def release(self):
+        self._manager._drop_lease(self._id)
+
+
+class CameraManager:
+
+    def __init__(self, index=0, width=1280, height=720, fps=30, fourcc="MJPG",
+                 open_timeout=5.0, keep_warm_seconds=300):
+        self.index = int(index)
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.fourcc = fourcc
+        self.open_timeout = open_timeout
+        self.keep_warm_seconds = keep_warm_seconds
+
+        self._cond = threading.Condition()
+        self._cap = None
+        self._thread = None  # the capture thread that currently owns the device
+        self._opened = threading.Event()
+        self._failed = False
+        self._frame = None
+        self._seq = 0
+        self._lease_id = 0
+        self._leased = False
+        self._idle_since = time.monotonic()
+        self.actual = {}  # what the driver actually gave us: width, height, fps
+
+    # --- device -----------------------------------------------------------
+
+    def select(self, index):
+        # Switch device; an active lease keeps working and gets frames from the
+        # new camera once it is open.  Returns True if the index changed.
+        index = int(index)
+        if index == self.index:
+            return False
+        was_running = self._thread is not None
+        self.close(keep_lease=True)
+        self.index = index
+        if was_running:
+            self.open_async()
+        return True
+
+    def open_async(self):
+        # start opening (no-op if already open or opening)
+        with self._cond:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._failed = False
+            self._opened.clear()
+            self._thread = threading.Thread(target=self._run, args=(self.index,),
+                                            name=f"Camera{self.index}", daemon=True)
+            self._thread.start()
+
+    def open(self, timeout=None):
+        # blocking convenience: True once frames can be read
+        self.open_async()
+        self._opened.wait(self.open_timeout if timeout is None else timeout)
+        return self.is_open()
+
+    def is_open(self):
+        return self._opened.is_set() and not self._failed
+
+    def is_opening(self):
+        return self._thread is not None and not self._opened.is_set() and not self._failed
+
+    def failed(self):
+        return self._failed
+
+    def get(self, prop):
+        cap = self._cap
+        return cap.get(prop) if cap is not None else 0.0
+
+    def close(self, keep_lease=False):
+        # stop streaming and release the device (logout / exit / switch)
+        with self._cond:
+            thread = self._thread
+            self._thread = None
+            if not keep_lease:
+                self._lease_id += 1
+                self._leased = False
+            self._cond.notify_all()
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=self.open_timeout)
+        self._opened.clear()
+
+    # --- consumers --------------------------------------------------------
+
+    def acquire(self, name=""):
+        # new lease; any previous lease stops receiving frames
+        self.open_async()
+        with self._cond:
+            self._lease_id += 1
+            self._leased = True
+            self._cond.notify_all()
+            return CameraLease(self, self._lease_id, name)
+
+    def _drop_lease(self, lease_id):
+        with self._cond:
+            if self._lease_id == lease_id:
+                self._leased = False
+                self._idle_since = time.monotonic()
+                self._cond.notify_all()
+
+    def _next_frame(self, lease_id, seen):
+        deadline = time.monotonic() + self.open_timeout
+        with self._cond:
+            while True:
+                if self._lease_id != lease_id or not self._leased or self._failed:
+                    return None, seen
+                if self._seq > seen and self._frame is not None:
+                    return self._frame, self._seq
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    print(f"[Camera] No frame from camera {self.index} in {self.open_timeout:.0f}s")
+                    return None, seen
+                self._cond.wait(remaining)
+
+    # --- capture thread ---------------------------------------------------
+
+    def _open_device(self, index):
+        t0 = time.perf_counter()
+        cap = cv2.VideoCapture(index, _default_backend())
+        if not cap.isOpened():
+            cap = cv2.VideoCapture(index)
+        if not cap.isOpened():
+            return None
+        # applied once per open, never per session / resume
+        cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*self.fourcc))
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+        cap.set(cv2.CAP_PROP_FPS, self.fps)
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # we always want the newest frame
+        self.actual = {
+            "width": int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            "height": int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+            "fps": cap.get(cv2.CAP_PROP_FPS),
+        }
+        print(f"[Camera] Opened camera {index}: {self.actual['width']}x{self.actual['height']} "
+              f"@ {self.actual['fps']:.0f} fps in {time.perf_counter() - t0:.2f}s")
+        return cap
+
+    def _current(self):
+        # a thread that was closed (or timed out opening) must not touch shared state
+        return self._thread is threading.current_thread()
+
+    def _run(self, index):
+        cap = self._open_device(index)
+        with self._cond:
+            if cap is None or not self._current():
+                if cap is None:
+                    print(f"[Camera] Could not open camera {index}")
+                else:
+                    cap.release()
+                if self._current():
+                    self._failed = True
+                    self._opened.set()
+                    self._cond.notify_all()
+                return
+            self._cap = cap
+            self._idle_since = time.monotonic()
+            self._opened.set()
+
+        failures = 0
+        while True:
+            with self._cond:
+                if not self._current():
+                    break
+                leased = self._leased
+                if not leased and time.monotonic() - self._idle_since > self.keep_warm_seconds:
+                    print(f"[Camera] Idle for {self.keep_warm_seconds}s, closing camera {index}")
+                    self._thread = None
+                    self._opened.clear()
+                    break
+
+            if leased:
+                ok, frame = cap.read()
+            else:
+                ok, frame = cap.grab(), None  # keep the stream running without decoding
+
+            if not ok:
+                failures += 1
+                if failures >= 30:
+                    print(f"[Camera] Camera {index} stopped delivering frames")
+                    with self._cond:
+                        if self._current():
+                            self._failed = True
+                            self._cond.notify_all()
+                    break
+                time.sleep(0.05)
+                continue
+            failures = 0
+            if frame is not None:
+                with self._cond:
+                    if not self._current():
+                        break
+                    self._frame = frame
+                    self._seq += 1
+                    self._cond.notify_all()
+
+        with self._cond:
+            if self._cap is cap:
+                self._cap = None
+                self._frame = None
+        cap.release()
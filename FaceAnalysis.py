@@ -1,21 +1,117 @@
 import cv2
-import dlib
-import mediapipe as mp
-from deepface import DeepFace
 import time
-import statistics
+import numpy as np
+from LazyBackends import backend
+
+
+# Calibration targets as fractions of the screen, in the order they are shown.
+CALIBRATION_POINTS = [
+    ("top_left", (0.05, 0.05)),
+    ("top_right", (0.95, 0.05)),
+    ("bottom_left", (0.05, 0.95)),
+    ("bottom_right", (0.95, 0.95)),
+    ("center", (0.5, 0.5)),
+]
+
+
+def summarize_gaze_samples(vertical, horizontal):
+    # per-point calibration entry: medians plus the spread (median absolute deviation)
+    v = np.asarray(vertical, dtype=np.float64)
+    h = np.asarray(horizontal, dtype=np.float64)
+    if v.size == 0:
+        return None
+    v_med, h_med = float(np.median(v)), float(np.median(h))
+    return {
+        "v": v_med,
+        "h": h_med,
+        "n": int(v.size),
+        "spread": float(max(np.median(np.abs(v - v_med)), np.median(np.abs(h - h_med)))),
+    }
+
+
+class GazeConvergence:
+    # Decides when one calibration point has enough samples.  The running
+    # median is recomputed on every valid sample; sampling stops once the last
+    # `window` medians stay within `tolerance` and the spread is below
+    # `max_spread`, but never before min_seconds / min_samples.  Unsettled or
+    # noisy fixations keep sampling up to max_seconds.  Gaze thresholds are
+    # 0.06-0.07, so the default tolerance is an order of magnitude below that.
+
+    def __init__(self, min_seconds=0.5, max_seconds=4.0, min_samples=8,
+                 tolerance=0.005, max_spread=0.02, window=6):
+        self.min_seconds = min_seconds
+        self.max_seconds = max_seconds
+        self.min_samples = min_samples
+        self.tolerance = tolerance
+        self.max_spread = max_spread
+        self.window = window
+        self.vertical = []
+        self.horizontal = []
+        self.invalid = 0
+        self._medians = []  # (v, h) running median after each valid sample
+        self.converged = False
+
+    def add(self, v, h):
+        if v is None or h is None:
+            self.invalid += 1
+            return
+        self.vertical.append(v)
+        self.horizontal.append(h)
+        self._medians.append((float(np.median(self.vertical)), float(np.median(self.horizontal))))
+
+    def _settled(self):
+        if len(self._medians) < max(self.min_samples, self.window):
+            return False
+        recent = np.asarray(self._medians[-self.window:])
+        if np.ptp(recent, axis=0).max() > self.tolerance:
+            return False
+        point = summarize_gaze_samples(self.vertical, self.horizontal)
+        return point["spread"] <= self.max_spread
+
+    def done(self, elapsed):
+        if elapsed >= self.max_seconds:
+            return True
+        if elapsed < self.min_seconds:
+            return False
+        self.converged = self._settled()
+        return self.converged
+
+    def progress(self, elapsed):
+        # 0..1 for the UI: time towards the limit, or full once converged
+        return 1.0 if self.converged else min(1.0, elapsed / self.max_seconds)
+
+    def result(self, elapsed):
+        # summarize_gaze_samples() plus how it ended; None without any valid sample
+        point = summarize_gaze_samples(self.vertical, self.horizontal)
+        if point is None:
+            return None
+        point.update({
+            "seconds": round(float(elapsed), 2),
+            "converged": self.converged,
+            "invalid": self.invalid,
+            "low_samples": point["n"] < self.min_samples,
+        })
+        return point
 
 
 class FaceAnalyzer:
-    def __init__(self, use_dlib=False):
-        # dlib detector is slow, default off
+    def __init__(self, use_dlib=False, use_emotion=True, emotion_model=None, max_faces=1):
+        # dlib detector is slow, default off.  dlib and DeepFace (TensorFlow)
+        # are only imported when their feature is enabled and first used.
+        # emotion_model: shared model with analyze / analyze_many (see
+        # SharedModels) used instead of calling DeepFace here.
+        # max_faces > 1 analyses everyone in view (group study rooms).
         self.use_dlib = use_dlib
-        self.detector = dlib.get_frontal_face_detector() if use_dlib else None
+        self.use_emotion = use_emotion
+        self.emotion_model = emotion_model
+        self.max_faces = max(1, int(max_faces))
+        self.detector = backend("dlib").get_frontal_face_detector() if use_dlib else None
 
+        mp = backend("mediapipe")
         self.mp_face_mesh = mp.solutions.face_mesh.FaceMesh(
             static_image_mode=False,
             refine_landmarks=True,
-            max_num_faces=1
+            max_num_faces=self.max_faces
         )
 
         self.LEFT_PUPIL = 468
@@ -61,7 +157,24 @@ class FaceAnalyzer:
             print(f"[extract_gaze_ratios] Error: {e}")
             return None, None
 
+    def gaze_ratios(self, frame):
+        # (vertical, horizontal) for the first face in a mirrored BGR frame, or
+        # (None, None); same FaceMesh path analyze_frame uses
+        results = self.mp_face_mesh.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+        if not results.multi_face_landmarks:
+            return None, None
+        return self.extract_gaze_ratios(results.multi_face_landmarks[0].landmark)
+
+    def apply_calibration(self, calibration_data):
+        # calibration_data: {label: summarize_gaze_samples(...)} for every CALIBRATION_POINTS label
+        self.calibration_data = calibration_data
+        self.baseline_vertical_ratio = calibration_data["center"]["v"]
+        self.baseline_horizontal_ratio = calibration_data["center"]["h"]
+        return self.baseline_vertical_ratio, self.baseline_horizontal_ratio
+
     def calibrate_gaze(self, cap, duration_seconds=2):
+        # OpenCV-window calibration for running this module on its own; the app
+        # uses CalibrationWidget, which keeps the Qt event loop running.
         ret, frame = cap.read()
         if not ret:
             print("Failed to read from camera.")
@@ -71,15 +184,10 @@ class FaceAnalyzer:
         screen_width = frame.shape[1]
         screen_height = frame.shape[0]
 
-        points = [
-            ("top_left", (int(screen_width * 0.05), int(screen_height * 0.05))),
-            ("top_right", (int(screen_width * 0.95), int(screen_height * 0.05))),
-            ("bottom_left", (int(screen_width * 0.05), int(screen_height * 0.95))),
-            ("bottom_right", (int(screen_width * 0.95), int(screen_height * 0.95))),
-            ("center", (int(screen_width * 0.5), int(screen_height * 0.5)))
-        ]
+        points = [(label, (int(screen_width * fx), int(screen_height * fy)))
+                  for label, (fx, fy) in CALIBRATION_POINTS]
 
-        self.calibration_data = {}
+        calibration_data = {}
 
 
         # Initialize fullscreen window
@@ -179,15 +287,10 @@ class FaceAnalyzer:
                 if not ret:
                     continue
                 frame = cv2.flip(frame, 1)
-                rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                results = self.mp_face_mesh.process(rgb_frame)
-
-                if results.multi_face_landmarks:
-                    landmarks = results.multi_face_landmarks[0].landmark
-                    vertical_ratio, horizontal_ratio = self.extract_gaze_ratios(landmarks)
-                    if vertical_ratio is not None and horizontal_ratio is not None:
-                        vertical_samples.append(vertical_ratio)
-                        horizontal_samples.append(horizontal_ratio)
+                vertical_ratio, horizontal_ratio = self.gaze_ratios(frame)
+                if vertical_ratio is not None and horizontal_ratio is not None:
+                    vertical_samples.append(vertical_ratio)
+                    horizontal_samples.append(horizontal_ratio)
 
                 cv2.circle(frame, screen_pos, 5, (0, 255, 0), -1)
                 text_offset_x = -170 if "right" in label else 20
@@ -198,22 +301,37 @@ class FaceAnalyzer:
                 if cv2.waitKey(1) & 0xFF == ord('q'):
                     break
 
-            self.calibration_data[label] = {
-                "v": float(statistics.median(vertical_samples)),
-                "h": float(statistics.median(horizontal_samples))
-            }
+            point = summarize_gaze_samples(vertical_samples, horizontal_samples)
+            if point is None:
+                print(f"[Calibration] No face found while looking at {label}.")
+                cv2.destroyAllWindows()
+                return None
+            calibration_data[label] = point
 
         cv2.destroyWindow("Calibration")
-        self.baseline_vertical_ratio = self.calibration_data["center"]["v"]
-        self.baseline_horizontal_ratio = self.calibration_data["center"]["h"]
         print("Calibration complete.")
 
-        return self.baseline_vertical_ratio, self.baseline_horizontal_ratio
+        return self.apply_calibration(calibration_data)
 
     def analyze_emotion(self, face_region):
-        result = DeepFace.analyze(face_region, actions=['emotion'], enforce_detection=False, detector_backend="opencv")
+        if not self.use_emotion:
+            return "Unknown"
+        if self.emotion_model is not None:
+            return self.emotion_model.analyze(face_region)
+        result = backend("deepface").analyze(face_region, actions=['emotion'], enforce_detection=False, detector_backend="opencv")
         return result[0]['dominant_emotion'] if result else "Unknown"
 
+    def analyze_emotions(self, face_regions):
+        # every face of a frame in one batch; a failed crop reads as "Unknown"
+        # (one face too, so a person's reading does not change method when
+        # someone else walks into view)
+        if not self.use_emotion:
+            return ["Unknown"] * len(face_regions)
+        if self.emotion_model is not None:
+            return self.emotion_model.analyze_many(face_regions)
+        from SharedModels import deepface_emotions
+        return [e if isinstance(e, str) else "Unknown" for e in deepface_emotions(face_regions)]
+
     def detect_gaze(self, landmarks):
         if not landmarks:
             return "Unknown"
@@ -251,58 +369,46 @@ class FaceAnalyzer:
             return "Distracted"
         return "Focused"
 
-    def process_frame(self, frame):
-        # Analyze a frame using Mediapipe/Facemesh and return (annotated_frame, emotions, eye_contacts, focus_states).
+    def analyze_frame(self, frame):
+        # Analyze a frame using Mediapipe/Facemesh (dlib fallback) and return a list of
+        # per-face results; nothing is drawn on the frame, so it can be shared as-is.
+        # Each result: {"bbox": (x, y, w, h) normalized to the frame, "emotion", "gaze", "focus"}
 
         h, w = frame.shape[:2]
         rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
         results = self.mp_face_mesh.process(rgb_frame)
 
-        emotions_list = []
-        eye_contact_list = []
-        focus_state_list = []
-
         if results.multi_face_landmarks:
-            # Use only 1 face
-            landmarks = results.multi_face_landmarks[0].landmark
-
-            # bbox from landmarks
-            x, y, bw, bh = self._bbox_from_landmarks(landmarks, w, h)
-            roi = frame[y:y + bh, x:x + bw]
-
-            # emotion (can be throttled externally via self.skip_emotion)
-            if getattr(self, "skip_emotion", False):
-                emotion = "Unknown"
+            # up to max_faces faces, in MediaPipe's order
+            faces = []
+            for face_landmarks in results.multi_face_landmarks[:self.max_faces]:
+                landmarks = face_landmarks.landmark
+                faces.append((landmarks, self._bbox_from_landmarks(landmarks, w, h)))
+
+            # emotion for all faces in one batch (can be throttled externally
+            # via self.skip_emotion)
+            if getattr(self, "skip_emotion", False) or not self.use_emotion:
+                emotions = ["Unknown"] * len(faces)
             else:
-                emotion = self.analyze_emotion(roi)
+                emotions = self.analyze_emotions([frame[y:y + bh, x:x + bw] for _, (x, y, bw, bh) in faces])
 
-            # gaze
-            eye_contact = self.detect_gaze(landmarks)
+            out = []
+            for (landmarks, (x, y, bw, bh)), emotion in zip(faces, emotions):
+                # gaze
+                eye_contact = self.detect_gaze(landmarks)
 
-            # focus interpretation
-            focus_state = self.interpret_focus_state(emotion, eye_contact)
-
-            emotions_list.append(emotion)
-            eye_contact_list.append(eye_contact)
-            focus_state_list.append(focus_state)
-
-            # overlays
-            cv2.rectangle(frame, (x, y), (x + bw, y + bh), (0, 255, 0), 2)
-            cv2.putText(frame, f"{emotion}", (x, y - 40), cv2.FONT_HERSHEY_SIMPLEX, 0.6,
-                        (0, 255, 0), 2)
-            cv2.putText(frame, f"{eye_contact}", (x, y - 20), cv2.FONT_HERSHEY_SIMPLEX, 0.6,
-                        (0, 255, 255), 2)
-            cv2.putText(frame, f"{focus_state}", (x, y - 60), cv2.FONT_HERSHEY_SIMPLEX, 0.6,
-                        (0, 0, 255), 2)
+                # focus interpretation
+                focus_state = self.interpret_focus_state(emotion, eye_contact)
 
-            return frame, emotions_list, eye_contact_list, focus_state_list
+                out.append(self._face_result(x, y, bw, bh, w, h, emotion, eye_contact, focus_state))
+            return out
 
 
         # Optional slow fallback: dlib (if self.use_dlib is True and FaceMesh fails).
         if self.use_dlib:
             # fallback to legacy dlib path (rare)
             if self.detector is None:
-                self.detector = dlib.get_frontal_face_detector()
+                self.detector = backend("dlib").get_frontal_face_detector()
             faces = self.detector(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY))
             if faces:
                 # take the largest face
@@ -310,7 +416,7 @@ class FaceAnalyzer:
                 x, y, bw, bh = face.left(), face.top(), face.width(), face.height()
                 roi = frame[y:y + bh, x:x + bw]
 
-                if getattr(self, "skip_emotion", False):
+                if getattr(self, "skip_emotion", False) or not self.use_emotion:
                     emotion = "Unknown"
                 else:
                     emotion = self.analyze_emotion(roi)
@@ -318,21 +424,31 @@ class FaceAnalyzer:
                 eye_contact = "Unknown"  # no landmarks
                 focus_state = self.interpret_focus_state(emotion, eye_contact)
 
-                emotions_list.append(emotion)
-                eye_contact_list.append(eye_contact)
-                focus_state_list.append(focus_state)
-
-                cv2.rectangle(frame, (x, y), (x + bw, y + bh), (0, 255, 0), 2)
-                cv2.putText(frame, f"{emotion}", (x, y - 20), cv2.FONT_HERSHEY_SIMPLEX,
-                            0.6, (0, 255, 0), 2)
-
-                return frame, emotions_list, eye_contact_list, focus_state_list
+                return [self._face_result(x, y, bw, bh, w, h, emotion, eye_contact, focus_state)]
 
         # if nothing detected
-        focus_state_list.append("Distracted")
-        return frame, ["Unknown"], ["No Face"], focus_state_list
+        return []
 
-        return frame, emotions_list, eye_contact_list, focus_state_list
+    def process_frame(self, frame):
+        # Legacy API: analyze, draw the overlay onto the frame itself and return
+        # (annotated_frame, emotions, eye_contacts, focus_states).
+        faces = self.analyze_frame(frame)
+        if not faces:
+            return frame, ["Unknown"], ["No Face"], ["Distracted"]
+        draw_overlay(frame, faces)
+        return (frame,
+                [f["emotion"] for f in faces],
+                [f["gaze"] for f in faces],
+                [f["focus"] for f in faces])
+
+    @staticmethod
+    def _face_result(x, y, bw, bh, width, height, emotion, gaze, focus):
+        return {
+            "bbox": (x / width, y / height, bw / width, bh / height),
+            "emotion": emotion,
+            "gaze": gaze,
+            "focus": focus,
+        }
 
     def _bbox_from_landmarks(self, landmarks, width, height, pad=0.05):
         # pixel bounding box from normalized FaceMesh landmarks
@@ -356,6 +472,26 @@ class FaceAnalyzer:
         return x_min, y_min, x_max - x_min, y_max - y_min
 
 
+def draw_overlay(frame, faces):
+    # cv2 overlay for analyze_frame() results; the GUI paints its own with
+    # QPainter (VideoPreview.paint_face_overlay) and never touches the frame
+    h, w = frame.shape[:2]
+    for face in faces:
+        fx, fy, fw, fh = face["bbox"]
+        x, y = int(fx * w), int(fy * h)
+        x2, y2 = int((fx + fw) * w), int((fy + fh) * h)
+        cv2.rectangle(frame, (x, y), (x2, y2), (0, 255, 0), 2)
+        cv2.putText(frame, f"{face['emotion']}", (x, y - 40), cv2.FONT_HERSHEY_SIMPLEX, 0.6,
+                    (0, 255, 0), 2)
+        cv2.putText(frame, f"{face['gaze']}", (x, y - 20), cv2.FONT_HERSHEY_SIMPLEX, 0.6,
+                    (0, 255, 255), 2)
+        cv2.putText(frame, f"{face['focus']}", (x, y - 60), cv2.FONT_HERSHEY_SIMPLEX, 0.6,
+                    (0, 0, 255), 2)
+        if "id" in face:
+            cv2.putText(frame, f"#{face['id']}", (x, y2 + 20), cv2.FONT_HERSHEY_SIMPLEX, 0.6,
+                        (0, 255, 0), 2)
+    return frame
+
 
 def main():
         cap = cv2.VideoCapture(0)  # 0 = default webcam
@@ -0,0 +1,74 @@
+import time
+
+
+# Stable IDs for the faces analyze_frame() returns, so every person in a
+# group study room keeps their own focus window (FocusMonitor.people).  Each
+# frame's boxes are matched greedily to the known tracks: best overlap (IoU)
+# first, then nearest centre for fast moves that left no overlap.  Unmatched
+# faces start new tracks; a track unseen for max_age_seconds is dropped.
+# Boxes are (x, y, w, h) normalized to the frame, as in analyze_frame().
+
+
+def iou(a, b):
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    ix = max(0.0, min(ax + aw, bx + bw) - max(ax, bx))
+    iy = max(0.0, min(ay + ah, by + bh) - max(ay, by))
+    inter = ix * iy
+    union = aw * ah + bw * bh - inter
+    return inter / union if union > 0 else 0.0
+
+
+def centre_distance(a, b):
+    # between box centres, in units of the larger box width
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    dx = (ax + aw / 2) - (bx + bw / 2)
+    dy = (ay + ah / 2) - (by + bh / 2)
+    return (dx * dx + dy * dy) ** 0.5 / max(aw, bw, 1e-6)
+
+
+class FaceTracker:
+
+    def __init__(self, iou_threshold=0.3, max_distance=1.0, max_age_seconds=2.0):
+        self.iou_threshold = iou_threshold
+        self.max_distance = max_distance
+        self.max_age_seconds = max_age_seconds
+        self.tracks = {}  # id -> {"bbox", "last_seen"}
+        self._next_id = 1
+
+    def update(self, faces, now=None):
+        # sets face["id"] on every face (in place) and returns faces
+        now = time.monotonic() if now is None else now
+        pairs = []
+        for track_id, track in self.tracks.items():
+            for i, face in enumerate(faces):
+                overlap = iou(track["bbox"], face["bbox"])
+                if overlap >= self.iou_threshold:
+                    pairs.append(((0, -overlap), track_id, i))
+                else:
+                    dist = centre_distance(track["bbox"], face["bbox"])
+                    if dist <= self.max_distance:
+                        pairs.append(((1, dist), track_id, i))
+        pairs.sort(key=lambda p: p[0])
+
+        used_tracks, used_faces = set(), set()
+        for _, track_id, i in pairs:
+            if track_id in used_tracks or i in used_faces:
+                continue
+            used_tracks.add(track_id)
+            used_faces.add(i)
+            faces[i]["id"] = track_id
+
+        for i, face in enumerate(faces):
+            if i not in used_faces:
+                face["id"] = self._next_id
+                self._next_id += 1
+            self.tracks[face["id"]] = {"bbox": face["bbox"], "last_seen": now}
+
+        for track_id in [t for t, track in self.tracks.items() if now - track["last_seen"] > self.max_age_seconds]:
+            del self.tracks[track_id]
+        return faces
+
+    def reset(self):
+        self.tracks = {}
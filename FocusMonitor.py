@@ -1,18 +1,16 @@
+import asyncio
 import time
 import threading
 from collections import deque
-import asyncio
 import os
-import edge_tts
-from pydub import AudioSegment
-import tempfile
+import json
 import shutil
 import cv2
 import numpy as np
-try:
-    from deepface import DeepFace  # heavy
-except ImportError:
-    DeepFace = None
+from PerformanceWatchdog import PerformanceWatchdog
+from AudioCache import AudioCache, clip_key
+from AudioPlayback import alert_player, load_wav, wav_bytes
+from TTSWorker import tts_worker
 
 class FocusMonitor:
     def __init__(
@@ -25,6 +23,11 @@ class FocusMonitor:
         ia_stride=10,
         analysis_stride=2,
         verbose=False,
+        face_process=False,
+        ia_process=False,
+        shared_ia=None,
+        emotion_model=None,
+        on_sample=None,
     ):
         self.user_manager = user_manager
         self.is_monitoring = False
@@ -42,19 +45,48 @@ class FocusMonitor:
 
         self.ia_stride = max(1, int(ia_stride))
         self.analysis_stride = max(1, int(analysis_stride))
-        self._last_processed_frame = None
+        self._last_faces = []
         self._last_focus_state = None
+        self.frame_callback = None
 
         self.verbose = verbose
 
+        # steps quality down when frames blow the 1/fps budget, and back up
+        self.watchdog = PerformanceWatchdog()
+
+        # optionally run FaceMesh/DeepFace and CLIP in their own processes
+        # (see AnalysisWorkers); the face worker outlives start/stop so its
+        # models are only loaded once
+        self.face_process = bool(face_process)
+        self.ia_process = bool(ia_process)
+        self._face_worker = None
+
+        # multi-camera streams (MultiCamera): models shared with the other
+        # streams, and on_sample(focus_state, samples) receiving the samples
+        # instead of this monitor's own alert check
+        self.shared_ia = shared_ia
+        self.emotion_model = emotion_model
+        self.on_sample = on_sample
+
+        # group rooms (analyzer.max_faces > 1): FaceTracker ids -> own focus
+        # window and alert state {"history", "last_alert_time", "focus"}
+        self.people = {}
+        self._tracking = False
+
 
     def _ensure_ia_model(self):
         # Lazy load the CLIP model
         if self._ia_loaded:
             return
         try:
-            from IAModel import IntentionalActionRecognizer
-            self.ia_model = IntentionalActionRecognizer()
+            if self.shared_ia is not None:
+                self.ia_model = self.shared_ia.client()
+            elif self.ia_process:
+                from AnalysisWorkers import RemoteIntentionalActionRecognizer
+                self.ia_model = RemoteIntentionalActionRecognizer()
+            else:
+                from IAModel import IntentionalActionRecognizer
+                self.ia_model = IntentionalActionRecognizer()
             self._ia_loaded = True
         except Exception as e:
             print(f"[FocusMonitor] IA model unavailable: {e}")
@@ -67,15 +99,46 @@ class FocusMonitor:
             if self.ia_model:
                 self.ia_model.set_defined_actions(actions)
         else:
-            self.ia_model = None
-            self._ia_loaded = False
+            self._release_ia_model()
+
+    def _release_ia_model(self):
+        if self.ia_model is not None and hasattr(self.ia_model, "close"):
+            self.ia_model.close()
+        self.ia_model = None
+        self._ia_loaded = False
+
+    def _get_face_worker(self, analyzer_args):
+        from AnalysisWorkers import RemoteFaceAnalyzer
+        current = self._face_worker
+        if current is not None and (current.use_dlib, current.use_emotion, current.max_faces) != \
+                (analyzer_args["use_dlib"], analyzer_args["use_emotion"], analyzer_args["max_faces"]):
+            self._face_worker.close()
+            self._face_worker = None
+        if self._face_worker is None:
+            self._face_worker = RemoteFaceAnalyzer(**analyzer_args)
+        return self._face_worker
+
+    def shutdown(self):
+        # stop monitoring and any worker processes
+        if self.is_monitoring:
+            self.stop_monitoring()
+        if self._face_worker is not None:
+            self._face_worker.close()
+            self._face_worker = None
+        self._release_ia_model()
 
     def start_monitoring(self, cap, analyzer, frame_callback=None, intent_actions=None):
+        # frame_callback(frame, faces) runs on the monitoring thread with the
+        # un-annotated frame and the latest FaceAnalyzer.analyze_frame() results.
+        # The frame may live in a reused buffer: use or copy it before returning.
+        # Swap it at any time with set_frame_callback (None = headless).
         # clone analyzer args
         analyzer_ctor = None
         if analyzer is not None:
             from FaceAnalysis import FaceAnalyzer
-            analyzer_args = dict(use_dlib=analyzer.use_dlib)  # add other relevant fields
+            analyzer_args = dict(use_dlib=analyzer.use_dlib,
+                                 use_emotion=getattr(analyzer, "use_emotion", True),
+                                 max_faces=getattr(analyzer, "max_faces", 1))  # add other relevant fields
             calib = getattr(analyzer, "calibration_data", None)
             baseline_v = getattr(analyzer, "baseline_vertical_ratio", None)
             baseline_h = getattr(analyzer, "baseline_horizontal_ratio", None)
@@ -89,37 +152,75 @@ class FocusMonitor:
             self.set_intent_actions(intent_actions)
 
         self.is_monitoring = True
+        self.frame_callback = frame_callback
 
         def run():
             local_analyzer = None
-            if analyzer is not None:
+            self._last_faces = []
+            self.people = {}
+            tracker = None
+            if analyzer is not None and analyzer_args["max_faces"] > 1:
+                from FaceTracker import FaceTracker
+                tracker = FaceTracker()
+            self._tracking = tracker is not None
+            # a face worker process would load its own emotion model
+            if analyzer is not None and self.face_process and self.emotion_model is None:
+                local_analyzer = self._get_face_worker(analyzer_args)
+                local_analyzer.set_calibration(calib, baseline_v, baseline_h)
+            elif analyzer is not None:
                 from FaceAnalysis import FaceAnalyzer
-                local_analyzer = FaceAnalyzer(**analyzer_args)
+                local_analyzer = FaceAnalyzer(**analyzer_args, emotion_model=self.emotion_model)
                 if calib:
                     local_analyzer.calibration_data = calib
                 local_analyzer.baseline_vertical_ratio = baseline_v
                 local_analyzer.baseline_horizontal_ratio = baseline_h
 
             frame_count = 0
+            analysed_count = 0
             log_every = 60 if not self.verbose else 15
-            target_dt = 1.0 / max(self.fps, 1)
             next_ts = time.perf_counter()
+            self.watchdog.reset()
+            degrade = self.watchdog.settings
 
             distraction_streak = 0
             awaiting_ia = False
             streak_threshold = 5  # or whatever you want
 
             while self.is_monitoring:
-                # FPS throttle
+                # FPS throttle (fps_divisor > 1 when the watchdog lowered the rate)
+                base_dt = 1.0 / max(self.fps, 1)
+                target_dt = base_dt * degrade["fps_divisor"]
                 now = time.perf_counter()
                 if now < next_ts:
                     time.sleep(next_ts - now)
+                else:
+                    # behind schedule: don't try to catch up with a burst of frames
+                    next_ts = now
                 next_ts += target_dt
+                cost_start = time.perf_counter()
 
                 ret, frame = cap.read()
                 if not ret:
                     break
                 frame = cv2.flip(frame, 1)
+                frame_count += 1
+                analyse = local_analyzer is not None and (frame_count % self.analysis_stride == 0)
+                scale = degrade["analysis_scale"]
+
+                if not analyse and self.frame_callback is None:
+                    # headless and not an analysis frame: nobody looks at it
+                    if self.watchdog.record(time.perf_counter() - cost_start, base_dt):
+                        degrade = self.watchdog.settings
+                    continue
+
+                # With a face worker process, render the analysis input straight
+                # into its shared frame ring (no pickling, no extra copy).
+                ring_buf = None
+                if analyse and hasattr(local_analyzer, "frame_buffer"):
+                    h, w = frame.shape[:2]
+                    analysis_size = (int(round(w * scale)), int(round(h * scale)))
+                    ring_buf = local_analyzer.frame_buffer((analysis_size[1], analysis_size[0], 3))
+
                 user_brightness = get_user_setting_safe(self.user_manager, 'cam_brightness')
                 user_contrast = get_user_setting_safe(self.user_manager, 'cam_contrast')
                 user_exposure = get_user_setting_safe(self.user_manager, 'cam_exposure')
@@ -132,23 +233,41 @@ class FocusMonitor:
                         contrast=float(user_contrast)
                     )
                     frame = adjust_exposure(frame, exposure=float(user_exposure))
-                    frame = adjust_saturation(frame, saturation=float(user_saturation))
+                    frame = adjust_saturation(frame, saturation=float(user_saturation),
+                                              dst=ring_buf if scale >= 1.0 else None)
                 except Exception as e:
                     print(f"Frame adjustment error: {e}")
                     print(f"  brightness={user_brightness}, contrast={user_contrast}, exposure={user_exposure}, saturation={user_saturation}")
 
-                frame_count += 1
+                # a ring slot gets reused, so anything kept past this frame is copied
+                frame_in_ring = ring_buf is not None and np.may_share_memory(frame, ring_buf)
 
-                if local_analyzer is not None and (frame_count % self.analysis_stride == 0):
+                if analyse:
+                    analysed_count += 1
+                    emotion_stride = degrade["emotion_stride"]
+                    local_analyzer.skip_emotion = (
+                        emotion_stride == 0 or analysed_count % emotion_stride != 0
+                    )
+                    # only the analysis input is downscaled: face boxes come back
+                    # normalized, and frame (full resolution) stays what the
+                    # preview receives at every watchdog level
+                    analysis_frame = frame
+                    if scale < 1.0:
+                        h, w = frame.shape[:2]
+                        analysis_frame = cv2.resize(frame, (int(round(w * scale)), int(round(h * scale))),
+                                                    dst=ring_buf, interpolation=cv2.INTER_AREA)
                     try:
-                        processed_frame, emotions, eye_contacts, focus_states = local_analyzer.process_frame(frame)
+                        faces = local_analyzer.analyze_frame(analysis_frame)
+                        if tracker is not None:
+                            tracker.update(faces)
+                        focus_state = primary_face(faces)["focus"] if faces else "Distracted"
                     except Exception as e:
                         print(f"[FocusMonitor] analyzer error: {e}")
-                        processed_frame, focus_states = frame, []
-                        emotions, eye_contacts = [], []
-                    self._last_processed_frame = processed_frame
-                    focus_state = focus_states[0] if focus_states else "Unknown"
+                        faces = []
+                        focus_state = "Unknown"
+                    self._last_faces = faces
 
+                    intent = False
                     if focus_state == "Distracted":
                         distraction_streak += 1
 
@@ -161,7 +280,7 @@ class FocusMonitor:
                                 and not awaiting_ia
                         ):
                             print(f"[DEBUG] Triggering IA after {distraction_streak} distracted frames.")
-                            self.ia_model.trigger_async_detection(frame)
+                            self.ia_model.trigger_async_detection(frame.copy() if frame_in_ring else frame)
                             awaiting_ia = True
 
                         # Poll for IA result if triggered detection
@@ -170,6 +289,7 @@ class FocusMonitor:
                             print(f"[DEBUG] IA result: detected={detected}, label={label}, conf={conf}")
                             if detected:
                                 focus_state = "Focused"
+                                intent = True  # excuses everyone in view
                                 print(f"[Suppressed] Intentional action detected: {label}")
                                 distraction_streak = 0
                                 awaiting_ia = False
@@ -178,16 +298,24 @@ class FocusMonitor:
                         awaiting_ia = False
 
                     self._last_focus_state = focus_state
-                    self.update(focus_state, samples=self.analysis_stride)
+                    # each sample also stands for the frames dropped by the fps divisor
+                    samples = self.analysis_stride * degrade["fps_divisor"]
+                    self.update(focus_state, samples=samples)
+                    if tracker is not None:
+                        self._update_people(faces, samples, intent, tracker.tracks)
 
                     if self.verbose and frame_count % log_every == 0:
-                        print("Focus:", focus_states)
-                        print("Eye Contact:", eye_contacts)
-                else:
-                    processed_frame = self._last_processed_frame if self._last_processed_frame is not None else frame
+                        print("Focus:", [f["focus"] for f in faces])
+                        print("Eye Contact:", [f["gaze"] for f in faces])
+
+                callback = self.frame_callback
+                if callback:
+                    # clean frame + latest results; the consumer draws the overlay
+                    # if and where it displays them
+                    callback(frame, self._last_faces)
 
-                if frame_callback:
-                    frame_callback(processed_frame)
+                if self.watchdog.record(time.perf_counter() - cost_start, base_dt):
+                    degrade = self.watchdog.settings
 
             cap.release()
             print("Monitoring loop ended.")
@@ -195,13 +323,66 @@ class FocusMonitor:
         self.monitoring_thread = threading.Thread(target=run, daemon=True)
         self.monitoring_thread.start()
 
+    def set_frame_callback(self, frame_callback):
+        # None turns preview delivery off (minimised / headless); takes effect next frame
+        self.frame_callback = frame_callback
+
+    def status(self):
+        # cheap snapshot for the tray icon / status widgets
+        history = list(self.focus_history)
+        distracted = sum(1 for _, state in history if state == "Distracted")
+        return {
+            "monitoring": self.is_monitoring,
+            "focus_state": self._last_focus_state,
+            "distraction_ratio": distracted / len(history) if history else 0.0,
+            "quality": self.watchdog.settings["name"],
+            "people": {
+                person_id: {"focus": person["focus"], "distraction_ratio": distraction_ratio(list(person["history"]))}
+                for person_id, person in dict(self.people).items()
+            },
+        }
+
     def update(self, focus_state, samples=1):
         # Record focus_state samples times to maintain timing with stride
         ts = time.time()
         for _ in range(samples):
             self.focus_history.append((ts, focus_state))
+        if self.on_sample is not None:
+            self.on_sample(focus_state, samples)
+            return
+        if self._tracking:
+            return  # alerts are per person (_update_people)
         self.check_focus()
 
+    def _update_people(self, faces, samples, intent, tracks):
+        ts = time.time()
+        for face in faces:
+            person = self.people.get(face["id"])
+            if person is None:
+                person = {"history": deque(maxlen=self.max_samples), "last_alert_time": 0, "focus": None}
+                self.people[face["id"]] = person
+            state = "Focused" if intent else face["focus"]
+            person["focus"] = state
+            person["history"].extend([(ts, state)] * samples)
+            if self.on_sample is None:
+                self.check_person(face["id"], person)
+        # forget people the tracker has dropped
+        for person_id in [p for p in self.people if p not in tracks]:
+            del self.people[person_id]
+
+    def check_person(self, person_id, person):
+        if len(person["history"]) < self.max_samples:
+            return
+        ratio = distraction_ratio(person["history"])
+        now = time.time()
+        if ratio >= self.threshold and now - person["last_alert_time"] > self.cooldown_seconds:
+            self.trigger_alert(ratio, person=person_id)
+            person["last_alert_time"] = now
+
+    def _resize_people(self):
+        for person in self.people.values():
+            person["history"] = deque(list(person["history"])[-self.max_samples:], maxlen=self.max_samples)
+
 
 
     def check_focus(self):
@@ -217,11 +398,12 @@ class FocusMonitor:
             self.trigger_alert(distraction_ratio)
             self.last_alert_time = now
 
-    def trigger_alert(self, ratio):
-        print(f"Distracted for {int(ratio * 100)}% of the last {self.window_seconds} seconds!")
+    def trigger_alert(self, ratio, person=None):
+        prefix = f"[Person #{person}] " if person is not None else ""
+        print(f"{prefix}Distracted for {int(ratio * 100)}% of the last {self.window_seconds} seconds!")
         username = self.user_manager.current_user if self.user_manager else "default"
         filename = get_alert_audio_filename(username)
-        play_alert_audio(filename=filename)
+        play_alert_audio(filename=filename, volume_pct=alert_volume_pct(self.user_manager))
 
     def stop_monitoring(self):
         # stop the monitoring process and release any used resources
@@ -230,14 +412,29 @@ class FocusMonitor:
             self.monitoring_thread.join(timeout=1)
         print("Monitoring stopped.")
 
-    def reconfigure(self, *, threshold=None, cooldown_seconds=None, fps=None, window_seconds=None):
+    def reconfigure(self, *, threshold=None, cooldown_seconds=None, fps=None, window_seconds=None,
+                    face_process=None, ia_process=None):
         """
         Update runtime parameters without recreating the FocusMonitor.
         Any arg left as None keeps the current value.
         Resizes focus_history if fps or window_seconds imply a new sample length.
+        Worker-process switches take effect on the next start / IA reload.
         """
         changed = False
 
+        if face_process is not None and bool(face_process) != self.face_process:
+            self.face_process = bool(face_process)
+            changed = True
+
+        if ia_process is not None and bool(ia_process) != self.ia_process:
+            self.ia_process = bool(ia_process)
+            # reload CLIP in (or out of) a worker the next time actions are set
+            actions = list(getattr(self.ia_model, "defined_actions", None) or [])
+            self._release_ia_model()
+            if actions:
+                self.set_intent_actions(actions)
+            changed = True
+
         if threshold is not None:
             self.threshold = float(threshold)
             changed = True
@@ -260,6 +457,7 @@ class FocusMonitor:
             # rebuild deque w/ latest samples (truncate/pad as needed)
             from collections import deque
             self.focus_history = deque(list(self.focus_history)[-self.max_samples:], maxlen=self.max_samples)
+            self._resize_people()
             changed = True
 
         # Scale heavy model strides when fps high
@@ -277,7 +475,8 @@ class FocusMonitor:
         if changed:
             print(f"[FocusMonitor] Reconfigured: threshold={self.threshold} "
                   f"cooldown={self.cooldown_seconds}s window={self.window_seconds}s "
-                  f"max_samples={self.max_samples}")
+                  f"max_samples={self.max_samples} face_process={self.face_process} "
+                  f"ia_process={self.ia_process}")
 
 
     def update_params(self, *, window_seconds=None, fps=None, threshold=None, cooldown_seconds=None):
@@ -299,22 +498,35 @@ class FocusMonitor:
             # shrink/grow history while preserving most recent entries
             old = list(self.focus_history)[-self.max_samples:]
             self.focus_history = deque(old, maxlen=self.max_samples)
+            self._resize_people()
+
+def primary_face(faces):
+    # the nearest (largest) face stands for the room in the overall state
+    return max(faces, key=lambda f: f["bbox"][2] * f["bbox"][3])
 
-def play_alert_audio(filename=None):
+
+def distraction_ratio(history):
+    if not history:
+        return 0.0
+    return sum(1 for _, state in history if state == "Distracted") / len(history)
+
+
+def alert_volume_pct(user_manager):
+    # current user's alert volume (0-100); 0 is a valid setting
+    v = user_manager.get_setting('alert_volume') if user_manager else None
+    try:
+        return max(0, min(int(v), 100)) if v is not None else 100
+    except (TypeError, ValueError):
+        return 100
+
+
+def play_alert_audio(filename=None, volume_pct=100):
+    # Clips are stored at full volume; the user's volume is applied here, so
+    # changing it never touches the disk or the network.  Non-blocking: the
+    # resident player already holds the preloaded clip in memory.
     if not filename or not os.path.exists(filename):
         filename = "alert.wav"
-    def _play():
-        try:
-            import pygame
-            if not pygame.mixer.get_init():
-                pygame.mixer.init()
-            pygame.mixer.music.load(filename)
-            pygame.mixer.music.play()
-            while pygame.mixer.music.get_busy():
-                pygame.time.Clock().tick(10)
-        except Exception as e:
-            print(f"[Pygame Playback Error] {e}")
-    threading.Thread(target=_play, daemon=True).start()
+    alert_player().play(filename, volume_pct=volume_pct)
 
 
 def get_alert_audio_filename(username, folder="alerts"):
@@ -322,40 +534,168 @@ def get_alert_audio_filename(username, folder="alerts"):
     return os.path.join(folder, f"alert_{username}.wav")
 
 
+_clip_cache = None
+
+TTS_TIMEOUT_SECONDS = 10.0
+
+
+def alert_clip_cache():
+    global _clip_cache
+    if _clip_cache is None:
+        _clip_cache = AudioCache()
+    return _clip_cache
+
+
+def alert_clip_key(text, voice, backend):
+    return clip_key(text, voice, backend.name, backend.version())
+
+
+def preferred_clip_key(text, voice):
+    # key the clip would have if synthesized now: the first backend that is
+    # installed and not backing off after a failure
+    from TTSBackends import tts_backends
+    for backend in tts_backends():
+        if backend.available():
+            return alert_clip_key(text, voice, backend)
+    return None
+
+
+async def synthesize_alert_async(text="Stay focused!", voice="en-US-JennyNeural", timeout=TTS_TIMEOUT_SECONDS):
+    # (cache path, pcm, rate); pcm is None when the clip came from the cache.
+    # Runs on the TTSWorker loop (see request_alert_audio / request_preview).
+    # Backends are tried in order (edge-tts, then offline engines); each is
+    # served from the clip cache when it already rendered this text / voice /
+    # engine version, and a backend that fails or times out is skipped for a
+    # while.  The cache entry is the only file written.
+    from TTSBackends import tts_backends
+    cache = alert_clip_cache()
+    for backend in tts_backends():
+        key = alert_clip_key(text, voice, backend)
+        path = cache.get(key)
+        if path:
+            return path, None, None
+        if not backend.available():
+            continue
+        t0 = time.perf_counter()
+        try:
+            pcm, rate = await backend.synthesize(text, voice, timeout)
+        except Exception as e:
+            print(f"[TTS] {backend.name} failed ({type(e).__name__}: {e}); trying the next engine")
+            backend.mark_failed()
+            continue
+        backend.mark_ok()
+        path = await asyncio.get_running_loop().run_in_executor(None, cache.put, key, wav_bytes(pcm, rate))
+        print(f"[TTS] Synthesized with {backend.name} in {time.perf_counter() - t0:.2f}s and cached: "
+              f"{os.path.basename(path)}")
+        return path, pcm, rate
+    raise RuntimeError("no TTS backend could render the alert")
+
+
+async def _preview_pcm(text, voice, timeout):
+    # (mono float32 PCM, rate) of the clip, for playing straight from memory;
+    # a fresh synthesis is not read back from disk
+    path, pcm, rate = await synthesize_alert_async(text, voice, timeout)
+    if pcm is None:
+        pcm, rate = await asyncio.get_running_loop().run_in_executor(None, load_wav, path)
+    return pcm, rate
+
+
+async def _alert_audio_job(text, voice, filename, timeout):
+    if await asyncio.get_running_loop().run_in_executor(None, alert_audio_is_current, filename, text, voice):
+        return False
+    clip = (await synthesize_alert_async(text, voice, timeout))[0]
+    await asyncio.get_running_loop().run_in_executor(None, install_alert_clip, clip, text, voice, filename)
+    return True
+
+
+def request_preview(user, text="Stay focused!", voice="en-US-JennyNeural", timeout=TTS_TIMEOUT_SECONDS):
+    # Future of (pcm, rate); replaces the user's previous preview request
+    return tts_worker().submit((user, "preview"), _preview_pcm, text, voice, timeout)
+
+
+def request_alert_audio(user, text="Stay focused!", voice="en-US-JennyNeural", filename="alert.wav",
+                        timeout=TTS_TIMEOUT_SECONDS):
+    # Future of ensure_alert_audio's result for `filename`; replaces the
+    # user's previous request for the same file
+    return tts_worker().submit((user, filename), _alert_audio_job, text, voice, filename, timeout)
+
+
+def synthesize_alert_clip(text="Stay focused!", voice="en-US-JennyNeural", timeout=TTS_TIMEOUT_SECONDS):
+    # blocking: path of a full-volume WAV of `text` in `voice`
+    return tts_worker().submit(None, synthesize_alert_async, text, voice, timeout).result()[0]
+
+
 def generate_alert_audio(
         text="Stay focused!",
         voice="en-US-JennyNeural",
-        volume_pct=100,
         filename="alert.wav",
 ):
-    async def speak():
-        mp3_filename = filename + ".mp3"
-        temp_wav_fd, temp_wav_filename = tempfile.mkstemp(suffix=".wav")
-        os.close(temp_wav_fd)
-        tts = edge_tts.Communicate(text=text, voice=voice)
-        await tts.save(mp3_filename)
-        audio = AudioSegment.from_file(mp3_filename, format="mp3")
-        os.remove(mp3_filename)
-
-        v = max(0, min(int(volume_pct), 100)) / 100.0
-        if v <= 0.0:
-            gain_db = -60.0
-        elif v >= 1.0:
-            gain_db = 0.0
-        else:
-            gain_db = -60.0 * (1.0 - (v ** 0.5))
-        audio = audio.apply_gain(gain_db)
+    # full-volume copy of the cached clip; volume is applied at playback
+    install_alert_clip(synthesize_alert_clip(text=text, voice=voice), text, voice, filename)
+
+
+def install_alert_clip(clip, text, voice, filename):
+    clip_id = os.path.splitext(os.path.basename(clip))[0]
+
+    if os.path.exists(filename) and os.path.samefile(clip, filename):
+        _write_alert_audio_meta(filename, text, voice, clip_id)
+        return
+
+    # hard-link the cache entry where possible instead of writing a second copy
+    temp_wav_filename = os.path.join(os.path.dirname(os.path.abspath(filename)),
+                                     f".{os.path.basename(filename)}.{os.getpid()}.{threading.get_ident()}.tmp")
+    if os.path.exists(temp_wav_filename):
+        os.remove(temp_wav_filename)  # never write through a stale link into the cache
+    try:
+        os.link(clip, temp_wav_filename)
+    except OSError:
+        shutil.copyfile(clip, temp_wav_filename)
+    try:
+        # Atomically overwrite original alert.wav (avoid "in use" errors)
+        shutil.move(temp_wav_filename, filename)
+    except Exception as e:
+        print(f"[TTS] Could not move temp audio into place: {e}")
+        # As a fallback, keep the temp file for debugging
+    _write_alert_audio_meta(filename, text, voice, clip_id)
+    print(f"[TTS Ready] Saved: {filename}")
 
-        audio.export(temp_wav_filename, format="wav")
-        try:
-            # Atomically overwrite original alert.wav (avoid "in use" errors)
-            shutil.move(temp_wav_filename, filename)
-        except Exception as e:
-            print(f"[TTS] Could not move temp audio into place: {e}")
-            # As a fallback, keep the temp file for debugging
-        print(f"[TTS Ready] Saved: {filename}")
 
-    asyncio.run(speak())
+def _write_alert_audio_meta(filename, text, voice, clip_id):
+    # small sidecar recording what the clip says, so startup can tell if it's stale
+    try:
+        with open(filename + ".json", "w") as f:
+            json.dump({"text": text, "voice": voice, "clip": clip_id}, f)
+    except OSError as e:
+        print(f"[TTS] Could not write audio metadata: {e}")
+
+
+def alert_audio_is_current(filename, text="Stay focused!", voice="en-US-JennyNeural"):
+    # Current if it says the right words with the best engine available right
+    # now; a clip from an offline fallback is upgraded once edge-tts is back.
+    if not os.path.exists(filename):
+        return False
+    try:
+        with open(filename + ".json") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return False
+    if meta.get("text") != text or meta.get("voice") != voice:
+        return False
+    preferred = preferred_clip_key(text, voice)
+    return preferred is None or meta.get("clip") == preferred
+
+
+def ensure_alert_audio(
+        text="Stay focused!",
+        voice="en-US-JennyNeural",
+        filename="alert.wav",
+):
+    # Synthesize only if the clip is missing or says something else.
+    # Returns True if it had to regenerate.
+    if alert_audio_is_current(filename, text, voice):
+        return False
+    generate_alert_audio(text=text, voice=voice, filename=filename)
+    return True
 
 
 def adjust_brightness_contrast(frame, brightness=50, contrast=50):
@@ -371,14 +711,14 @@ def adjust_exposure(frame, exposure=50):
     return cv2.convertScaleAbs(frame, alpha=factor, beta=0)
 
 
-def adjust_saturation(frame, saturation=50):
-    # saturation: 0–100 (50 = unchanged)
+def adjust_saturation(frame, saturation=50, dst=None):
+    # saturation: 0–100 (50 = unchanged); dst: optional preallocated output
     hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV).astype(np.float32)
     s = hsv[:, :, 1]
     scale = saturation / 50.0  # 1.0 = unchanged
     s = np.clip(s * scale, 0, 255)
     hsv[:, :, 1] = s
-    frame_sat = cv2.cvtColor(hsv.astype(np.uint8), cv2.COLOR_HSV2BGR)
+    frame_sat = cv2.cvtColor(hsv.astype(np.uint8), cv2.COLOR_HSV2BGR, dst=dst)
     return frame_sat
 
 def get_user_setting_safe(user_manager, key, default=50):
@@ -0,0 +1,100 @@
+from multiprocessing import shared_memory
+import numpy as np
+
+
+class SharedFrameRing:
+    # Ring of preallocated frame slots in one shared-memory block, so frames
+    # travel between processes as (slot, seq) pairs instead of pickles.
+    #
+    # Layout: int64 control block [n_slots x (seq, readers)] followed by the
+    # frame slots.  seq == 0 means "empty or being written".  A reader pins a
+    # slot by bumping `readers` (only if the seq it was told about is still
+    # current) and the writer never reuses a pinned slot, so a frame cannot be
+    # overwritten while someone is still working on it.  All control-block
+    # changes happen under `lock`, a multiprocessing.Lock shared by both sides.
+
+    def __init__(self, shm, n_slots, shape, dtype, lock, owner):
+        self.shm = shm
+        self.n_slots = n_slots
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.lock = lock
+        self.owner = owner
+        ctrl_bytes = n_slots * 2 * 8
+        self._ctrl = np.ndarray((n_slots, 2), dtype=np.int64, buffer=shm.buf[:ctrl_bytes])
+        self._frames = np.ndarray((n_slots,) + self.shape, dtype=self.dtype,
+                                  buffer=shm.buf[ctrl_bytes:ctrl_bytes + n_slots * self._slot_bytes()])
+        self._next_seq = 1
+
+    def _slot_bytes(self):
+        return int(np.prod(self.shape)) * self.dtype.itemsize
+
+    @classmethod
+    def create(cls, lock, shape, n_slots=4, dtype=np.uint8):
+        dtype = np.dtype(dtype)
+        size = n_slots * 2 * 8 + n_slots * int(np.prod(shape)) * dtype.itemsize
+        shm = shared_memory.SharedMemory(create=True, size=size)
+        ring = cls(shm, n_slots, shape, dtype, lock, owner=True)
+        ring._ctrl[:] = 0
+        return ring
+
+    @classmethod
+    def attach(cls, spec, lock):
+        name, n_slots, shape, dtype = spec
+        # spawned children share the creator's resource tracker, so only the
+        # creator's close() unlinks the block
+        shm = shared_memory.SharedMemory(name=name)
+        return cls(shm, n_slots, shape, dtype, lock, owner=False)
+
+    def spec(self):
+        # picklable description for the other side's attach()
+        return self.shm.name, self.n_slots, self.shape, self.dtype.str
+
+    # writer side ------------------------------------------------------------
+    def acquire_write_slot(self):
+        # oldest unpinned slot as (index, writable view), or None if all are pinned
+        with self.lock:
+            free = [i for i in range(self.n_slots) if self._ctrl[i, 1] == 0]
+            if not free:
+                return None
+            idx = min(free, key=lambda i: self._ctrl[i, 0])
+            self._ctrl[idx, 0] = 0  # invalidates any (idx, old seq) still in flight
+        return idx, self._frames[idx]
+
+    def commit(self, idx):
+        # publish a written slot; returns its sequence number
+        with self.lock:
+            seq = self._next_seq
+            self._next_seq += 1
+            self._ctrl[idx, 0] = seq
+        return seq
+
+    # reader side ------------------------------------------------------------
+    def acquire_read(self, idx, seq):
+        # pin slot idx if it still holds frame `seq`; returns a zero-copy view or None
+        with self.lock:
+            if self._ctrl[idx, 0] != seq:
+                return None
+            self._ctrl[idx, 1] += 1
+        return self._frames[idx]
+
+    def release(self, idx):
+        with self.lock:
+            if self._ctrl[idx, 1] > 0:
+                self._ctrl[idx, 1] -= 1
+
+    def close(self):
+        # views must not be used after this
+        self._ctrl = None
+        self._frames = None
+        try:
+            self.shm.close()
+        except BufferError:
+            # a view is still alive somewhere; the OS frees it on exit
+            pass
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
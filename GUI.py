@@ -1,21 +1,24 @@
 import sys
 from PyQt6.QtWidgets import (QApplication, QWidget, QPushButton, QLabel, QVBoxLayout, QHBoxLayout, QFrame, QLineEdit, QStackedLayout, QGraphicsBlurEffect)
-from PyQt6.QtGui import QImage, QPixmap, QFont
-from PyQt6.QtCore import Qt, pyqtSignal
-import cv2
+from PyQt6.QtGui import QFont
+from PyQt6.QtCore import Qt, QTimer, QEvent
 
-from FaceAnalysis import FaceAnalyzer
-from FocusMonitor import FocusMonitor
-from UserManager import UserManager
+from FocusMonitor import FocusMonitor, alert_volume_pct
+from UserManager import create_user_manager
 from IAPanel import IntentionalActionsPanel
 from SettingsPanel import SettingsPanel
-from FocusMonitor import generate_alert_audio
 from StudyTechniquePanel import StudyTechniquePopup
+from VideoPreview import LatestFrameMailbox, PreviewRenderer, PreviewLabel
+from TrayStatus import StatusTray
+from CameraDiscovery import camera_discovery
+from CameraManager import CameraManager
+from InferenceClient import inference_client
 import threading
 
+PREVIEW_FPS = 30
+
 
 class MainWindow(QWidget):
-    frame_ready = pyqtSignal(object)
     def __init__(self):
         super().__init__()
         # # transparent background
@@ -58,28 +61,51 @@ class MainWindow(QWidget):
         font.setPointSize(12)
         self.setFont(font)
 
-        self.user_manager = UserManager()
+        self.user_manager = create_user_manager()
         self.current_user = None
 
         self.stack = QStackedLayout(self)
         self.setLayout(self.stack)
 
+        # The monitor thread fits frames to the preview (PreviewRenderer) and
+        # drops them into the mailbox; the GUI pulls the newest one at display
+        # rate, so a blocked event loop (modal dialogs, calibration) never
+        # builds up a backlog of queued frames.
+        self.preview_renderer = PreviewRenderer()
+        self.preview_mailbox = LatestFrameMailbox()
+
         self.login_widget = self.create_login_ui()
         self.app_widget = self.create_main_ui()
 
         self.stack.addWidget(self.login_widget)
         self.stack.addWidget(self.app_widget)
 
-        self.frame_ready.connect(self.update_video_frame)
+        self.preview_timer = QTimer(self)
+        self.preview_timer.setInterval(1000 // PREVIEW_FPS)
+        self.preview_timer.timeout.connect(self._pull_preview_frame)
+
+        # headless: window hidden, no preview at all, status in the tray
+        self.status_tray = None
+        self.headless = False
 
+        # the webcam stays open across calibrate / monitor / pause / resume;
+        # self.cap is the lease of whoever is using it right now
+        self.camera = CameraManager()
         self.cap = None
+        self.calibration_widget = None
         self.analyzer = None
-        self.monitor = FocusMonitor(user_manager=self.user_manager, fps=15)
+        self._warmup_thread = None
+        self._warmup_token = None
+        # client mode ($DONOT_INFERENCE_SERVER): emotion and CLIP run on an InferenceServer
+        self.inference = inference_client()
+        self.monitor = FocusMonitor(user_manager=self.user_manager, fps=15,
+                                    shared_ia=self.inference, emotion_model=self.inference)
         self.ia_panel = None
 
         self._last_alert_text = None
         self._last_alert_voice = None
-        self._last_alert_volume = None
+        self.alert_audio_future = None  # pending TTS job for the user's alert clip
+        self.session_id = None  # monitoring session being recorded (SQLite store)
 
         self._last_cam_props = {
             'cam_brightness': None,
@@ -183,16 +209,62 @@ class MainWindow(QWidget):
         return widget
 
     def initialize_analyzer(self):
-        self.analyzer = FaceAnalyzer(use_dlib=False)  # turn off dlib for speed
+        # MediaPipe (and DeepFace / TensorFlow if emotion is enabled) are
+        # imported here, on a background thread after login, so they never
+        # delay the login window.
+        self.analyzer = None
         calibration_data = self.user_manager.get_calibration_data()
+        use_emotion = self.user_manager.get_setting('emotion_enabled') is not False
+        max_faces = int(self.user_manager.get_setting('max_faces') or 1)
+        camera_discovery()  # scan cameras in the background so Settings opens with a list
+        token = self._warmup_token = object()
 
-        if calibration_data:
-            self.analyzer.calibration_data = calibration_data
-            self.analyzer.baseline_vertical_ratio = calibration_data.get("vertical")
-            self.analyzer.baseline_horizontal_ratio = calibration_data.get("horizontal")
-            print("[Init] Loaded calibration from user data.")
-        else:
-            print("[Init] No calibration data found. Please calibrate.")
+        def _warm_up():
+            try:
+                from FaceAnalysis import FaceAnalyzer
+                from LazyBackends import backend
+                analyzer = FaceAnalyzer(use_dlib=False, use_emotion=use_emotion,  # turn off dlib for speed
+                                        max_faces=max_faces)
+                if use_emotion and self.inference is None:
+                    backend("deepface")
+            except Exception as e:
+                print(f"[Init] Could not load face analysis: {e}")
+                return
+
+            if calibration_data:
+                analyzer.calibration_data = calibration_data
+                analyzer.baseline_vertical_ratio = calibration_data.get("vertical")
+                analyzer.baseline_horizontal_ratio = calibration_data.get("horizontal")
+                print("[Init] Loaded calibration from user data.")
+            else:
+                print("[Init] No calibration data found. Please calibrate.")
+            if token is self._warmup_token:  # user may have logged out meanwhile
+                self.analyzer = analyzer
+
+        self._warmup_thread = threading.Thread(target=_warm_up, daemon=True)
+        self._warmup_thread.start()
+
+    def _wait_for_analyzer(self):
+        # Calibrate / Start right after login may have to wait for the warm-up.
+        if self.analyzer is None and self._warmup_thread is not None and self._warmup_thread.is_alive():
+            self.status_label.setText("Status: Loading models...")
+            QApplication.processEvents()
+            self._warmup_thread.join()
+        if self.analyzer is None:
+            self.status_label.setText("Status: Face analysis unavailable.")
+            return False
+        return True
+
+    def _wait_for_camera(self):
+        # The camera opens in the background (and stays open); only the first
+        # use, or a device switch, can have to wait for it here.
+        if not self.camera.is_open():
+            self.status_label.setText("Status: Opening camera...")
+            QApplication.processEvents()
+            if not self.camera.open():
+                self.status_label.setText(f"Status: Could not open camera {self.camera.index}.")
+                return False
+        return True
 
     def handle_login(self):
         name = self.username_input.text().strip()
@@ -257,12 +329,13 @@ class MainWindow(QWidget):
         self.btn_calibrate = QPushButton("Calibrate")
         self.btn_start = QPushButton("Start Monitoring")
         self.btn_pause = QPushButton("Pause")
+        self.btn_headless = QPushButton("Headless Mode")
         self.intentional_actions_button = QPushButton("Edit Intentional Actions")
         self.study_btn = QPushButton("Study Techniques")
         self.btn_settings = QPushButton("Settings")
         self.btn_logout = QPushButton("Log Out")
 
-        for btn in [self.btn_calibrate, self.btn_start, self.btn_pause,
+        for btn in [self.btn_calibrate, self.btn_start, self.btn_pause, self.btn_headless,
                     self.intentional_actions_button, self.study_btn, self.btn_settings, self.btn_logout]:
             btn.setCursor(Qt.CursorShape.PointingHandCursor)
             btn.setFixedHeight(45)
@@ -280,6 +353,7 @@ class MainWindow(QWidget):
         side_panel.addWidget(self.btn_calibrate)
         side_panel.addWidget(self.btn_start)
         side_panel.addWidget(self.btn_pause)
+        side_panel.addWidget(self.btn_headless)
         side_panel.addWidget(self.intentional_actions_button)
         side_panel.addWidget(self.study_btn)
         side_panel.addStretch(1)
@@ -292,7 +366,7 @@ class MainWindow(QWidget):
         self.status_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         self.status_label.setStyleSheet("font-size: 18px; color: #333;")
 
-        self.video_label = QLabel("Camera feed will appear here")
+        self.video_label = PreviewLabel("Camera feed will appear here", renderer=self.preview_renderer)
         self.video_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         self.video_label.setStyleSheet("background-color: black; color: #777;")
         self.video_label.setFixedHeight(400)
@@ -319,6 +393,7 @@ class MainWindow(QWidget):
         self.btn_calibrate.clicked.connect(self.on_calibrate_clicked)
         self.btn_start.clicked.connect(self.on_start_clicked)
         self.btn_pause.clicked.connect(self.on_pause_clicked)
+        self.btn_headless.clicked.connect(self.enter_headless)
         self.study_btn.clicked.connect(self.open_study_popup)
         self.btn_settings.clicked.connect(self.show_settings_panel)
         self.btn_logout.clicked.connect(self.on_logout_clicked)
@@ -388,109 +463,172 @@ class MainWindow(QWidget):
             self.move(self.pos() + event.globalPosition().toPoint() - self.drag_position)
             self.drag_position = event.globalPosition().toPoint()
 
-    def update_video_frame(self, frame):
-        # Convert BGR -> RGB
-        rgb_image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        h, w, _ = rgb_image.shape
-        q_image = QImage(rgb_image.data, w, h, 3 * w, QImage.Format.Format_RGB888)
-        pm = QPixmap.fromImage(q_image)
-
-        # Cache target size to avoid querying layout constantly
-        if not hasattr(self, "_vid_target_size"):
-            self._vid_target_size = self.video_label.size()
+    def _publish_preview_frame(self, frame, faces):
+        # monitoring thread: resize + wrap here, off the GUI thread; the
+        # overlay for `faces` is painted by the label itself
+        item = self.preview_renderer.render(frame, faces)
+        if item is not None:
+            self.preview_renderer.release(self.preview_mailbox.put(item))
+
+    def _pull_preview_frame(self):
+        frame = self.preview_mailbox.take()
+        if frame is not None:
+            self.update_video_frame(frame)
+
+    def _stop_preview(self):
+        self.preview_timer.stop()
+        self.preview_renderer.release(self.preview_mailbox.clear())
+
+    def _preview_wanted(self):
+        return not self.headless and self.isVisible() and not self.isMinimized()
+
+    def _sync_preview(self):
+        # Only pay for preview rendering while someone can see it; resuming is
+        # just handing the callback back, so the next frame shows up at once.
+        if self.monitor.is_monitoring and self._preview_wanted():
+            self.monitor.set_frame_callback(self._publish_preview_frame)
+            self.preview_timer.start()
+        else:
+            self.monitor.set_frame_callback(None)
+            self._stop_preview()
 
-        size_now = self.video_label.size()
-        if size_now != self._vid_target_size:
-            self._vid_target_size = size_now
+    def changeEvent(self, event):
+        if event.type() == QEvent.Type.WindowStateChange:
+            self._sync_preview()
+        super().changeEvent(event)
 
-        # Use FastTransformation (nearest-ish) instead of smooth every frame
-        if self._vid_target_size.width() == w and self._vid_target_size.height() == h:
-            self.video_label.setPixmap(pm)
-        else:
-            self.video_label.setPixmap(
-                pm.scaled(
-                    self._vid_target_size,
-                    Qt.AspectRatioMode.KeepAspectRatio,
-                    Qt.TransformationMode.FastTransformation,
-                )
+    def enter_headless(self):
+        if not self.current_user:
+            return
+        if not self.monitor.is_monitoring:
+            self.on_start_clicked()
+            if not self.monitor.is_monitoring:
+                # camera or analyzer not ready: stay visible, the status label says why
+                print("[GUI] Monitoring did not start; staying in the window.")
+                return
+        if self.status_tray is None:
+            self.status_tray = StatusTray(
+                self.monitor,
+                on_show=self.leave_headless,
+                on_toggle_pause=self._toggle_pause_from_tray,
+                on_quit=self.close,
             )
+        self.headless = True
+        self._sync_preview()
+        self.hide()
+        self.status_tray.show()
+        print("[GUI] Headless mode: preview off, status in tray.")
+
+    def leave_headless(self):
+        self.headless = False
+        if self.status_tray is not None:
+            self.status_tray.hide()
+        self.showNormal()
+        self.raise_()
+        self.activateWindow()
+        self._sync_preview()
+
+    def _toggle_pause_from_tray(self):
+        if self.monitor.is_monitoring:
+            self.on_pause_clicked()
+        else:
+            self.on_start_clicked()
+        if self.status_tray is not None:
+            self.status_tray.refresh()
+
+    def update_video_frame(self, item):
+        # item is an (index, QImage, faces) already fitted to the label by the
+        # PreviewRenderer on the monitoring thread; painting is all that's left
+        self.video_label.set_frame(item)
 
     def on_calibrate_clicked(self):
         print("Calibrate button pressed")
+        self.camera.open_async()  # overlaps with the model warm-up
+        if not self._wait_for_analyzer() or not self._wait_for_camera():
+            return
 
         if self.monitor and self.monitor.is_monitoring:
             print("Stopping monitoring for calibration...")
+            self._end_session()
             self.monitor.stop_monitoring()
+        self._stop_preview()
 
         self.status_label.setText("Status: Calibrating...")
 
-        # Store previous data in case of cancellation
-        prev_calib = {
-            "vertical": getattr(self.analyzer, "baseline_vertical_ratio", None),
-            "horizontal": getattr(self.analyzer, "baseline_horizontal_ratio", None),
-            "data": getattr(self.analyzer, "calibration_data", None)
-        }
+        # Sampling runs on a worker thread; the analyzer is only touched once
+        # calibration succeeds, so cancelling keeps the previous calibration.
+        from CalibrationWidget import CalibrationWidget
+        self.cap = self.camera.acquire("calibration")
+        self.calibration_widget = CalibrationWidget(self.analyzer, self.cap, on_done=self._on_calibration_done)
+        self.calibration_widget.start()
 
-        self.cap = cv2.VideoCapture(0)
-        result = self.analyzer.calibrate_gaze(self.cap)
-        self.cap.release()
-        cv2.destroyAllWindows()
-
-        if result is not None:
-            vertical, horizontal = result
-            self.analyzer.baseline_vertical_ratio = vertical
-            self.analyzer.baseline_horizontal_ratio = horizontal
-            if self.current_user:
-                self.user_manager.update_calibration_data({
-                    "vertical": vertical,
-                    "horizontal": horizontal
-                })
-            self.status_label.setText("Status: Ready")
-        else:
-            # Restore previous calibration
-            self.analyzer.baseline_vertical_ratio = prev_calib["vertical"]
-            self.analyzer.baseline_horizontal_ratio = prev_calib["horizontal"]
-            if prev_calib["data"] is not None:
-                self.analyzer.calibration_data = prev_calib["data"]
-            print("[Calibration] Cancelled. Previous calibration restored.")
+    def _on_calibration_done(self, calibration_data):
+        if self.cap:
+            self.cap.release()  # hands the camera back; the device stays open
+            self.cap = None
+        self.calibration_widget = None
+        if calibration_data is None or self.analyzer is None:
+            print("[Calibration] Cancelled. Previous calibration kept.")
             self.status_label.setText("Status: Calibration cancelled.")
+            return
+
+        vertical, horizontal = self.analyzer.apply_calibration(calibration_data)
+        if self.current_user:
+            self.user_manager.update_calibration_data({
+                "vertical": vertical,
+                "horizontal": horizontal
+            })
+        self.status_label.setText("Status: Ready")
 
     def on_start_clicked(self):
         print("Start Monitoring button pressed")
+        self.camera.open_async()  # overlaps with the model warm-up
+        if not self._wait_for_analyzer() or not self._wait_for_camera():
+            return
         self.status_label.setText("Status: Monitoring.")
         print(f"[DBG] Monitor params before start: "
               f"fps={self.monitor.fps}, "
               f"threshold={self.monitor.threshold}, "
               f"cooldown={self.monitor.cooldown_seconds}, "
               f"window_s={self.monitor.window_seconds}")
-        if self.cap is None or not self.cap.isOpened():
-            self.cap = cv2.VideoCapture(0)
-            actual_fps = self.cap.get(cv2.CAP_PROP_FPS)
-            w = self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)
-            h = self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)
-            print(f"[DBG] Camera opened: {w}x{h} @ {actual_fps} fps (driver report)")
-
         # Apply current user settings to monitor + camera before starting.
         self.apply_user_settings()
+        if not self._wait_for_camera():  # webcam_index may just have changed
+            return
 
         if self.current_user:
             actions = self.user_manager.get_intentional_actions()
             self.monitor.set_intent_actions(actions)
 
         if not self.monitor.is_monitoring:
+            self.cap = self.camera.acquire("monitoring")
             self.monitor.start_monitoring(
                 self.cap,
                 self.analyzer,
-                frame_callback = self.frame_ready.emit,
+                frame_callback = self._publish_preview_frame,
                 intent_actions = self.user_manager.get_intentional_actions() if self.current_user else None,
             )
+            self._begin_session()
+        self._sync_preview()
+
+    def _begin_session(self):
+        # only stores with session history (SQLiteUserManager) record one
+        if self.monitor.is_monitoring and hasattr(self.user_manager, "start_session"):
+            self.session_id = self.user_manager.start_session()
+
+    def _end_session(self):
+        if self.session_id is not None:
+            self.user_manager.end_session(self.session_id, stats=self.monitor.status())
+            self.session_id = None
 
     def on_pause_clicked(self):
         print("Pause button pressed")
         self.status_label.setText("Status: Paused")
+        self._end_session()
         self.monitor.stop_monitoring()
+        self._stop_preview()
         if self.cap:
-            self.cap.release()
+            self.cap.release()  # the camera itself stays warm for resume
             self.cap = None
 
     def show_IA_panel(self):
@@ -539,44 +677,69 @@ class MainWindow(QWidget):
     def apply_user_settings(self):
         s = self.user_manager.get_current_user_data().get('settings', {})
 
+        # Emotion on/off takes effect the next time monitoring starts; DeepFace
+        # is loaded lazily on the first analysed frame that needs it.
+        if self.analyzer is not None:
+            self.analyzer.use_emotion = s.get('emotion_enabled', True) is not False
+            # likewise the number of tracked faces (monitoring builds its own FaceMesh)
+            self.analyzer.max_faces = max(1, int(s.get('max_faces', 1) or 1))
+
+        # Switching webcams reopens in the background; a running session keeps
+        # its lease and continues on the new device.
+        self.camera.select(int(s.get('webcam_index', 0) or 0))
+
         # Reconfigure live monitor (if open)
         self.monitor.reconfigure(
             threshold=float(s.get('alert_threshold', self.monitor.threshold)),
             cooldown_seconds=int(s.get('cooldown_seconds', self.monitor.cooldown_seconds)),
             fps=int(s.get('fps', self.monitor.fps)),
             window_seconds=int(s.get('window_seconds', self.monitor.window_seconds)),
+            face_process=bool(s.get('face_process', self.monitor.face_process)),
+            ia_process=bool(s.get('ia_process', self.monitor.ia_process)),
         )
 
-        # (Re)generate alert audio only if something changed, and do it off the UI thread.
+        # The resident player keeps its stream open on the chosen device;
+        # volume is applied at playback and needs nothing else.
+        from AudioPlayback import alert_player
+        player = alert_player()
+        player.set_device(s.get('output_device'))
+        player.set_volume(alert_volume_pct(self.user_manager))
+
+        # (Re)generate alert audio only if the words changed, and do it off the
+        # UI thread, then preload it so an alert never reads the disk.
         alert_text = self.user_manager.get_setting('alert_text') or "Stay focused!"
         alert_voice = self.user_manager.get_setting('alert_voice') or "en-US-JennyNeural"
-        alert_volume = int(self.user_manager.get_setting('alert_volume') or 100)
 
         changed = (
                 alert_text != self._last_alert_text or
-                alert_voice != self._last_alert_voice or
-                alert_volume != self._last_alert_volume
+                alert_voice != self._last_alert_voice
         )
 
         if changed:
             self._last_alert_text = alert_text
             self._last_alert_voice = alert_voice
-            self._last_alert_volume = alert_volume
 
-            def _tts_worker():
+            from FocusMonitor import request_alert_audio, get_alert_audio_filename
+            filename = get_alert_audio_filename(self.current_user)
+
+            def _loaded(future):
+                # runs on the TTS loop; cancelled when a newer change superseded it
+                if future.cancelled():
+                    return
                 try:
-                    from FocusMonitor import generate_alert_audio, get_alert_audio_filename
-                    filename = get_alert_audio_filename(self.current_user)
-                    generate_alert_audio(
-                        text=alert_text,
-                        voice=alert_voice,
-                        volume_pct=alert_volume,
-                        filename=filename,
-                    )
+                    future.result()
+                    player.load(filename)
                 except Exception as e:
                     print(f"[Settings] Could not regenerate alert audio: {e}")
 
-            threading.Thread(target=_tts_worker, daemon=True).start()
+            # no network round trip if the user's clip already matches
+            self.alert_audio_future = request_alert_audio(
+                self.current_user,
+                text=alert_text,
+                voice=alert_voice,
+                filename=filename,
+            )
+            self.alert_audio_future.add_done_callback(_loaded)
 
     def reload_settings(self):
         # ----- load & apply monitor parameters -----
@@ -609,20 +772,21 @@ class MainWindow(QWidget):
         # ----- regenerate alert audio (critical for your issue) -----
         alert_text = self.user_manager.get_setting('alert_text') or "Stay focused!"
         alert_voice = self.user_manager.get_setting('alert_voice') or "en-US-JennyNeural"
-        alert_volume = self.user_manager.get_setting('alert_volume')
-        if alert_volume is None:
-            alert_volume = 100
 
-        try:
-            # Overwrite the default file FocusMonitor plays. :contentReference[oaicite:5]{index=5}
-            generate_alert_audio(
-                text=alert_text,
-                voice=alert_voice,
-                volume_pct=int(alert_volume),
-                filename="alert.wav",
-            )
-        except Exception as e:
-            print(f"[GUI] Failed to regenerate alert audio: {e}")
+        from FocusMonitor import request_alert_audio
+
+        def _report(future):
+            if not future.cancelled() and future.exception() is not None:
+                print(f"[GUI] Failed to regenerate alert audio: {future.exception()}")
+
+        # Overwrite the default file FocusMonitor plays; the words themselves
+        # come from the clip cache unless this text / voice is new.
+        request_alert_audio(
+            self.current_user,
+            text=alert_text,
+            voice=alert_voice,
+            filename="alert.wav",
+        ).add_done_callback(_report)
 
         print("[GUI] Settings reloaded & alert audio regenerated.")
 
@@ -640,6 +804,15 @@ class MainWindow(QWidget):
             self.ia_panel.close()
             self.ia_panel = None
         self.current_user = None
+        self.analyzer = None
+        self._warmup_token = None
+        self._last_alert_text = None  # next user's clip is checked / preloaded again
+        self._last_alert_voice = None
+        if self.alert_audio_future is not None:
+            self.alert_audio_future.cancel()
+            self.alert_audio_future = None
+        self._end_session()
+        self.user_manager.flush()
         self.user_manager.current_user = None
         self.stack.setCurrentWidget(self.login_widget)
         self.status_label.setText("Status: Ready")
@@ -647,31 +820,22 @@ class MainWindow(QWidget):
         if self.monitor and self.monitor.is_monitoring:
             print("Stopping monitoring for calibration...")
             self.monitor.stop_monitoring()
-        if self.cap:
-            self.cap.release()
-            self.cap = None
-
-    def open_camera_safely(index=0, backend=cv2.CAP_ANY,
-                           width=1280, height=720, fps=30,
-                           saturation=None):
-        cap = cv2.VideoCapture(index, backend)
-        if not cap.isOpened():
-            cap = cv2.VideoCapture(index)
-        if not cap.isOpened():
-            return None
-
-        # Hint at color; harmless if unsupported
-        cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
-        cap.set(cv2.CAP_PROP_CONVERT_RGB, 1)
-        cap.set(cv2.CAP_PROP_AUTO_EXPOSURE, 0.75)
-
-        if saturation is not None:
-            cap.set(cv2.CAP_PROP_SATURATION, saturation)
-
-        cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
-        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
-        cap.set(cv2.CAP_PROP_FPS, fps)
-        return cap
+        self._stop_preview()
+        self.cap = None
+        self.camera.close()
+
+    def closeEvent(self, event):
+        if self.status_tray is not None:
+            self.status_tray.hide()
+        # worker processes (if any) must not outlive the window
+        self._end_session()
+        if self.monitor:
+            self.monitor.shutdown()
+        self.camera.close()
+        from AudioPlayback import alert_player
+        alert_player().close()
+        self.user_manager.flush()
+        super().closeEvent(event)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,134 @@
+import argparse
+import sys
+
+from PyQt6.QtWidgets import QApplication
+
+from CameraManager import CameraManager
+from FocusMonitor import FocusMonitor
+from InferenceClient import inference_client
+from UserManager import create_user_manager
+from TrayStatus import StatusTray
+
+
+# Alerts-only entry point: runs FocusMonitor with no preview at all (no
+# overlay, colour conversion or scaling) and reports status in the tray.
+#   python Headless.py <username> [--camera N] [--store json|sharded|sqlite]
+#   python Headless.py <username> --cameras 0,2 [--fusion any|all|majority|primary]
+#   python Headless.py <username> --server tcp:studyhall-server:8765   (models on an InferenceServer)
+
+
+def build_analyzer(user_manager):
+    from FaceAnalysis import FaceAnalyzer
+    use_emotion = user_manager.get_setting('emotion_enabled') is not False
+    max_faces = int(user_manager.get_setting('max_faces') or 1)
+    analyzer = FaceAnalyzer(use_dlib=False, use_emotion=use_emotion, max_faces=max_faces)
+    calibration_data = user_manager.get_calibration_data()
+    if calibration_data:
+        analyzer.calibration_data = calibration_data
+        analyzer.baseline_vertical_ratio = calibration_data.get("vertical")
+        analyzer.baseline_horizontal_ratio = calibration_data.get("horizontal")
+    else:
+        print("[Headless] No calibration data found; gaze will read as Unknown. Calibrate in the app first.")
+    return analyzer
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="DoNot focus monitoring without the main window.")
+    parser.add_argument("username", help="existing DoNot user to monitor as")
+    parser.add_argument("--camera", type=int, default=None, help="webcam index (default: user setting or 0)")
+    parser.add_argument("--cameras", default=None,
+                        help="comma-separated webcam indices to monitor together, e.g. 0,2")
+    parser.add_argument("--fusion", choices=("any", "all", "majority", "primary"), default="any",
+                        help="how --cameras are combined into one focus state (default: any)")
+    parser.add_argument("--store", choices=("json", "sharded", "sqlite"), default=None,
+                        help="user store (default: $DONOT_USER_STORE or json)")
+    parser.add_argument("--server", default=None,
+                        help="InferenceServer for emotion and intentional actions, unix:/path or "
+                             "tcp:host:port (default: $DONOT_INFERENCE_SERVER, else run them locally)")
+    args = parser.parse_args(argv)
+
+    app = QApplication(sys.argv)
+    app.setQuitOnLastWindowClosed(False)
+
+    user_manager = create_user_manager(args.store)
+    if not user_manager.login(args.username):
+        print(f"[Headless] User does not exist: {args.username}")
+        return 1
+
+    s = user_manager.get_current_user_data().get('settings', {})
+    camera_indices = [int(i) for i in args.cameras.split(",")] if args.cameras else None
+    inference = inference_client(args.server)
+    if camera_indices and len(camera_indices) > 1:
+        from MultiCamera import MultiStreamMonitor
+        monitor = MultiStreamMonitor(camera_indices, user_manager=user_manager, fusion=args.fusion,
+                                     models=inference)
+        defaults = monitor.fused
+    else:
+        monitor = defaults = FocusMonitor(user_manager=user_manager, shared_ia=inference, emotion_model=inference)
+    monitor.reconfigure(
+        threshold=float(s.get('alert_threshold', defaults.threshold)),
+        cooldown_seconds=int(s.get('cooldown_seconds', defaults.cooldown_seconds)),
+        fps=int(s.get('fps', defaults.fps)),
+        window_seconds=int(s.get('window_seconds', defaults.window_seconds)),
+        face_process=bool(s.get('face_process', False)),
+        ia_process=bool(s.get('ia_process', False)),
+    )
+    analyzer = build_analyzer(user_manager)
+
+    # preload the user's alert so it plays straight from memory
+    from AudioPlayback import alert_player
+    from FocusMonitor import get_alert_audio_filename
+    alert_player().set_device(s.get('output_device'))
+    alert_player().load(get_alert_audio_filename(args.username))
+    if camera_indices and len(camera_indices) > 1:
+        camera_index, camera = None, None
+    else:
+        camera_index = args.camera if args.camera is not None else int(s.get('webcam_index', 0) or 0)
+        if camera_indices:
+            camera_index = camera_indices[0]
+        camera = CameraManager(index=camera_index)
+
+    session = {"id": None}  # monitoring session being recorded (SQLite store)
+
+    def start():
+        if camera is None:
+            # multi-camera: each stream opens and leases its own camera
+            monitor.start_monitoring(analyzer, intent_actions=user_manager.get_intentional_actions())
+        elif not camera.open():
+            print(f"[Headless] Could not open camera {camera_index}")
+            return
+        else:
+            monitor.start_monitoring(camera.acquire("monitoring"), analyzer, frame_callback=None,
+                                     intent_actions=user_manager.get_intentional_actions())
+        if monitor.is_monitoring and hasattr(user_manager, "start_session"):
+            session["id"] = user_manager.start_session()
+
+    def end_session():
+        if session["id"] is not None:
+            user_manager.end_session(session["id"], stats=monitor.status())
+            session["id"] = None
+
+    def toggle_pause():
+        if monitor.is_monitoring:
+            end_session()
+            monitor.stop_monitoring()  # the loop hands the camera back; it stays warm
+        else:
+            start()
+        tray.refresh()
+
+    tray = StatusTray(monitor, on_toggle_pause=toggle_pause, on_quit=app.quit)
+    start()
+    tray.show()
+
+    rc = app.exec()
+    tray.hide()
+    end_session()
+    monitor.shutdown()
+    if camera is not None:
+        camera.close()
+    alert_player().close()
+    return rc
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -49,13 +49,20 @@ class IntentionalActionRecognizer:
             return self._last_result
 
     def is_action_detected_blocking(self, frame, threshold=0.4, neutral_action="sitting and working"):
-        if not self.defined_actions:
-            return False, None, 0.0
+        return self.detect_batch([frame], threshold, neutral_action)[0]
 
-        action_texts = self.defined_actions + [neutral_action]
+    def detect_batch(self, frames, threshold=0.4, neutral_action="sitting and working", actions=None):
+        # One CLIP forward pass for several frames (e.g. one per camera);
+        # returns is_action_detected_blocking's tuple for each frame.
+        # actions overrides defined_actions (inference server clients).
+        actions = self.defined_actions if actions is None else list(actions)
+        if not actions:
+            return [(False, None, 0.0)] * len(frames)
 
-        image = self.frame_to_image(frame)
-        inputs = self.processor(text=action_texts, images=image, return_tensors="pt", padding=True)
+        action_texts = actions + [neutral_action]
+
+        images = [self.frame_to_image(frame) for frame in frames]
+        inputs = self.processor(text=action_texts, images=images, return_tensors="pt", padding=True)
         inputs = {k: v.to(self.device) for k, v in inputs.items()}
         if self.device.type == "cuda":
             for k, v in inputs.items():
@@ -65,14 +72,17 @@ class IntentionalActionRecognizer:
         with torch.no_grad():
             outputs = self.model(**inputs)
             logits_per_image = outputs.logits_per_image
-            probs = logits_per_image.softmax(dim=1).cpu().numpy().flatten()
-
-        max_index = int(np.argmax(probs))
-        confidence = float(probs[max_index])
-        label = action_texts[max_index]
+            probs = logits_per_image.softmax(dim=1).float().cpu().numpy()
 
-        if label == neutral_action:
-            return False, label, confidence
-        if confidence >= threshold:
-            return True, label, confidence
-        return False, label, confidence
\ No newline at end of file
+        results = []
+        for row in probs:
+            max_index = int(np.argmax(row))
+            confidence = float(row[max_index])
+            label = action_texts[max_index]
+            if label == neutral_action:
+                results.append((False, label, confidence))
+            elif confidence >= threshold:
+                results.append((True, label, confidence))
+            else:
+                results.append((False, label, confidence))
+        return results
\ No newline at end of file
@@ -269,11 +269,7 @@ class IntentionalActionsPanel(QWidget):
                 self.save_callback()
 
     def remove_action(self, action_text):
-        current_actions = self.user_manager.get_intentional_actions()
-        if action_text in current_actions:
-            current_actions.remove(action_text)
-            self.user_manager.users[self.current_user]["intentional_actions"] = current_actions
-            self.user_manager.save_users()
+        if self.user_manager.remove_intentional_action(action_text):
             self.refresh_actions()
             if self.save_callback:
                 self.save_callback()
@@ -0,0 +1,234 @@
+import concurrent.futures
+import itertools
+import os
+import socket
+import threading
+import time
+
+import cv2
+
+from InferenceProtocol import parse_address, recv_message, send_message
+from SharedModels import SharedIAClient
+
+
+# Client mode: FaceMesh / gaze stay on this machine, emotion and
+# intentional-action detection are answered by an InferenceServer.
+# InferenceClient has the interfaces FocusMonitor takes for shared models:
+# analyze / analyze_many (emotion_model=) and client() (shared_ia=).  One
+# connection carries any number of requests at once; replies are matched by
+# id on a reader thread.  When the server is unreachable, emotion reads as
+# "Unknown" and no action is detected, and the connection is retried after
+# retry_seconds.
+#
+# Turned on with DONOT_INFERENCE_SERVER=unix:/path | tcp:host:port (and
+# DONOT_INFERENCE_TOKEN if the server has one), or Headless.py --server.
+
+IA_INPUT_SIZE = (224, 224)  # IntentionalActionRecognizer.frame_to_image
+
+
+class InferenceClient:
+
+    def __init__(self, address=None, token=None, timeout=5.0, retry_seconds=5.0):
+        self.family, self.address = parse_address(address)
+        self.token = token if token is not None else os.environ.get("DONOT_INFERENCE_TOKEN")
+        self.timeout = timeout
+        self.retry_seconds = retry_seconds
+        self._sock = None
+        self._lock = threading.RLock()  # self._sock + pending requests; never held while blocking
+        self._connect_lock = threading.Lock()  # one connection attempt at a time
+        self._send_lock = threading.Lock()  # messages must not interleave
+        self._pending = {}  # request id -> (future, parse, socket)
+        self._ids = itertools.count(1)
+        self._retry_at = 0.0
+
+    # --- connection -------------------------------------------------------
+
+    def _connect(self):
+        sock = self._sock
+        if sock is not None:
+            return sock
+        with self._connect_lock:
+            if self._sock is not None:
+                return self._sock  # another thread connected meanwhile
+            if time.monotonic() < self._retry_at:
+                raise ConnectionError("inference server unavailable")
+            return self._open()
+
+    def _open(self):
+        # blocking connect + hello; called without self._lock so replies and
+        # _disconnect on other threads are never stuck behind it
+        sock = socket.socket(self.family, socket.SOCK_STREAM)
+        try:
+            sock.settimeout(self.timeout)
+            sock.connect(self.address)
+            if self.family == socket.AF_INET:
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            send_message(sock, {"op": "hello", "id": 0, "token": self.token or ""})
+            header, _ = recv_message(sock)
+            if header.get("error"):
+                raise ConnectionError(f"refused: {header['error']}")
+            sock.settimeout(None)
+        except (OSError, ValueError) as e:
+            sock.close()
+            self._retry_at = time.monotonic() + self.retry_seconds
+            print(f"[Inference] Cannot use server {self.address}: {e}")
+            raise ConnectionError(f"inference server unavailable: {e}") from e
+        with self._lock:
+            self._sock = sock
+        threading.Thread(target=self._read, args=(sock,), name="InferenceClient", daemon=True).start()
+        print(f"[Inference] Connected to {self.address}")
+        return sock
+
+    def _disconnect(self, sock, error):
+        with self._lock:
+            if self._sock is sock:
+                self._sock = None
+                self._retry_at = time.monotonic() + self.retry_seconds
+                print(f"[Inference] Lost server {self.address}: {error}")
+            failed = [rid for rid, (_, _, s) in self._pending.items() if s is sock]
+            futures = [self._pending.pop(rid)[0] for rid in failed]
+        sock.close()
+        for future in futures:
+            _settle(future, exception=ConnectionError(f"inference server connection lost: {error}"))
+
+    def _read(self, sock):
+        try:
+            while True:
+                header, arrays = recv_message(sock)
+                with self._lock:
+                    entry = self._pending.pop(header.get("id"), None)
+                if entry is None:
+                    continue
+                future, parse, _ = entry
+                if "error" in header:
+                    _settle(future, exception=RuntimeError(header["error"]))
+                    continue
+                try:
+                    _settle(future, result=parse(header, arrays) if parse else header)
+                except Exception as e:
+                    _settle(future, exception=e)
+        except (OSError, ValueError) as e:
+            self._disconnect(sock, e)
+
+    def request(self, op, header=None, arrays=(), parse=None):
+        # -> concurrent.futures.Future of parse(reply header, reply arrays);
+        # future.request_id identifies it for cancel()
+        future = concurrent.futures.Future()
+        try:
+            sock = self._connect()
+        except ConnectionError as e:
+            future.set_exception(e)
+            return future
+        with self._lock:
+            if self._sock is not sock:
+                future.set_exception(ConnectionError("inference server connection lost"))
+                return future
+            future.request_id = request_id = next(self._ids)
+            self._pending[request_id] = (future, parse, sock)
+        try:
+            with self._send_lock:
+                send_message(sock, dict(header or {}, op=op, id=request_id), arrays)
+        except Exception as e:
+            # part of the message may be out: the stream is unusable
+            self._disconnect(sock, e)
+        return future
+
+    def cancel(self, future):
+        # abandon a request; a late reply is then dropped by the reader
+        with self._lock:
+            self._pending.pop(getattr(future, "request_id", None), None)
+        future.cancel()
+
+    def result(self, future, timeout=None):
+        # future.result, cancelling the request if it times out
+        try:
+            return future.result(self.timeout if timeout is None else timeout)
+        except concurrent.futures.TimeoutError:
+            self.cancel(future)
+            raise
+
+    def close(self):
+        with self._lock:
+            sock = self._sock
+        if sock is not None:
+            self._disconnect(sock, "closed")
+
+    # --- emotion (FaceAnalyzer emotion_model=) ----------------------------
+
+    def analyze(self, face_region):
+        return self.analyze_many([face_region])[0]
+
+    def analyze_many(self, face_regions):
+        try:
+            future = self.request("emotion", arrays=face_regions, parse=lambda header, _: header["emotions"])
+            return self.result(future)
+        except ConnectionError:
+            pass  # already reported
+        except concurrent.futures.TimeoutError:
+            print(f"[Inference] No emotion reply within {self.timeout:.1f}s")
+        except Exception as e:
+            print(f"[Inference] Emotion request failed: {e}")
+        return ["Unknown"] * len(face_regions)
+
+    # --- intentional actions (FocusMonitor shared_ia=) --------------------
+
+    def client(self):
+        return RemoteIAClient(self)
+
+    def detect(self, frame, threshold=0.4, neutral_action="sitting and working", actions=()):
+        # CLIP only sees 224x224, so that is all that is sent (resizing
+        # before the server's BGR->RGB swap gives the same image)
+        small = cv2.resize(frame, IA_INPUT_SIZE, interpolation=cv2.INTER_LINEAR)
+        header = {"threshold": threshold, "neutral_action": neutral_action, "actions": list(actions)}
+        return self.request("detect", header, [small],
+                            parse=lambda h, _: (h["detected"], h["label"], h["confidence"]))
+
+    def stats(self):
+        return self.result(self.request("stats"))
+
+
+class RemoteIAClient(SharedIAClient):
+    # IntentionalActionRecognizer interface for one FocusMonitor; its actions
+    # travel with every request, so each machine keeps its own
+
+    def __init__(self, inference):
+        super().__init__(None)
+        self._inference = inference
+        self._actions = []
+
+    @property
+    def defined_actions(self):
+        return self._actions
+
+    def set_defined_actions(self, actions):
+        self._actions = list(actions or [])
+
+    def _submit(self, frame, threshold, neutral_action):
+        return self._inference.detect(frame, threshold, neutral_action, self._actions)
+
+
+def _settle(future, result=None, exception=None):
+    try:
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
+    except concurrent.futures.InvalidStateError:
+        pass  # cancelled by the caller
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def inference_client(address=None):
+    # The process-wide client, or None when no server is configured
+    # (address argument or $DONOT_INFERENCE_SERVER).
+    global _client
+    address = address or os.environ.get("DONOT_INFERENCE_SERVER")
+    if not address:
+        return None
+    with _client_lock:
+        if _client is None:
+            _client = InferenceClient(address)
+        return _client
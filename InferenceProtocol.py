@@ -0,0 +1,76 @@
+import json
+import os
+import socket
+import struct
+
+import numpy as np
+
+
+# Wire format shared by InferenceServer and InferenceClient.  A message is
+#   >II header length, payload length | JSON header | payload
+# The header is a dict; its "arrays" entry lists {"shape", "dtype"} of the
+# numpy arrays (face crops, frames) packed back to back in the payload.
+# JSON + raw bytes rather than pickle, so a peer can never run code here.
+#
+# Addresses: "unix:/path/to.sock" or "tcp:host:port" (a bare "host:port"
+# means TCP too).
+
+DEFAULT_ADDRESS = "unix:/tmp/donot-inference.sock" if hasattr(socket, "AF_UNIX") else "tcp:127.0.0.1:8765"
+MAX_MESSAGE_BYTES = 64 * 1024 * 1024
+_PREFIX = struct.Struct(">II")
+
+
+def parse_address(address):
+    # -> (socket family, address for bind / connect)
+    address = address or os.environ.get("DONOT_INFERENCE_SERVER") or DEFAULT_ADDRESS
+    if address.startswith("unix:"):
+        return socket.AF_UNIX, address[len("unix:"):]
+    if address.startswith("tcp:"):
+        address = address[len("tcp:"):]
+    host, _, port = address.rpartition(":")
+    if not host or not port.isdigit():
+        raise ValueError(f"bad inference server address: {address} (use unix:/path or tcp:host:port)")
+    return socket.AF_INET, (host, int(port))
+
+
+def send_message(sock, header, arrays=()):
+    arrays = [np.ascontiguousarray(a) for a in arrays]
+    header = dict(header, arrays=[{"shape": list(a.shape), "dtype": a.dtype.str} for a in arrays])
+    head = json.dumps(header).encode("utf-8")
+    size = sum(a.nbytes for a in arrays)
+    # one sendall per buffer; no copy of the arrays into a joined payload
+    sock.sendall(_PREFIX.pack(len(head), size) + head)
+    for a in arrays:
+        if a.nbytes:  # an empty crop is all header (and cannot be cast)
+            sock.sendall(memoryview(a).cast("B"))
+
+
+def _recv_exact(sock, n):
+    buf = bytearray(n)
+    view = memoryview(buf)
+    got = 0
+    while got < n:
+        k = sock.recv_into(view[got:])
+        if not k:
+            raise ConnectionError("connection closed")
+        got += k
+    return buf
+
+
+def recv_message(sock):
+    # -> (header, list of arrays); ConnectionError when the peer hung up
+    head_len, size = _PREFIX.unpack(_recv_exact(sock, _PREFIX.size))
+    if head_len + size > MAX_MESSAGE_BYTES:
+        raise ConnectionError(f"message too large ({head_len + size} bytes)")
+    header = json.loads(_recv_exact(sock, head_len).decode("utf-8"))
+    payload = _recv_exact(sock, size) if size else bytearray()
+    arrays, offset = [], 0
+    for spec in header.pop("arrays", []):
+        dtype = np.dtype(spec["dtype"])
+        count = int(np.prod(spec["shape"], dtype=np.int64))
+        end = offset + count * dtype.itemsize
+        if end > size:
+            raise ConnectionError("payload shorter than its array list")
+        arrays.append(np.frombuffer(payload, dtype=dtype, count=count, offset=offset).reshape(spec["shape"]))
+        offset = end
+    return header, arrays
@@ -0,0 +1,212 @@
+import argparse
+import concurrent.futures
+import errno
+import hmac
+import ipaddress
+import os
+import socket
+import socketserver
+import stat
+import sys
+import threading
+import time
+
+import numpy as np
+
+from InferenceProtocol import parse_address, recv_message, send_message
+from SharedModels import SharedEmotionModel, SharedIAModel
+
+
+# Headless model server for rooms where several machines run DoNot: the
+# emotion model (DeepFace) and CLIP (IntentionalActionRecognizer) are loaded
+# once here instead of on every desktop.  Clients (InferenceClient) connect
+# over a Unix or TCP socket and send face crops / frames; requests from all
+# clients go through the BatchQueues of SharedModels, so whatever arrives
+# within --max-wait runs as one batch.
+#   python InferenceServer.py [--listen unix:/tmp/donot-inference.sock | tcp:0.0.0.0:8765] [--token T]
+#
+# Requests (InferenceProtocol messages, answered with the same "id"):
+#   hello    {"token"}                                  first message of a connection
+#   emotion  arrays: face crops                      -> {"emotions": [...]}
+#   detect   {"threshold", "neutral_action", "actions"}, arrays: [frame]
+#                                                    -> {"detected", "label", "confidence"}
+#   stats                                            -> batch sizes and client count
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        self.server.inference.serve_connection(self.request)
+
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+if hasattr(socketserver, "ThreadingUnixStreamServer"):
+    class _UnixServer(socketserver.ThreadingUnixStreamServer):
+        daemon_threads = True
+
+
+class InferenceServer:
+
+    def __init__(self, address=None, token=None, max_wait=0.02, emotion_batch=16, ia_batch=8, workers=32):
+        self.family, self.address = parse_address(address)
+        self.token = token
+        self.emotion = SharedEmotionModel(max_batch=emotion_batch, max_wait=max_wait)
+        self.ia = SharedIAModel(max_batch=ia_batch, max_wait=max_wait)
+        # a request waits for its batch on one of these, so a slow CLIP pass
+        # never holds up the emotion answers on the same connection
+        self.pool = concurrent.futures.ThreadPoolExecutor(workers, thread_name_prefix="InferenceRequest")
+        self.clients = 0
+        self._clients_lock = threading.Lock()
+        self._server = None
+
+    def load_models(self):
+        t0 = time.perf_counter()
+        self.ia.load()
+        self.emotion.analyze(np.zeros((48, 48, 3), np.uint8))  # builds DeepFace's emotion model
+        print(f"[InferenceServer] Models ready in {time.perf_counter() - t0:.1f}s")
+
+    def bind(self):
+        # claim the address (OSError EADDRINUSE if a server already has it);
+        # connections are accepted once serve_forever runs
+        if self._server is not None:
+            return
+        if self.family == socket.AF_INET:
+            if not self.token and not ipaddress.ip_address(socket.gethostbyname(self.address[0])).is_loopback:
+                print("[InferenceServer] Warning: listening on the network without --token")
+            self._server = _TCPServer(self.address, _Handler)
+        else:
+            self._remove_stale_socket()
+            self._server = _UnixServer(self.address, _Handler)
+        self._server.inference = self
+        print(f"[InferenceServer] Listening on {self.address}")
+
+    def serve_forever(self):
+        self.bind()
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+            if self.family != socket.AF_INET:
+                self._remove_stale_socket()
+
+    def shutdown(self):
+        # from another thread; serve_forever returns
+        if self._server is not None:
+            self._server.shutdown()
+        self.pool.shutdown(wait=False)
+        self.emotion.close()
+        self.ia.close()
+
+    def _remove_stale_socket(self):
+        # a previous run's socket file, never anything else: a socket some
+        # server still accepts on is left alone
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.address)
+        except FileNotFoundError:
+            return
+        except ConnectionRefusedError:
+            if stat.S_ISSOCK(os.stat(self.address).st_mode):
+                os.unlink(self.address)
+            return
+        finally:
+            probe.close()
+        raise OSError(errno.EADDRINUSE, f"another inference server is listening on {self.address}")
+
+    def serve_connection(self, sock):
+        write_lock = threading.Lock()
+
+        def reply(header):
+            with write_lock:
+                send_message(sock, header)
+
+        try:
+            header, _ = recv_message(sock)
+            token = str(header.get("token") or "")
+            if header.get("op") != "hello" or (self.token and not hmac.compare_digest(token, self.token)):
+                send_message(sock, {"id": header.get("id"), "error": "unauthorized"})
+                return
+            send_message(sock, {"id": header.get("id"), "ok": True})
+        except (OSError, ValueError):
+            return
+
+        with self._clients_lock:
+            self.clients += 1
+        print(f"[InferenceServer] Client connected ({self.clients} connected)")
+        try:
+            while True:
+                header, arrays = recv_message(sock)
+                self.pool.submit(self._answer, reply, header, arrays)
+        except (OSError, ValueError, RuntimeError):
+            pass  # hung up, sent garbage, or the server is shutting down
+        finally:
+            with self._clients_lock:
+                self.clients -= 1
+            print(f"[InferenceServer] Client disconnected ({self.clients} connected)")
+
+    def _answer(self, reply, header, arrays):
+        try:
+            result = self._handle(header.get("op"), header, arrays)
+        except Exception as e:
+            result = {"error": f"{type(e).__name__}: {e}"}
+        result["id"] = header.get("id")
+        try:
+            reply(result)
+        except OSError:
+            pass  # client gone; its reader has already ended
+
+    def _handle(self, op, header, arrays):
+        if op == "emotion":
+            return {"emotions": self.emotion.analyze_many(arrays)}
+        if op == "detect":
+            if len(arrays) != 1:
+                raise ValueError("detect takes exactly one frame")
+            job = (arrays[0], float(header.get("threshold", 0.4)),
+                   str(header.get("neutral_action", "sitting and working")),
+                   [str(a) for a in header.get("actions") or []])
+            detected, label, confidence = self.ia.queue(job)
+            return {"detected": bool(detected), "label": label, "confidence": float(confidence)}
+        if op == "stats":
+            return {
+                "clients": self.clients,
+                "emotion_batch": self.emotion.queue.mean_batch(),
+                "ia_batch": self.ia.queue.mean_batch(),
+            }
+        raise ValueError(f"unknown request: {op}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve DoNot's emotion and intentional-action models to other machines.")
+    parser.add_argument("--listen", default=None,
+                        help="unix:/path or tcp:host:port (default: $DONOT_INFERENCE_SERVER or "
+                             "unix:/tmp/donot-inference.sock)")
+    parser.add_argument("--token", default=os.environ.get("DONOT_INFERENCE_TOKEN"),
+                        help="shared secret clients must send (default: $DONOT_INFERENCE_TOKEN)")
+    parser.add_argument("--max-wait", type=float, default=20,
+                        help="milliseconds to collect requests into one batch (default: 20)")
+    parser.add_argument("--no-preload", action="store_true",
+                        help="load each model on its first request instead of at startup")
+    args = parser.parse_args(argv)
+
+    server = InferenceServer(args.listen, token=args.token, max_wait=args.max_wait / 1000.0)
+    try:
+        server.bind()  # before loading models, so a taken address fails fast
+    except OSError as e:
+        if e.errno != errno.EADDRINUSE:
+            raise
+        print(f"[InferenceServer] {e.strerror}")
+        return 1
+    if not args.no_preload:
+        server.load_models()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,52 @@
+import importlib
+import importlib.util
+import threading
+import time
+
+
+# Heavy optional libraries, imported the first time a feature that needs them
+# is used.  A gaze-only FaceAnalyzer therefore never loads TensorFlow, and a
+# FaceMesh-only one never loads dlib.
+#   name -> (module to import, attribute to return or None, what needs it)
+_REGISTRY = {
+    "mediapipe": ("mediapipe", None, "gaze (FaceMesh)"),
+    "deepface": ("deepface", "DeepFace", "emotion (DeepFace / TensorFlow)"),
+    "dlib": ("dlib", None, "dlib face-detector fallback"),
+}
+
+_loaded = {}
+_lock = threading.Lock()
+
+
+def backend(name):
+    # Import (once) and return the backend; raises ImportError with the feature
+    # name if the library is not installed.
+    obj = _loaded.get(name)
+    if obj is not None:
+        return obj
+    module_name, attr, feature = _REGISTRY[name]
+    with _lock:
+        if name in _loaded:
+            return _loaded[name]
+        t0 = time.perf_counter()
+        try:
+            module = importlib.import_module(module_name)
+        except ImportError as e:
+            raise ImportError(f"{module_name} is required for {feature}: {e}") from e
+        obj = getattr(module, attr) if attr else module
+        _loaded[name] = obj
+        print(f"[Backends] Loaded {module_name} for {feature} in {time.perf_counter() - t0:.2f}s")
+        return obj
+
+
+def is_loaded(name):
+    return name in _loaded
+
+
+def is_available(name):
+    # installed?  (does not import it)
+    return importlib.util.find_spec(_REGISTRY[name][0]) is not None
+
+
+def loaded_backends():
+    return sorted(_loaded)
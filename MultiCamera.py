@@ -0,0 +1,174 @@
+import threading
+import time
+
+from CameraManager import CameraManager
+from FocusMonitor import FocusMonitor
+from SharedModels import SharedEmotionModel, SharedIAModel
+
+
+# Several webcams watching one user (e.g. front and side angle on a kiosk).
+# Every camera gets its own FocusMonitor stream - own capture thread and own
+# FaceMesh - while the emotion and CLIP models are loaded once and fed
+# through batched queues (SharedModels).  Streams report their focus samples
+# here instead of alerting; a fusion thread combines the latest fresh state
+# of every stream at the monitor rate and feeds the result into one
+# FocusMonitor that keeps the window, threshold, cooldown and alert.
+# A camera that stops delivering simply goes stale and is left out.
+# With models= (an InferenceClient) the models live on an InferenceServer.
+
+
+def _any(states):
+    # focused if any camera sees the user focused (they may face either one)
+    return "Focused" if "Focused" in states.values() else "Distracted"
+
+
+def _all(states):
+    return "Focused" if all(s == "Focused" for s in states.values()) else "Distracted"
+
+
+def _majority(states):
+    # ties count as focused
+    distracted = sum(1 for s in states.values() if s == "Distracted")
+    return "Distracted" if distracted > len(states) - distracted else "Focused"
+
+
+def _primary(states):
+    # the first camera decides while it has a reading, the others fill in
+    first = min(states)
+    return states[first] if first == 0 else _any(states)
+
+
+FUSION_POLICIES = {
+    "any": _any,
+    "all": _all,
+    "majority": _majority,
+    "primary": _primary,
+}
+
+
+def fuse_focus(states, policy="any"):
+    # states: {stream number: "Focused" | "Distracted" | "Unknown"}; None
+    # when no stream has a usable reading
+    known = {i: s for i, s in states.items() if s in ("Focused", "Distracted")}
+    if not known:
+        return None
+    return FUSION_POLICIES[policy](known)
+
+
+class MultiStreamMonitor:
+
+    def __init__(self, camera_indices, user_manager=None, fusion="any", stale_seconds=2.0, models=None,
+                 **monitor_kwargs):
+        if fusion not in FUSION_POLICIES:
+            raise ValueError(f"unknown fusion policy: {fusion} (choose from {', '.join(FUSION_POLICIES)})")
+        self.user_manager = user_manager
+        self.fusion = fusion
+        self.stale_seconds = stale_seconds
+        # worker processes would each load their own models; sharing is the point here
+        monitor_kwargs.update(face_process=False, ia_process=False)
+
+        if models is not None:
+            self.emotion_model = self.ia = models
+        else:
+            self.emotion_model = SharedEmotionModel()
+            self.ia = SharedIAModel()
+        self.cameras = [CameraManager(index=i) for i in camera_indices]
+        self.streams = [
+            FocusMonitor(user_manager=user_manager, shared_ia=self.ia, emotion_model=self.emotion_model,
+                         on_sample=self._sample_callback(n), **monitor_kwargs)
+            for n in range(len(self.cameras))
+        ]
+        # never started: history, threshold, cooldown and the alert for the fused state
+        self.fused = FocusMonitor(user_manager=user_manager, **monitor_kwargs)
+
+        self._lock = threading.Lock()
+        self._latest = {}  # stream number -> (monotonic time, focus state)
+        self._running = False
+        self._thread = None
+
+    @property
+    def is_monitoring(self):
+        return self._running
+
+    def _sample_callback(self, n):
+        def on_sample(focus_state, samples):
+            with self._lock:
+                self._latest[n] = (time.monotonic(), focus_state)
+        return on_sample
+
+    def start_monitoring(self, analyzer, intent_actions=None):
+        if self._running:
+            print("Monitoring already running.")
+            return
+        self._latest = {}
+        for cam in self.cameras:
+            cam.open_async()  # open all devices in parallel
+        started = 0
+        for n, (cam, stream) in enumerate(zip(self.cameras, self.streams)):
+            if not cam.open():
+                print(f"[MultiCamera] Could not open camera {cam.index}; continuing without it")
+                continue
+            stream.start_monitoring(cam.acquire(f"stream{n}"), analyzer, frame_callback=None,
+                                    intent_actions=intent_actions)
+            started += 1
+        if not started:
+            print("[MultiCamera] No camera could be opened")
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="FocusFusion", daemon=True)
+        self._thread.start()
+        print(f"[MultiCamera] Monitoring {started} camera(s), fusion policy '{self.fusion}'")
+
+    def stop_monitoring(self):
+        self._running = False
+        for stream in self.streams:
+            if stream.is_monitoring:
+                stream.stop_monitoring()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1)
+        self._thread = None
+
+    def shutdown(self):
+        self.stop_monitoring()
+        for stream in self.streams:
+            stream.shutdown()
+        for cam in self.cameras:
+            cam.close()
+        self.emotion_model.close()
+        self.ia.close()
+
+    def reconfigure(self, **kwargs):
+        kwargs.pop("face_process", None)
+        kwargs.pop("ia_process", None)
+        for monitor in self.streams + [self.fused]:
+            monitor.reconfigure(**kwargs)
+
+    def stream_states(self):
+        # {stream number: focus state} of the streams with a fresh reading
+        now = time.monotonic()
+        with self._lock:
+            return {n: state for n, (ts, state) in self._latest.items() if now - ts <= self.stale_seconds}
+
+    def _run(self):
+        next_ts = time.perf_counter()
+        while self._running:
+            next_ts += 1.0 / max(self.fused.fps, 1)
+            delay = next_ts - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_ts = time.perf_counter()
+            state = fuse_focus(self.stream_states(), self.fusion)
+            if state is not None:
+                self.fused._last_focus_state = state
+                self.fused.update(state)
+
+    def status(self):
+        status = self.fused.status()
+        status["monitoring"] = self._running
+        status["streams"] = self.stream_states()
+        # report the most degraded stream
+        running = [s.watchdog for s in self.streams if s.is_monitoring]
+        if running:
+            status["quality"] = max(running, key=lambda w: w.level).settings["name"]
+        return status
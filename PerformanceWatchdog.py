@@ -0,0 +1,94 @@
+import time
+
+
+# Degradation ladder, cheapest sacrifice first.  Every level keeps the
+# reductions of the levels before it:
+#   0  full quality
+#   1  analyse a half-resolution copy of the frame (FaceMesh + DeepFace ROI);
+#      the preview keeps the full-resolution frame
+#   2  run emotion (DeepFace) only on every 4th analysed frame
+#   3  IA suppression only: no emotion at all, gaze + intentional actions stay
+#   4  halve the capture/analysis fps (samples are weighted so the focus
+#      window still covers the configured number of seconds)
+LADDER = [
+    {"name": "full quality",            "analysis_scale": 1.0, "emotion_stride": 1, "fps_divisor": 1},
+    {"name": "half analysis resolution", "analysis_scale": 0.5, "emotion_stride": 1, "fps_divisor": 1},
+    {"name": "emotion every 4th frame", "analysis_scale": 0.5, "emotion_stride": 4, "fps_divisor": 1},
+    {"name": "IA suppression only",     "analysis_scale": 0.5, "emotion_stride": 0, "fps_divisor": 1},
+    {"name": "half fps",                "analysis_scale": 0.5, "emotion_stride": 0, "fps_divisor": 2},
+]
+
+
+class PerformanceWatchdog:
+    def __init__(
+        self,
+        downgrade_after=15,
+        upgrade_after=60,
+        headroom=0.6,
+        smoothing=0.2,
+        max_level=len(LADDER) - 1,
+    ):
+        # downgrade_after: consecutive over-budget frames before stepping down
+        # upgrade_after:   consecutive frames with headroom before stepping up
+        # headroom:        cost must fit in this fraction of the previous level's budget
+        self.downgrade_after = max(1, int(downgrade_after))
+        self.upgrade_after = max(1, int(upgrade_after))
+        self.headroom = float(headroom)
+        self.smoothing = float(smoothing)
+        self.max_level = max(0, min(int(max_level), len(LADDER) - 1))
+        self.reset()
+
+    def reset(self):
+        self.level = 0
+        self.avg_cost = None
+        self._over = 0
+        self._under = 0
+        self._last_transition = None
+
+    @property
+    def settings(self):
+        return LADDER[self.level]
+
+    def record(self, frame_cost, base_budget):
+        """
+        Feed the measured cost (seconds) of one loop iteration and the frame
+        budget at the configured fps (1 / fps).  Returns True when the level
+        changed, so the caller can re-read `settings`.
+        """
+        if self.avg_cost is None:
+            self.avg_cost = frame_cost
+        else:
+            self.avg_cost += self.smoothing * (frame_cost - self.avg_cost)
+
+        budget = base_budget * self.settings["fps_divisor"]
+
+        if self.avg_cost > budget and self.level < self.max_level:
+            self._over += 1
+            self._under = 0
+            if self._over >= self.downgrade_after:
+                self._step(+1, budget)
+                return True
+            return False
+
+        self._over = 0
+        if self.level > 0:
+            # Step up only if the cost would also fit the tighter budget above.
+            prev_budget = base_budget * LADDER[self.level - 1]["fps_divisor"]
+            if self.avg_cost < prev_budget * self.headroom:
+                self._under += 1
+                if self._under >= self.upgrade_after:
+                    self._step(-1, budget)
+                    return True
+            else:
+                self._under = 0
+        return False
+
+    def _step(self, direction, budget):
+        old = LADDER[self.level]["name"]
+        self.level += direction
+        self._over = 0
+        self._under = 0
+        self._last_transition = time.time()
+        verb = "Degrading" if direction > 0 else "Recovering"
+        print(f"[Watchdog] {verb}: {old} -> {self.settings['name']} "
+              f"(avg frame cost {self.avg_cost * 1000:.1f} ms, budget {budget * 1000:.1f} ms)")
@@ -0,0 +1,281 @@
+import atexit
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+
+# SQLite-backed drop-in for UserManager (same methods), selected with
+# DONOT_USER_STORE=sqlite (see UserManager.create_user_manager).  Users,
+# settings, calibration points, intentional actions and monitoring sessions
+# each get a table keyed / indexed by user, so login and a setting update are
+# single indexed statements however many users or sessions exist.  The
+# database runs in WAL mode; every query is a constant parameterized string,
+# so sqlite3's statement cache prepares each one once per connection.
+#
+# The logged-in user's settings, calibration and actions are cached in memory
+# and written through.  On first use an existing users.json is imported once.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    created REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS settings (
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (user_id, key)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS calibration (
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    point TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (user_id, point)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS actions (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS actions_user ON actions (user_id, id);
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    started REAL NOT NULL,
+    ended REAL,
+    stats TEXT NOT NULL DEFAULT '{}'
+);
+CREATE INDEX IF NOT EXISTS sessions_user ON sessions (user_id, started);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+DEFAULT_SETTINGS = {'alert_threshold': 0.6}
+
+
+class SQLiteUserManager:
+    def __init__(self, db_file='users.db', import_from='users.json'):
+        self.db_file = db_file
+        self._lock = threading.RLock()
+        self._batch_depth = 0
+        self._db = sqlite3.connect(db_file, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("PRAGMA foreign_keys=ON")
+        self._db.executescript(SCHEMA)
+        self.current_user = None
+        self._user_id = None
+        self._cache = None  # {'settings', 'calibration_data', 'intentional_actions'} of current_user
+        self._cache_user = None
+        if import_from:
+            self._migrate_json(import_from)
+        atexit.register(self.close)
+
+    # --- storage ----------------------------------------------------------
+
+    @contextmanager
+    def transaction(self):
+        # group several updates into one commit (nests)
+        with self._lock:
+            outer = self._batch_depth == 0
+            if outer:
+                self._db.execute("BEGIN")
+            self._batch_depth += 1
+            try:
+                yield self
+            except BaseException:
+                self._batch_depth -= 1
+                if outer:
+                    self._db.execute("ROLLBACK")
+                    self._cache = None  # reload what was actually committed
+                raise
+            self._batch_depth -= 1
+            if outer:
+                self._db.execute("COMMIT")
+
+    def flush(self):
+        # every statement is committed as it runs (or at the end of its
+        # transaction); kept for UserManager compatibility
+        pass
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def _migrate_json(self, json_file):
+        with self._lock:
+            if self._db.execute("SELECT 1 FROM meta WHERE key = 'migrated_json'").fetchone():
+                return
+            users = {}
+            if os.path.exists(json_file):
+                with open(json_file, 'r') as f:
+                    users = json.load(f).get('users', {})
+            t0 = time.perf_counter()
+            with self.transaction():
+                for name, data in users.items():
+                    user_id = self._insert_user(name)
+                    if user_id is None:
+                        continue
+                    self._db.executemany(
+                        "INSERT OR REPLACE INTO settings (user_id, key, value) VALUES (?, ?, ?)",
+                        [(user_id, k, json.dumps(v)) for k, v in data.get('settings', {}).items()])
+                    self._write_calibration(user_id, data.get('calibration_data', {}))
+                    self._db.executemany(
+                        "INSERT INTO actions (user_id, text) VALUES (?, ?)",
+                        [(user_id, a) for a in data.get('intentional_actions', [])])
+                self._db.execute("INSERT INTO meta (key, value) VALUES ('migrated_json', ?)",
+                                 (json.dumps({'file': json_file, 'users': len(users), 'at': time.time()}),))
+            if users:
+                print(f"[UserStore] Imported {len(users)} users from {json_file} "
+                      f"in {time.perf_counter() - t0:.2f}s")
+
+    def _insert_user(self, name):
+        cur = self._db.execute("INSERT OR IGNORE INTO users (name, created) VALUES (?, ?)", (name, time.time()))
+        return cur.lastrowid if cur.rowcount else None
+
+    def _write_calibration(self, user_id, calibration_data):
+        self._db.execute("DELETE FROM calibration WHERE user_id = ?", (user_id,))
+        self._db.executemany(
+            "INSERT INTO calibration (user_id, point, value) VALUES (?, ?, ?)",
+            [(user_id, k, json.dumps(v)) for k, v in (calibration_data or {}).items()])
+
+    def _load_current(self):
+        user_id = self._user_id
+        settings = {k: json.loads(v) for k, v in self._db.execute(
+            "SELECT key, value FROM settings WHERE user_id = ?", (user_id,))}
+        calibration = {k: json.loads(v) for k, v in self._db.execute(
+            "SELECT point, value FROM calibration WHERE user_id = ?", (user_id,))}
+        actions = [t for (t,) in self._db.execute(
+            "SELECT text FROM actions WHERE user_id = ? ORDER BY id", (user_id,))]
+        self._cache = {'calibration_data': calibration, 'settings': settings, 'intentional_actions': actions}
+
+    def _current(self):
+        # cache of the logged-in user; follows outside changes to current_user
+        if not self.current_user:
+            return None
+        if self._cache is None or self._cache_user != self.current_user:
+            row = self._db.execute("SELECT id FROM users WHERE name = ?", (self.current_user,)).fetchone()
+            if row is None:
+                return None
+            self._user_id = row[0]
+            self._load_current()
+            self._cache_user = self.current_user
+        return self._cache
+
+    # --- UserManager interface --------------------------------------------
+
+    def signup(self, username):
+        with self._lock, self.transaction():
+            user_id = self._insert_user(username)
+            if user_id is None:
+                return False
+            self._db.executemany(
+                "INSERT INTO settings (user_id, key, value) VALUES (?, ?, ?)",
+                [(user_id, k, json.dumps(v)) for k, v in DEFAULT_SETTINGS.items()])
+        self.current_user = username
+        return True
+
+    def login(self, username):
+        with self._lock:
+            if self._db.execute("SELECT 1 FROM users WHERE name = ?", (username,)).fetchone() is None:
+                return False
+            self.current_user = username
+            return True
+
+    def get_current_user_data(self):
+        with self._lock:
+            return self._current() or {}
+
+    def update_calibration_data(self, calibration_data):
+        with self._lock:
+            cache = self._current()
+            if cache is None:
+                return
+            with self.transaction():
+                self._write_calibration(self._user_id, calibration_data)
+            cache['calibration_data'] = dict(calibration_data or {})
+
+    def get_calibration_data(self):
+        with self._lock:
+            cache = self._current()
+            return cache['calibration_data'] if cache else {}
+
+    def update_setting(self, key, value):
+        with self._lock:
+            cache = self._current()
+            if cache is None:
+                return
+            self._db.execute("INSERT OR REPLACE INTO settings (user_id, key, value) VALUES (?, ?, ?)",
+                             (self._user_id, key, json.dumps(value)))
+            cache['settings'][key] = value
+
+    def update_settings(self, values):
+        # several settings, one commit
+        with self.transaction():
+            for key, value in values.items():
+                self.update_setting(key, value)
+
+    def get_setting(self, key):
+        with self._lock:
+            cache = self._current()
+            return cache['settings'].get(key) if cache else None
+
+    def add_intentional_action(self, action_text):
+        with self._lock:
+            cache = self._current()
+            if cache is None:
+                return
+            self._db.execute("INSERT INTO actions (user_id, text) VALUES (?, ?)", (self._user_id, action_text))
+            cache['intentional_actions'].append(action_text)
+
+    def remove_intentional_action(self, action_text):
+        # first occurrence; False if the user has no such action
+        with self._lock:
+            cache = self._current()
+            if cache is None or action_text not in cache['intentional_actions']:
+                return False
+            self._db.execute(
+                "DELETE FROM actions WHERE id = "
+                "(SELECT id FROM actions WHERE user_id = ? AND text = ? ORDER BY id LIMIT 1)",
+                (self._user_id, action_text))
+            cache['intentional_actions'].remove(action_text)
+            return True
+
+    def get_intentional_actions(self):
+        with self._lock:
+            cache = self._current()
+            return cache['intentional_actions'] if cache else []
+
+    # --- session history (SQLite store only) ------------------------------
+
+    def start_session(self, started=None):
+        # id of a new monitoring session for the current user, or None
+        with self._lock:
+            if self._current() is None:
+                return None
+            cur = self._db.execute("INSERT INTO sessions (user_id, started) VALUES (?, ?)",
+                                   (self._user_id, started or time.time()))
+            return cur.lastrowid
+
+    def end_session(self, session_id, stats=None, ended=None):
+        with self._lock:
+            self._db.execute("UPDATE sessions SET ended = ?, stats = ? WHERE id = ?",
+                             (ended or time.time(), json.dumps(stats or {}), session_id))
+
+    def get_sessions(self, limit=20):
+        # newest first: [{'id', 'started', 'ended', 'stats'}]
+        with self._lock:
+            if self._current() is None:
+                return []
+            rows = self._db.execute(
+                "SELECT id, started, ended, stats FROM sessions WHERE user_id = ? "
+                "ORDER BY started DESC LIMIT ?", (self._user_id, int(limit)))
+            return [{'id': i, 'started': s, 'ended': e, 'stats': json.loads(st)} for i, s, e, st in rows]
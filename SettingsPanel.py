@@ -1,23 +1,19 @@
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QFrame, QStackedLayout,
     QGraphicsBlurEffect, QTabWidget, QLineEdit, QDoubleSpinBox, QSpinBox, QSlider,
-    QComboBox, QSizePolicy
+    QComboBox, QSizePolicy, QCheckBox
 )
-from PyQt6.QtCore import Qt
-import asyncio
-import os
-from pydub import AudioSegment
-import edge_tts
-from FocusMonitor import play_alert_audio
+from PyQt6.QtCore import Qt, pyqtSignal
+from FocusMonitor import request_preview
+from AudioPlayback import alert_player
 
-import cv2
-import tempfile
-import threading
-import sounddevice as sd
+from CameraDiscovery import camera_discovery, camera_label
 
 
 
 class SettingsPanel(QWidget):
+    # camera list from the discovery thread, delivered on the GUI thread
+    cameras_changed = pyqtSignal(list)
 
     def __init__(self, user_manager, current_user, save_callback=None, monitor=None, parent=None):
         super().__init__(parent)
@@ -25,6 +21,7 @@ class SettingsPanel(QWidget):
         self.current_user = current_user
         self.save_callback = save_callback
         self.monitor = monitor
+        self.preview_future = None  # pending TTS preview (concurrent.futures.Future)
 
         # Acrylic + frameless (match MainWindow aesthetic)
         self.setAttribute(Qt.WidgetAttribute.WA_TranslucentBackground)
@@ -32,10 +29,6 @@ class SettingsPanel(QWidget):
         self.setWindowTitle("Settings")
         self.resize(520, 420)
 
-        self._cached_preview_voice = None
-        self._cached_preview_text = None
-        self._cached_preview_audio = None  # pydub.AudioSegment
-
         # internal to detect changed alert text/voice
         self._last_alert_text = None
         self._last_alert_voice = None
@@ -171,6 +164,7 @@ class SettingsPanel(QWidget):
             "background:rgba(255,255,255,0.9); color:black; border-radius:6px; padding:2px 6px;")
 
         try:
+            import sounddevice as sd  # loads PortAudio; only needed once settings open
             devices = sd.query_devices()
             output_devices = [d['name'] for d in devices if d['max_output_channels'] > 0]
             if output_devices:
@@ -309,19 +303,24 @@ class SettingsPanel(QWidget):
         self.combo_webcam.setStyleSheet(
             "background:rgba(255,255,255,0.9); color:black; border-radius:6px; padding:2px 6px;")
 
-        # Detect available webcams (indices 0-4)
-        available_cams = []
-        for idx in range(5):
-            cap = cv2.VideoCapture(idx, cv2.CAP_DSHOW)  # CAP_DSHOW is optional but faster on Windows
-            if cap.isOpened():
-                available_cams.append(f"Camera {idx}")
-                cap.release()
-        if not available_cams:
-            available_cams = ["Camera 0"]
-        self.combo_webcam.addItems(available_cams)
+        # Cameras come from the shared discovery cache; nothing is opened here.
+        # Until the first scan finishes the saved choice is shown on its own.
+        self._wanted_cam = None
+        self.btn_refresh_cams = QPushButton("Refresh")
+        self.btn_refresh_cams.setCursor(Qt.CursorShape.PointingHandCursor)
+        self.btn_refresh_cams.setStyleSheet(
+            "background:rgba(255,255,255,0.9); color:black; border-radius:6px; padding:2px 8px;")
+        self.btn_refresh_cams.clicked.connect(lambda: camera_discovery().refresh())
+
+        self._discovery = camera_discovery()
+        self.cameras_changed.connect(self._fill_webcams)
+        self._cam_listener = self.cameras_changed.emit
+        self._discovery.add_listener(self._cam_listener)
+        self._fill_webcams(self._discovery.cameras())
 
         webcam_row.addWidget(webcam_label)
         webcam_row.addWidget(self.combo_webcam, 1)
+        webcam_row.addWidget(self.btn_refresh_cams)
         lay.addLayout(webcam_row)
 
         # helper to add slider rows
@@ -350,6 +349,28 @@ class SettingsPanel(QWidget):
         lay.addStretch(1)
         return w
 
+    def _fill_webcams(self, cams):
+        # cams: CameraDiscovery list, or None while the first scan is running
+        current = self.combo_webcam.currentData()
+        wanted = current if current is not None else self._wanted_cam
+        self.combo_webcam.clear()
+        if cams is None:
+            idx = wanted if wanted is not None else 0
+            self.combo_webcam.addItem(f"Camera {idx} (searching...)", idx)
+            return
+        for cam in cams:
+            self.combo_webcam.addItem(camera_label(cam), cam["index"])
+        if wanted is not None and self.combo_webcam.findData(wanted) < 0:
+            self.combo_webcam.addItem(f"Camera {wanted} (not connected)", wanted)
+        if self.combo_webcam.count() == 0:
+            self.combo_webcam.addItem("Camera 0", 0)
+        pos = self.combo_webcam.findData(wanted) if wanted is not None else 0
+        self.combo_webcam.setCurrentIndex(max(pos, 0))
+
+    def closeEvent(self, event):
+        self._discovery.remove_listener(self._cam_listener)
+        super().closeEvent(event)
+
     # MONITOR TAB
     def _build_tab_monitor(self):
         w = QWidget()
@@ -428,6 +449,29 @@ class SettingsPanel(QWidget):
         row_ws.addWidget(self.spin_window)
         lay.addLayout(row_ws)
 
+        # Faces to track (group rooms: each face gets its own focus window) --
+        row_faces = QHBoxLayout()
+        lblf = QLabel("Faces to track:")
+        lblf.setStyleSheet("color:#333; background:transparent; font-size:14px;")
+        self.spin_faces = QSpinBox()
+        self.spin_faces.setRange(1, 6)
+        self.spin_faces.setValue(1)
+        self.spin_faces.setFixedWidth(100)
+        self.spin_faces.setMinimumHeight(32)
+        self.spin_faces.setStyleSheet("background:rgba(255,255,255,0.8); border:2px solid #FFB6C1; border-radius:8px; color:black;")
+        row_faces.addWidget(lblf)
+        row_faces.addStretch(1)
+        row_faces.addWidget(self.spin_faces)
+        lay.addLayout(row_faces)
+
+        # Worker processes ----------------------------------------------------
+        self.check_face_process = QCheckBox("Run face analysis in a separate process")
+        self.check_ia_process = QCheckBox("Run intentional actions in a separate process")
+        self.check_emotion = QCheckBox("Detect emotion (loads DeepFace / TensorFlow)")
+        for cb in (self.check_face_process, self.check_ia_process, self.check_emotion):
+            cb.setStyleSheet("color:#333; background:transparent; font-size:14px;")
+            lay.addWidget(cb)
+
         lay.addStretch(1)
         return w
 
@@ -515,8 +559,9 @@ class SettingsPanel(QWidget):
         load_video_val('cam_exposure',   self.slider_exposure)
         load_video_val('cam_saturation', self.slider_saturation)
         cam_index = self.user_manager.get_setting('webcam_index')
-        if cam_index is not None and int(cam_index) < self.combo_webcam.count():
-            self.combo_webcam.setCurrentIndex(int(cam_index))
+        self._wanted_cam = int(cam_index) if cam_index is not None else None
+        self.combo_webcam.clear()
+        self._fill_webcams(self._discovery.cameras())
 
         # Monitor
         if self.monitor is not None:
@@ -544,25 +589,38 @@ class SettingsPanel(QWidget):
             window_s = self.user_manager.get_setting('window_seconds') or 5
             self.spin_window.setValue(int(window_s))
 
+        self.check_face_process.setChecked(bool(self.user_manager.get_setting('face_process')))
+        self.check_ia_process.setChecked(bool(self.user_manager.get_setting('ia_process')))
+        self.check_emotion.setChecked(self.user_manager.get_setting('emotion_enabled') is not False)
+        self.spin_faces.setValue(int(self.user_manager.get_setting('max_faces') or 1))
+
     def _save_and_close(self):
-        # Audio ---------------------------------------------------------------
-        self.user_manager.update_setting('alert_text', self.edit_alert_text.text().strip())
-        self.user_manager.update_setting('alert_voice', self.combo_voice.currentText())
-        self.user_manager.update_setting('alert_volume', int(self.slider_volume.value()))
-        self.user_manager.update_setting('output_device', self.combo_output.currentText())
-
-        # Video ---------------------------------------------------------------
-        self.user_manager.update_setting('cam_brightness', int(self.slider_brightness.value()))
-        self.user_manager.update_setting('cam_contrast',   int(self.slider_contrast.value()))
-        self.user_manager.update_setting('cam_exposure',   int(self.slider_exposure.value()))
-        self.user_manager.update_setting('cam_saturation', int(self.slider_saturation.value()))
-        self.user_manager.update_setting('webcam_index', self.combo_webcam.currentIndex())
-
-        # Monitor -------------------------------------------------------------
-        self.user_manager.update_setting('alert_threshold', float(self.spin_thresh.value()))
-        self.user_manager.update_setting('cooldown_seconds', int(self.spin_cooldown.value()))
-        self.user_manager.update_setting('fps', int(self.spin_fps.value()))
-        self.user_manager.update_setting('window_seconds', int(self.spin_window.value()))
+        # one users.json write for the whole dialog
+        with self.user_manager.transaction():
+            # Audio -----------------------------------------------------------
+            self.user_manager.update_setting('alert_text', self.edit_alert_text.text().strip())
+            self.user_manager.update_setting('alert_voice', self.combo_voice.currentText())
+            self.user_manager.update_setting('alert_volume', int(self.slider_volume.value()))
+            self.user_manager.update_setting('output_device', self.combo_output.currentText())
+
+            # Video -----------------------------------------------------------
+            self.user_manager.update_setting('cam_brightness', int(self.slider_brightness.value()))
+            self.user_manager.update_setting('cam_contrast',   int(self.slider_contrast.value()))
+            self.user_manager.update_setting('cam_exposure',   int(self.slider_exposure.value()))
+            self.user_manager.update_setting('cam_saturation', int(self.slider_saturation.value()))
+            cam = self.combo_webcam.currentData()
+            if cam is not None:
+                self.user_manager.update_setting('webcam_index', int(cam))
+
+            # Monitor ---------------------------------------------------------
+            self.user_manager.update_setting('alert_threshold', float(self.spin_thresh.value()))
+            self.user_manager.update_setting('cooldown_seconds', int(self.spin_cooldown.value()))
+            self.user_manager.update_setting('fps', int(self.spin_fps.value()))
+            self.user_manager.update_setting('window_seconds', int(self.spin_window.value()))
+            self.user_manager.update_setting('face_process', self.check_face_process.isChecked())
+            self.user_manager.update_setting('ia_process', self.check_ia_process.isChecked())
+            self.user_manager.update_setting('emotion_enabled', self.check_emotion.isChecked())
+            self.user_manager.update_setting('max_faces', int(self.spin_faces.value()))
 
         # Apply to live monitor (if provided)
         if self.monitor is not None:
@@ -571,6 +629,8 @@ class SettingsPanel(QWidget):
                 cooldown_seconds=int(self.spin_cooldown.value()),
                 fps=int(self.spin_fps.value()),
                 window_seconds=int(self.spin_window.value()),
+                face_process=self.check_face_process.isChecked(),
+                ia_process=self.check_ia_process.isChecked(),
             )
 
         # Callback to parent so it can apply runtime changes
@@ -584,63 +644,26 @@ class SettingsPanel(QWidget):
         voice = self.combo_voice.currentText()
         vol_pct = self.slider_volume.value()  # 0-100
 
-        def worker():
-            nonlocal text, voice, vol_pct
-
-            regenerate = (
-                    self._cached_preview_audio is None
-                    or voice != self._cached_preview_voice
-                    or text != self._cached_preview_text
-            )
-
-            if regenerate:
-                async def _gen_async():
-                    # Edge TTS -> temp mp3
-                    fd_mp3, mp3_path = tempfile.mkstemp(suffix=".mp3")
-                    os.close(fd_mp3)
-                    tts = edge_tts.Communicate(text=text, voice=voice)
-                    await tts.save(mp3_path)
-
-                    # Load to AudioSegment (pydub), cleanup mp3
-                    seg = AudioSegment.from_file(mp3_path, format="mp3")
-                    os.remove(mp3_path)
-                    return seg
-
-                try:
-                    seg_new = asyncio.run(_gen_async())
-                except Exception as e:
-                    print(f"[Settings] TTS generation failed: {e}")
-                    return
-
-                # cache
-                self._cached_preview_audio = seg_new
-                self._cached_preview_voice = voice
-                self._cached_preview_text = text
-            else:
-                seg_new = self._cached_preview_audio
-
-            # Apply requested volume (non-destructive copy)
-            v = vol_pct / 100.0
-            if v <= 0.0:
-                gain_db = -60.0
-            elif v >= 1.0:
-                gain_db = 0.0
-            else:
-                gain_db = -60.0 * (1.0 - (v ** 0.5))
-            seg_out = seg_new.apply_gain(gain_db)
-
-            # Export to temp wav & play via existing helper
-            fd_wav, wav_path = tempfile.mkstemp(suffix=".wav")
-            os.close(fd_wav)
-            seg_out.export(wav_path, format="wav")
+        def done(future):
+            # runs on the TTS loop; a newer click cancels this one
+            if future.cancelled():
+                return
+            try:
+                pcm, rate = future.result()
+            except Exception as e:
+                print(f"[Settings] TTS generation failed: {e}")
+                return
 
             try:
-                play_alert_audio(filename=wav_path)  # pygame playback. :contentReference[oaicite:0]{index=0}
+                # volume is applied by the player; the preview is played from
+                # memory and leaves the preloaded alert alone
+                alert_player().play_samples(pcm, rate, volume_pct=vol_pct)
             except Exception as e:
                 print(f"[Settings] Playback error: {e}")
 
-        # run worker in thread so UI doesn't freeze
-        threading.Thread(target=worker, daemon=True).start()
+        # shared clip cache: previews and the saved alert reuse each other's audio
+        self.preview_future = request_preview(self.current_user, text=text, voice=voice)
+        self.preview_future.add_done_callback(done)
 
     # ------------------------------------------------------------------
     # Drag support (click anywhere; could refine to title bar hit-test)
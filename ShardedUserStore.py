@@ -0,0 +1,108 @@
+import hashlib
+import json
+import os
+import re
+
+from UserManager import UserManager
+
+
+# One file per user plus a small index, for machines with many profiles
+# (DONOT_USER_STORE=sharded).
+#   users/index.json       {"users": {name: shard file name}}
+#   users/<name>-<hash>.json   that user's calibration_data / settings / actions
+# Startup reads only the index, which also answers signup / login existence
+# checks; a user's shard is parsed on login and only the shards that changed
+# (plus the index after a signup) are written, with UserManager's debounced,
+# atomic write-behind.  An existing users.json is split up on first use.
+
+class ShardedUserManager(UserManager):
+    def __init__(self, folder='users', import_from='users.json', flush_delay=0.5):
+        self.folder = folder
+        self.import_from = import_from
+        self.index = {}
+        self._dirty_users = set()
+        self._index_dirty = False
+        super().__init__(user_file=os.path.join(folder, 'index.json'), flush_delay=flush_delay)
+
+    @staticmethod
+    def shard_name(username):
+        # readable and filesystem-safe; the hash keeps distinct names distinct
+        safe = re.sub(r'[^A-Za-z0-9_-]', '_', username)[:40]
+        return f"{safe}-{hashlib.sha1(username.encode('utf-8')).hexdigest()[:8]}.json"
+
+    def _shard_path(self, username):
+        return os.path.join(self.folder, self.index[username])
+
+    def load_users(self):
+        # only the index; self.users holds the shards loaded so far
+        os.makedirs(self.folder, exist_ok=True)
+        if os.path.exists(self.user_file):
+            with open(self.user_file, 'r') as f:
+                self.index = json.load(f).get('users', {})
+            return {}
+        if self.import_from and os.path.exists(self.import_from):
+            self._import_json()
+        return {}
+
+    def _import_json(self):
+        with open(self.import_from, 'r') as f:
+            users = json.load(f).get('users', {})
+        for name, data in users.items():
+            self.index[name] = self.shard_name(name)
+            self._write_atomic(self._shard_path(name), json.dumps(data, indent=4))
+        self._write_atomic(self.user_file, json.dumps({'users': self.index}, indent=4))
+        print(f"[UserStore] Split {len(users)} users from {self.import_from} into {self.folder}/")
+
+    def _load_shard(self, username):
+        with self._lock:
+            if username in self.users:
+                return
+            try:
+                with open(self._shard_path(username), 'r') as f:
+                    self.users[username] = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"[UserStore] Could not read profile of {username}: {e}")
+                self.users[username] = {'calibration_data': {}, 'settings': {}}
+
+    def signup(self, username):
+        with self._lock:
+            if username in self.index:
+                return False
+            self.index[username] = self.shard_name(username)
+            self._index_dirty = True
+            self.users[username] = {
+                'calibration_data': {},
+                'settings': {'alert_threshold': 0.6}
+            }
+            self.current_user = username
+        self.save_users()
+        return True
+
+    def login(self, username):
+        if username not in self.index:
+            return False
+        self._load_shard(username)
+        self.current_user = username
+        return True
+
+    def save_users(self):
+        with self._lock:
+            if self.current_user:
+                self._dirty_users.add(self.current_user)
+        super().save_users()
+
+    def _pending_writes(self):
+        writes = [(name, self._shard_path(name), json.dumps(self.users[name], indent=4))
+                  for name in self._dirty_users if name in self.users]
+        if self._index_dirty:
+            # after the shards, so the index never names a missing file
+            writes.append((None, self.user_file, json.dumps({'users': self.index}, indent=4)))
+        self._dirty_users = set()
+        self._index_dirty = False
+        return writes
+
+    def _write_failed(self, key):
+        if key is None:
+            self._index_dirty = True
+        else:
+            self._dirty_users.add(key)
@@ -0,0 +1,282 @@
+import concurrent.futures
+import queue
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from LazyBackends import backend
+
+
+# Models shared by several FocusMonitor streams in one process (MultiCamera).
+# Each model is loaded once and fed by a BatchQueue: callers on any stream
+# thread submit one item and wait, the queue's thread collects whatever
+# arrives within max_wait (up to max_batch items) and runs it as one batch.
+# With N cameras analysed at the same rate, most batches hold N items.
+
+
+class BatchQueue:
+
+    def __init__(self, name, batch_fn, max_batch=8, max_wait=0.01):
+        # batch_fn(list of items) -> list of results (an Exception instance
+        # fails just that item)
+        self.name = name
+        self.batch_fn = batch_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.batches = 0
+        self.items = 0
+        self._queue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name=f"{name}Batch", daemon=True)
+        self._thread.start()
+
+    def submit(self, item):
+        future = concurrent.futures.Future()
+        self._queue.put((item, future))
+        return future
+
+    def __call__(self, item, timeout=None):
+        return self.submit(item).result(timeout)
+
+    def close(self):
+        self._queue.put(None)
+
+    def mean_batch(self):
+        return self.items / self.batches if self.batches else 0.0
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            jobs = [job]
+            deadline = time.monotonic() + self.max_wait
+            while len(jobs) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    job = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if job is None:
+                    self._queue.put(None)  # finish this batch, then stop
+                    break
+                jobs.append(job)
+            jobs = [(item, future) for item, future in jobs if future.set_running_or_notify_cancel()]
+            if not jobs:
+                continue
+
+            try:
+                results = self.batch_fn([item for item, _ in jobs])
+            except Exception as e:
+                results = [e] * len(jobs)
+            for (_, future), result in zip(jobs, results):
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+            self.batches += 1
+            self.items += len(jobs)
+            if self.batches % 500 == 0:
+                print(f"[{self.name}] {self.batches} batches, {self.mean_batch():.2f} items per batch")
+
+
+def _dominant_emotion(result):
+    # DeepFace.analyze result for one image: a list of per-face dicts (or a dict)
+    if isinstance(result, list):
+        result = result[0] if result else None
+    return result["dominant_emotion"] if result else "Unknown"
+
+
+# DeepFace's emotion classifier: 48x48 grayscale in [0, 1] -> one score per label
+EMOTION_LABELS = ["angry", "disgust", "fear", "happy", "sad", "surprise", "neutral"]
+EMOTION_INPUT = 48
+
+_emotion_net = None
+_emotion_net_lock = threading.Lock()
+
+
+def emotion_net():
+    # DeepFace's Keras emotion model, built once; None if this DeepFace
+    # version does not expose it (then analyze() is used per crop)
+    global _emotion_net
+    with _emotion_net_lock:
+        if _emotion_net is None:
+            DeepFace = backend("deepface")
+            try:
+                try:
+                    built = DeepFace.build_model(model_name="Emotion", task="facial_attribute")
+                except TypeError:
+                    built = DeepFace.build_model("Emotion")  # before 0.0.90: no task, returns the model
+                _emotion_net = getattr(built, "model", built)
+            except Exception as e:
+                print(f"[Emotion] No batched emotion model ({type(e).__name__}: {e}); analysing one by one")
+                _emotion_net = False
+        return _emotion_net or None
+
+
+def emotion_input(crop):
+    # what DeepFace feeds the model for a face: padded to a square (centred),
+    # grayscale, 48x48, scaled to [0, 1]
+    gray = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY)
+    h, w = gray.shape
+    side = max(h, w)
+    top, left = (side - h) // 2, (side - w) // 2
+    gray = cv2.copyMakeBorder(gray, top, side - h - top, left, side - w - left, cv2.BORDER_CONSTANT, value=0)
+    gray = cv2.resize(gray, (EMOTION_INPUT, EMOTION_INPUT))
+    return gray.astype(np.float32) / 255.0
+
+
+def deepface_emotions(crops):
+    # Dominant emotion for each face crop (an Exception instance where that
+    # crop failed).  All crops go through the emotion model in one forward
+    # pass; DeepFace.analyze per crop is the fallback.
+    results = [None] * len(crops)
+    batch, idx = [], []
+    for i, crop in enumerate(crops):
+        if crop is None or crop.size == 0:
+            results[i] = ValueError("empty face crop")
+            continue
+        try:
+            batch.append(emotion_input(crop))
+            idx.append(i)
+        except Exception as e:
+            results[i] = e
+    if not batch:
+        return results
+
+    net = emotion_net()
+    if net is not None:
+        try:
+            # calling the model (not predict()) as DeepFace does: no per-call
+            # dataset setup, no memory growth in a loop
+            scores = np.asarray(net(np.stack(batch)[..., np.newaxis], training=False))
+            for i, row in zip(idx, scores):
+                results[i] = EMOTION_LABELS[int(np.argmax(row))]
+            return results
+        except Exception as e:
+            print(f"[Emotion] Batched emotion failed ({type(e).__name__}: {e}); analysing one by one")
+
+    DeepFace = backend("deepface")
+    for i in idx:
+        try:
+            results[i] = _dominant_emotion(DeepFace.analyze(
+                crops[i], actions=['emotion'], enforce_detection=False, detector_backend="opencv"))
+        except Exception as e:
+            results[i] = e
+    return results
+
+
+class SharedEmotionModel:
+    # Drop-in for FaceAnalyzer's emotion calls across streams
+    # (FaceAnalyzer(emotion_model=...)); crops from every stream and face
+    # are collected on one thread and classified in one forward pass of
+    # DeepFace's emotion model (deepface_emotions).
+
+    def __init__(self, max_batch=8, max_wait=0.015):
+        self.queue = BatchQueue("Emotion", deepface_emotions, max_batch=max_batch, max_wait=max_wait)
+
+    def analyze(self, face_region):
+        return self.queue(face_region)
+
+    def analyze_many(self, face_regions):
+        # all faces of one frame; a failed crop reads as "Unknown"
+        futures = [self.queue.submit(region) for region in face_regions]
+        return [f.result() if f.exception() is None else "Unknown" for f in futures]
+
+    def close(self):
+        self.queue.close()
+
+
+class SharedIAModel:
+    # One CLIP model for every stream.  client() returns an object with the
+    # IntentionalActionRecognizer interface FocusMonitor uses; detections
+    # from all streams are batched into one forward pass.  CLIP is loaded on
+    # the batch thread by the first detection.
+
+    def __init__(self, max_batch=4, max_wait=0.05):
+        self.model = None
+        self.defined_actions = []
+        self._load_lock = threading.Lock()
+        self.queue = BatchQueue("IA", self._detect_batch, max_batch=max_batch, max_wait=max_wait)
+
+    def load(self):
+        # normally done by the first detection; the inference server loads up front
+        with self._load_lock:
+            if self.model is None:
+                from IAModel import IntentionalActionRecognizer
+                self.model = IntentionalActionRecognizer()
+                self.model.set_defined_actions(self.defined_actions)
+        return self.model
+
+    def set_defined_actions(self, actions):
+        self.defined_actions = list(actions or [])
+        if self.model is not None:
+            self.model.set_defined_actions(self.defined_actions)
+
+    def client(self):
+        return SharedIAClient(self)
+
+    def close(self):
+        self.queue.close()
+
+    def _detect_batch(self, jobs):
+        # jobs: (frame, threshold, neutral_action, actions or None for
+        # defined_actions); one pass per distinct setting
+        model = self.load()
+        results = [None] * len(jobs)
+        groups = {}
+        for i, (_, threshold, neutral, actions) in enumerate(jobs):
+            actions = tuple(self.defined_actions if actions is None else actions)
+            groups.setdefault((threshold, neutral, actions), []).append(i)
+        for (threshold, neutral, actions), idx in groups.items():
+            out = model.detect_batch([jobs[i][0] for i in idx], threshold, neutral, actions=actions)
+            for i, r in zip(idx, out):
+                results[i] = r
+        return results
+
+
+class SharedIAClient:
+
+    def __init__(self, shared):
+        self._shared = shared
+        self._pending = None
+        self._last_result = (False, None, 0.0)
+        self._lock = threading.Lock()
+
+    @property
+    def defined_actions(self):
+        return self._shared.defined_actions
+
+    def set_defined_actions(self, actions):
+        self._shared.set_defined_actions(actions)
+
+    def trigger_async_detection(self, frame, threshold=0.4, neutral_action="sitting and working"):
+        # same contract as IntentionalActionRecognizer: ignored while one is pending
+        with self._lock:
+            if self._pending is not None and not self._pending.done():
+                return
+            self._pending = pending = self._submit(frame, threshold, neutral_action)
+        pending.add_done_callback(self._store)
+
+    def _submit(self, frame, threshold, neutral_action):
+        return self._shared.queue.submit((frame, threshold, neutral_action, None))
+
+    def _store(self, future):
+        if future.cancelled():
+            return
+        if future.exception() is not None:
+            print(f"[IA] Detection failed: {future.exception()}")
+            return
+        with self._lock:
+            self._last_result = future.result()
+
+    def get_last_result(self):
+        with self._lock:
+            return self._last_result
+
+    def close(self):
+        # the model belongs to SharedIAModel
+        pass
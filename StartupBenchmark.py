@@ -0,0 +1,101 @@
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+
+# Guards the startup path: the login window must not pull in the ML / TTS
+# stacks.  Runs a fresh interpreter with `python -X importtime`, fails if any
+# heavy module is imported or the import / first-show time exceeds budget.
+#   python StartupBenchmark.py [--budget 0.8] [--window-budget 1.0] [--top 15]
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Only allowed after login (background warm-up) or on first use.
+HEAVY_MODULES = (
+    "tensorflow", "keras", "deepface", "torch", "transformers", "mediapipe",
+    "dlib", "edge_tts", "pydub", "miniaudio", "sounddevice", "pygame",
+)
+
+_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+_WINDOW_SNIPPET = """
+import sys, time
+t0 = time.perf_counter()
+from PyQt6.QtWidgets import QApplication
+app = QApplication(sys.argv)
+from GUI import MainWindow
+w = MainWindow()
+w.show()
+app.processEvents()
+print(time.perf_counter() - t0)
+"""
+
+
+def import_profile(module="App"):
+    # [(self_us, cumulative_us, depth, name)] for `import <module>` in a fresh interpreter
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, cwd=HERE,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+    rows = []
+    for line in proc.stderr.splitlines():
+        m = _LINE.match(line)
+        if m:
+            self_us, cum_us, indent, name = m.groups()
+            rows.append((int(self_us), int(cum_us), len(indent) // 2, name))
+    return rows
+
+
+def time_first_window():
+    # seconds from interpreter start to a shown MainWindow (offscreen)
+    env = dict(os.environ, QT_QPA_PLATFORM=os.environ.get("QT_QPA_PLATFORM", "offscreen"))
+    proc = subprocess.run([sys.executable, "-c", _WINDOW_SNIPPET],
+                          capture_output=True, text=True, cwd=HERE, env=env)
+    if proc.returncode != 0:
+        raise RuntimeError(f"MainWindow startup failed:\n{proc.stderr[-2000:]}")
+    return float(proc.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Startup import-time guard for DoNot.")
+    parser.add_argument("--module", default="App")
+    parser.add_argument("--budget", type=float, default=0.8, help="max seconds for `import <module>`")
+    parser.add_argument("--window-budget", type=float, default=1.0,
+                        help="max seconds until the login window is shown (0 = skip)")
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args(argv)
+
+    rows = import_profile(args.module)
+    total_s = sum(cum for _, cum, depth, _ in rows if depth == 0) / 1e6
+    heavy = sorted({name for *_, name in rows if name.split(".")[0] in HEAVY_MODULES})
+
+    print(f"import {args.module}: {total_s:.3f}s (budget {args.budget:.3f}s)")
+    print(f"top {args.top} by cumulative time:")
+    for self_us, cum_us, depth, name in sorted(rows, key=lambda r: r[1], reverse=True)[:args.top]:
+        print(f"  {cum_us / 1000:8.1f} ms  {'  ' * depth}{name}")
+
+    failed = False
+    if heavy:
+        print(f"FAIL: heavy modules imported at startup: {', '.join(heavy)}")
+        failed = True
+    if total_s > args.budget:
+        print("FAIL: import time over budget")
+        failed = True
+
+    if args.window_budget > 0:
+        window_s = time_first_window()
+        print(f"login window shown after {window_s:.3f}s (budget {args.window_budget:.3f}s)")
+        if window_s > args.window_budget:
+            print("FAIL: login window over budget")
+            failed = True
+
+    print("FAIL" if failed else "OK")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
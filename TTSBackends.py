@@ -0,0 +1,155 @@
+import asyncio
+import importlib.util
+import io
+import shutil
+import subprocess
+import threading
+import time
+
+import numpy as np
+
+from AudioPlayback import decode_mp3, load_wav
+
+
+# Text-to-speech engines for the alert clip, tried in order by
+# FocusMonitor.synthesize_alert_clip:
+#   edge-tts  Microsoft neural voices (network)
+#   espeak    espeak-ng / espeak on PATH (offline)
+#   chime     a generated two-tone chime, always available, ignores the text
+# synthesize() is a coroutine run on the TTSWorker loop; it returns (mono
+# float32 PCM, sample rate) decoded in memory - no temp files or ffmpeg - and
+# is called with a timeout.  Cancelling it aborts the request / process.  A backend that
+# fails is skipped for `backoff_seconds`, so being offline costs one timeout,
+# not one per alert / preview / settings change.
+
+
+class TTSBackend:
+    name = "base"
+    backoff_seconds = 60.0
+
+    def __init__(self):
+        self._failed_at = None
+
+    def version(self):
+        return "1"
+
+    def installed(self):
+        return True
+
+    def available(self):
+        # installed and not backing off after a recent failure
+        if self._failed_at is not None and time.monotonic() - self._failed_at < self.backoff_seconds:
+            return False
+        return self.installed()
+
+    async def synthesize(self, text, voice, timeout):
+        raise NotImplementedError
+
+    def mark_failed(self):
+        self._failed_at = time.monotonic()
+
+    def mark_ok(self):
+        self._failed_at = None
+
+
+class EdgeTTSBackend(TTSBackend):
+    name = "edge-tts"
+
+    def version(self):
+        # read from package metadata: importing edge_tts just for this is slow
+        try:
+            from importlib.metadata import version
+            return version("edge-tts")
+        except Exception:
+            return "unknown"
+
+    def installed(self):
+        return importlib.util.find_spec("edge_tts") is not None
+
+    async def synthesize(self, text, voice, timeout):
+        # the mp3 is streamed into memory and decoded in-process
+        mp3 = await asyncio.wait_for(self.stream_mp3(text, voice), timeout)
+        return await asyncio.get_running_loop().run_in_executor(None, decode_mp3, mp3)
+
+    @staticmethod
+    async def stream_mp3(text, voice):
+        # imported here: edge-tts (aiohttp) is slow to import and only needed
+        # when a clip is actually synthesized
+        import edge_tts
+        chunks = []
+        async for chunk in edge_tts.Communicate(text=text, voice=voice).stream():
+            if chunk["type"] == "audio":
+                chunks.append(chunk["data"])
+        if not chunks:
+            raise RuntimeError("edge-tts returned no audio")
+        return b"".join(chunks)
+
+
+class EspeakBackend(TTSBackend):
+    name = "espeak"
+
+    def __init__(self):
+        super().__init__()
+        self._exe = shutil.which("espeak-ng") or shutil.which("espeak")
+        self._version = None
+
+    def version(self):
+        if self._version is None:
+            try:
+                out = subprocess.run([self._exe, "--version"], capture_output=True, text=True, timeout=5)
+                self._version = out.stdout.strip() or "unknown"
+            except Exception:
+                self._version = "unknown"
+        return self._version
+
+    def installed(self):
+        return self._exe is not None
+
+    @staticmethod
+    def espeak_voice(voice):
+        # "en-US-JennyNeural" -> "en-us+f3"; male edge voices keep the default variant
+        parts = (voice or "en-US").split("-")
+        lang = "-".join(parts[:2]).lower() if len(parts) >= 2 else "en"
+        female = any(n in voice for n in ("Jenny", "Aria", "Sonia", "Natasha", "Clara", "Libby", "Emma"))
+        return lang + ("+f3" if female else "")
+
+    async def synthesize(self, text, voice, timeout):
+        proc = await asyncio.create_subprocess_exec(
+            self._exe, "-v", self.espeak_voice(voice), "-s", "165", "--stdout", text,
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
+        try:
+            out, err = await asyncio.wait_for(proc.communicate(), timeout)
+        except BaseException:
+            # timed out or superseded: don't leave espeak running
+            if proc.returncode is None:
+                proc.kill()
+            raise
+        if proc.returncode != 0:
+            raise subprocess.CalledProcessError(proc.returncode, self._exe, out, err)
+        return load_wav(io.BytesIO(out))
+
+
+class ChimeBackend(TTSBackend):
+    # last resort so an alert always makes a sound, even offline with no espeak
+    name = "chime"
+
+    async def synthesize(self, text, voice, timeout):
+        rate = 24000
+        t = np.arange(int(rate * 0.25)) / rate
+        fade = np.minimum(1.0, np.minimum(t, t[::-1]) / 0.02)
+        tone = lambda f: 0.5 * np.sin(2 * np.pi * f * t) * fade
+        pcm = np.concatenate([tone(880.0), np.zeros(int(rate * 0.05)), tone(660.0)])
+        return pcm.astype(np.float32), rate
+
+
+_backends = None
+_backends_lock = threading.Lock()
+
+
+def tts_backends():
+    # process-wide backends, in order of preference
+    global _backends
+    with _backends_lock:
+        if _backends is None:
+            _backends = [EdgeTTSBackend(), EspeakBackend(), ChimeBackend()]
+        return _backends
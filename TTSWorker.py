@@ -0,0 +1,101 @@
+import asyncio
+import concurrent.futures
+import threading
+
+
+# One background asyncio loop that owns every text-to-speech job (alert
+# clips, previews).  Jobs are coroutines submitted from any thread; submit()
+# returns a concurrent.futures.Future the caller can wait on or attach a
+# done-callback to.
+#
+# Jobs carry a key, normally (user, purpose).  A new job replaces the one
+# with the same key: if that one is still queued it never starts, if it is
+# already running it is cancelled (edge-tts requests and espeak processes
+# are aborted), and its future ends cancelled.  Clicking Preview five times
+# therefore synthesizes once, for the last text.  At most `concurrency` jobs
+# run at a time; key None never coalesces.
+
+
+class TTSWorker:
+
+    def __init__(self, concurrency=2):
+        self.concurrency = concurrency
+        self._jobs = {}  # key -> (future, task); only touched on the loop thread
+        self._ready = threading.Event()
+        self._loop = None
+        self._slots = None
+        self._thread = threading.Thread(target=self._run_loop, name="TTSWorker", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    def _run_loop(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._slots = asyncio.Semaphore(self.concurrency)
+        self._ready.set()
+        self._loop.run_forever()
+
+    @property
+    def loop(self):
+        return self._loop
+
+    def submit(self, key, coro_fn, *args, **kwargs):
+        # schedule coro_fn(*args, **kwargs) on the TTS loop, replacing any
+        # job with the same key; returns a concurrent.futures.Future
+        future = concurrent.futures.Future()
+        self._loop.call_soon_threadsafe(self._schedule, key, future, coro_fn, args, kwargs)
+        return future
+
+    def cancel(self, key):
+        # drop the queued / running job for key, if any
+        self._loop.call_soon_threadsafe(self._cancel, key)
+
+    def _schedule(self, key, future, coro_fn, args, kwargs):
+        if future.cancelled():
+            return
+        if key is not None:
+            self._cancel(key)
+        task = self._loop.create_task(self._run(key, future, coro_fn, args, kwargs))
+        if key is not None:
+            self._jobs[key] = (future, task)
+        # a caller cancelling the future cancels the work too
+        future.add_done_callback(
+            lambda f: f.cancelled() and self._loop.call_soon_threadsafe(task.cancel))
+
+    def _cancel(self, key):
+        job = self._jobs.pop(key, None)
+        if job is not None:
+            future, task = job
+            task.cancel()
+            future.cancel()
+            print(f"[TTS] Superseded {key[1] if isinstance(key, tuple) else key} request")
+
+    async def _run(self, key, future, coro_fn, args, kwargs):
+        try:
+            async with self._slots:
+                result = await coro_fn(*args, **kwargs)
+        except asyncio.CancelledError:
+            future.cancel()
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+        else:
+            if not future.done():
+                future.set_result(result)
+        finally:
+            job = self._jobs.get(key)
+            if job is not None and job[0] is future:
+                del self._jobs[key]
+
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def tts_worker():
+    # process-wide TTS loop, started on first use
+    global _worker
+    with _worker_lock:
+        if _worker is None:
+            _worker = TTSWorker()
+        return _worker
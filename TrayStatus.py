@@ -0,0 +1,143 @@
+from PyQt6.QtWidgets import QSystemTrayIcon, QMenu, QWidget, QLabel, QHBoxLayout
+from PyQt6.QtGui import QIcon, QPixmap, QPainter, QColor, QAction
+from PyQt6.QtCore import Qt, QTimer
+
+
+STATE_COLOURS = {
+    "Focused": QColor(102, 187, 106),
+    "Distracted": QColor(239, 83, 80),
+    None: QColor(158, 158, 158),
+}
+
+
+def _dot_icon(colour, size=32):
+    pm = QPixmap(size, size)
+    pm.fill(Qt.GlobalColor.transparent)
+    p = QPainter(pm)
+    p.setRenderHint(QPainter.RenderHint.Antialiasing)
+    p.setBrush(colour)
+    p.setPen(Qt.PenStyle.NoPen)
+    p.drawEllipse(2, 2, size - 4, size - 4)
+    p.end()
+    return QIcon(pm)
+
+
+def describe_status(status):
+    if not status["monitoring"]:
+        return "DoNot: not monitoring"
+    state = status["focus_state"] or "Starting..."
+    return (f"DoNot: {state} - distracted {int(status['distraction_ratio'] * 100)}% "
+            f"of window ({status['quality']})")
+
+
+class CompactStatusWidget(QWidget):
+    # Small always-on-top pill used when there is no system tray.  Same
+    # controls as the tray icon: double-click shows the window, right-click
+    # opens the Show / Pause / Quit menu.
+
+    def __init__(self, parent=None, menu=None, on_double_click=None):
+        super().__init__(parent)
+        self.menu = menu
+        self.on_double_click = on_double_click
+        self.setWindowFlags(Qt.WindowType.FramelessWindowHint | Qt.WindowType.Tool
+                            | Qt.WindowType.WindowStaysOnTopHint)
+        self.setAttribute(Qt.WidgetAttribute.WA_TranslucentBackground)
+        lay = QHBoxLayout(self)
+        lay.setContentsMargins(0, 0, 0, 0)
+        self.label = QLabel("DoNot")
+        self.label.setStyleSheet("""
+            background-color: rgba(30, 30, 30, 0.85);
+            color: white;
+            border-radius: 10px;
+            padding: 6px 12px;
+            font-size: 12px;
+        """)
+        lay.addWidget(self.label)
+
+    def set_status(self, status):
+        colour = STATE_COLOURS.get(status["focus_state"], STATE_COLOURS[None])
+        self.label.setText(f"<span style='color:{colour.name()}'>&#9679;</span> {describe_status(status)}")
+        self.adjustSize()
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.MouseButton.LeftButton:
+            self._drag_pos = event.globalPosition().toPoint()
+
+    def mouseMoveEvent(self, event):
+        if event.buttons() == Qt.MouseButton.LeftButton and hasattr(self, "_drag_pos"):
+            self.move(self.pos() + event.globalPosition().toPoint() - self._drag_pos)
+            self._drag_pos = event.globalPosition().toPoint()
+
+    def mouseDoubleClickEvent(self, event):
+        if event.button() == Qt.MouseButton.LeftButton and self.on_double_click:
+            self.on_double_click()
+
+    def contextMenuEvent(self, event):
+        if self.menu is not None and not self.menu.isEmpty():
+            self.menu.exec(event.globalPos())
+
+
+class StatusTray:
+    # Shows FocusMonitor.status() through a system-tray icon, or a compact
+    # status widget when no tray is available.  Polls once a second; no frames
+    # are involved.
+
+    def __init__(self, monitor, on_show=None, on_toggle_pause=None, on_quit=None, interval_ms=1000):
+        self.monitor = monitor
+        self._icons = {k: _dot_icon(c) for k, c in STATE_COLOURS.items()}
+        self.tray = None
+        self.widget = None
+
+        # one menu for the tray icon or the fallback widget
+        menu = QMenu()
+        if on_show:
+            act = QAction("Show window", menu)
+            act.triggered.connect(on_show)
+            menu.addAction(act)
+        if on_toggle_pause:
+            act = QAction("Pause / resume monitoring", menu)
+            act.triggered.connect(on_toggle_pause)
+            menu.addAction(act)
+        if on_quit:
+            menu.addSeparator()
+            act = QAction("Quit", menu)
+            act.triggered.connect(on_quit)
+            menu.addAction(act)
+        self._menu = menu
+
+        if QSystemTrayIcon.isSystemTrayAvailable():
+            self.tray = QSystemTrayIcon(self._icons[None])
+            self.tray.setContextMenu(menu)
+            if on_show:
+                self.tray.activated.connect(
+                    lambda reason: on_show() if reason == QSystemTrayIcon.ActivationReason.DoubleClick else None)
+        else:
+            self.widget = CompactStatusWidget(menu=menu, on_double_click=on_show)
+            self.widget.setToolTip("Double-click to show the window, right-click for more")
+
+        self.timer = QTimer()
+        self.timer.setInterval(interval_ms)
+        self.timer.timeout.connect(self.refresh)
+
+    def show(self):
+        self.refresh()
+        if self.tray:
+            self.tray.show()
+        else:
+            self.widget.show()
+        self.timer.start()
+
+    def hide(self):
+        self.timer.stop()
+        if self.tray:
+            self.tray.hide()
+        else:
+            self.widget.hide()
+
+    def refresh(self):
+        status = self.monitor.status()
+        if self.tray:
+            self.tray.setIcon(self._icons.get(status["focus_state"], self._icons[None]))
+            self.tray.setToolTip(describe_status(status))
+        else:
+            self.widget.set_status(status)
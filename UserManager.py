@@ -1,11 +1,31 @@
+import atexit
 import json
 import os
+import stat
+import tempfile
+import threading
+from contextlib import contextmanager
+
+
+# users.json is written behind: changes mark the data dirty and a timer writes
+# it once, flush_delay seconds after the last change, so a burst of updates
+# (one Settings save) costs one write.  Writes go to a temp file in the same
+# folder that is fsynced and renamed over users.json, so a crash leaves either
+# the old or the new file, never a truncated one.  transaction() holds the
+# write back until the block ends; flush() writes now and runs at exit.
 
 class UserManager:
-    def __init__(self, user_file='users.json'):
+    def __init__(self, user_file='users.json', flush_delay=0.5):
         self.user_file = user_file
+        self.flush_delay = flush_delay
+        self._lock = threading.RLock()
+        self._write_lock = threading.Lock()
+        self._dirty = False
+        self._timer = None
+        self._batch_depth = 0
         self.users = self.load_users()
         self.current_user = None
+        atexit.register(self.flush)
 
     def load_users(self):
         if os.path.exists(self.user_file):
@@ -14,16 +34,88 @@ class UserManager:
         return {}
 
     def save_users(self):
-        with open(self.user_file, 'w') as f:
-            json.dump({'users': self.users}, f, indent=4)
+        # mark dirty; the actual write happens after flush_delay (or at the end
+        # of the enclosing transaction)
+        with self._lock:
+            self._dirty = True
+            if self._batch_depth == 0:
+                self._schedule_flush()
+
+    def _schedule_flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = threading.Timer(self.flush_delay, self.flush)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def flush(self):
+        # write pending changes now (atomic temp file + rename)
+        with self._write_lock:
+            with self._lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                if not self._dirty:
+                    return
+                writes = self._pending_writes()
+                self._dirty = False
+            for key, path, data in writes:
+                try:
+                    self._write_atomic(path, data)
+                except OSError as e:
+                    print(f"[UserManager] Could not save {path}: {e}")
+                    with self._lock:
+                        self._dirty = True
+                        self._write_failed(key)
+
+    def _pending_writes(self):
+        # [(key, path, contents)] to write; called with the lock held
+        return [(None, self.user_file, json.dumps({'users': self.users}, indent=4))]
+
+    def _write_failed(self, key):
+        pass
+
+    def _write_atomic(self, path, data):
+        folder = os.path.dirname(os.path.abspath(path))
+        fd, tmp = tempfile.mkstemp(prefix="." + os.path.basename(path) + ".", suffix=".tmp", dir=folder)
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            # mkstemp creates 0600; keep the mode the file had (or would get)
+            os.chmod(tmp, _target_mode(path))
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            raise
+
+    @contextmanager
+    def transaction(self):
+        # group several updates into one write:
+        #     with user_manager.transaction():
+        #         user_manager.update_setting(...)
+        with self._lock:
+            self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._batch_depth -= 1
+                if self._batch_depth == 0 and self._dirty:
+                    self._schedule_flush()
 
     def signup(self, username):
-        if username in self.users:
-            return False
-        self.users[username] = {
-            'calibration_data': {},
-            'settings': {'alert_threshold': 0.6}
-        }
+        with self._lock:
+            if username in self.users:
+                return False
+            self.users[username] = {
+                'calibration_data': {},
+                'settings': {'alert_threshold': 0.6}
+            }
         self.current_user = username
         self.save_users()
         return True
@@ -39,7 +131,8 @@ class UserManager:
 
     def update_calibration_data(self, calibration_data):
         if self.current_user:
-            self.users[self.current_user]['calibration_data'] = calibration_data
+            with self._lock:
+                self.users[self.current_user]['calibration_data'] = calibration_data
             self.save_users()
 
     def get_calibration_data(self):
@@ -47,19 +140,62 @@ class UserManager:
 
     def update_setting(self, key, value):
         if self.current_user:
-            self.users[self.current_user]['settings'][key] = value
+            with self._lock:
+                self.users[self.current_user]['settings'][key] = value
             self.save_users()
 
+    def update_settings(self, values):
+        # several settings, one write
+        with self.transaction():
+            for key, value in values.items():
+                self.update_setting(key, value)
+
     def get_setting(self, key):
         return self.users.get(self.current_user, {}).get('settings', {}).get(key) if self.current_user else None
 
     def add_intentional_action(self, action_text):
         if self.current_user:
-            self.users[self.current_user].setdefault("intentional_actions", []).append(action_text)
+            with self._lock:
+                self.users[self.current_user].setdefault("intentional_actions", []).append(action_text)
             self.save_users()
 
+    def remove_intentional_action(self, action_text):
+        # first occurrence; False if the user has no such action
+        if not self.current_user:
+            return False
+        with self._lock:
+            actions = self.users[self.current_user].get("intentional_actions", [])
+            if action_text not in actions:
+                return False
+            actions.remove(action_text)
+        self.save_users()
+        return True
+
     def get_intentional_actions(self):
         if self.current_user:
             return self.users[self.current_user].get("intentional_actions", [])
         return []
 
+
+def _target_mode(path):
+    # permission bits of the existing file, else what open() would create
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+
+def create_user_manager(store=None):
+    # users.json (default), one file per user (store="sharded") or the SQLite
+    # store (store="sqlite"); DONOT_USER_STORE in the environment picks one
+    # when store is not given
+    store = (store or os.environ.get("DONOT_USER_STORE") or "json").lower()
+    if store == "sqlite":
+        from SQLiteUserStore import SQLiteUserManager
+        return SQLiteUserManager()
+    if store == "sharded":
+        from ShardedUserStore import ShardedUserManager
+        return ShardedUserManager()
+    return UserManager()
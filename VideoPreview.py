@@ -0,0 +1,161 @@
+import threading
+
+import cv2
+import numpy as np
+from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QImage, QPainter, QPen, QColor, QFont
+from PyQt6.QtWidgets import QLabel
+
+
+class LatestFrameMailbox:
+    # Single-slot hand-off between the monitoring thread and the GUI.  The
+    # producer overwrites whatever is waiting, the GUI takes the newest frame
+    # when it is ready to paint, so a stalled GUI thread drops stale frames
+    # instead of queueing them, and at most one frame is ever held.
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._frame = None
+        self.dropped = 0
+
+    def put(self, frame):
+        # returns the frame it displaced (never shown), or None
+        with self._lock:
+            old, self._frame = self._frame, frame
+            if old is not None:
+                self.dropped += 1
+        return old
+
+    def take(self):
+        # newest frame since the last take(), or None
+        with self._lock:
+            frame, self._frame = self._frame, None
+        return frame
+
+    def clear(self):
+        with self._lock:
+            frame, self._frame = self._frame, None
+        return frame
+
+
+class PreviewRenderer:
+    # Runs on the producer (monitoring) thread: fits the BGR frame to the
+    # preview widget with cv2.resize into one of a few reused buffers and wraps
+    # it as a Format_BGR888 QImage, so the GUI thread only has to paint it.
+    #
+    # Three buffers cover the worst case: one on screen, one waiting in the
+    # mailbox, one being written.  The GUI hands a buffer back with release().
+
+    N_BUFFERS = 3
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._target = (0, 0)
+        self._bufs = [None] * self.N_BUFFERS
+        self._busy = set()
+
+    def set_target_size(self, width, height):
+        # called from the GUI thread whenever the preview widget resizes
+        self._target = (max(0, int(width)), max(0, int(height)))
+
+    def render(self, frame, faces=None):
+        # (index, QImage, faces) ready to paint, or None if there is nothing to draw into
+        tw, th = self._target
+        if tw == 0 or th == 0 or frame is None:
+            return None
+        h, w = frame.shape[:2]
+        s = min(tw / w, th / h)
+        dw, dh = max(1, int(w * s)), max(1, int(h * s))
+
+        with self._lock:
+            free = [i for i in range(self.N_BUFFERS) if i not in self._busy]
+            if not free:
+                return None
+            idx = free[0]
+            self._busy.add(idx)
+            buf = self._bufs[idx]
+            if buf is None or buf.shape[:2] != (dh, dw):
+                buf = np.empty((dh, dw, 3), dtype=np.uint8)
+                self._bufs[idx] = buf
+
+        if (dw, dh) == (w, h):
+            np.copyto(buf, frame)
+        else:
+            cv2.resize(frame, (dw, dh), dst=buf, interpolation=cv2.INTER_LINEAR)
+        image = QImage(buf.data, dw, dh, 3 * dw, QImage.Format.Format_BGR888)
+        return idx, image, faces or []
+
+    def release(self, item):
+        if item is None:
+            return
+        with self._lock:
+            self._busy.discard(item[0])
+
+
+_OVERLAY_LINES = (
+    # (result key, colour, offset above the box in px) -- same layout as FaceAnalysis.draw_overlay
+    ("focus", QColor(255, 0, 0), 60),
+    ("emotion", QColor(0, 255, 0), 40),
+    ("gaze", QColor(255, 255, 0), 20),
+)
+
+
+def paint_face_overlay(painter, faces, x, y, w, h):
+    # Draw FaceAnalyzer.analyze_frame() results over an image painted at (x, y, w, h).
+    if not faces:
+        return
+    font = QFont(painter.font())
+    font.setPointSize(10)
+    font.setBold(True)
+    painter.setFont(font)
+    for face in faces:
+        fx, fy, fw, fh = face["bbox"]
+        bx, by = x + int(fx * w), y + int(fy * h)
+        painter.setPen(QPen(QColor(0, 255, 0), 2))
+        painter.drawRect(bx, by, int(fw * w), int(fh * h))
+        for key, colour, offset in _OVERLAY_LINES:
+            painter.setPen(colour)
+            painter.drawText(bx, by - offset, str(face.get(key, "")))
+        if "id" in face:
+            # FaceTracker id when several faces are tracked
+            painter.setPen(QColor(0, 255, 0))
+            painter.drawText(bx, by + int(fh * h) + 14, f"#{face['id']}")
+
+
+class PreviewLabel(QLabel):
+    # QLabel that paints a prepared QImage directly (no QPixmap round trip)
+    # with the analysis overlay on top; falls back to the normal label text
+    # when no image is set.  The overlay only costs anything when painted.
+
+    def __init__(self, text="", renderer=None, parent=None):
+        super().__init__(text, parent)
+        self.renderer = renderer
+        self._item = None
+
+    def set_frame(self, item):
+        # item comes from PreviewRenderer.render(); the previous one is released
+        old, self._item = self._item, item
+        if self.renderer is not None:
+            self.renderer.release(old)
+        self.update()
+
+    def clear_frame(self):
+        self.set_frame(None)
+
+    def resizeEvent(self, event):
+        if self.renderer is not None:
+            self.renderer.set_target_size(self.width(), self.height())
+        super().resizeEvent(event)
+
+    def paintEvent(self, event):
+        if self._item is None:
+            super().paintEvent(event)
+            return
+        image = self._item[1]
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), Qt.GlobalColor.black)
+        x = (self.width() - image.width()) // 2
+        y = (self.height() - image.height()) // 2
+        painter.drawImage(x, y, image)
+        paint_face_overlay(painter, self._item[2], x, y, image.width(), image.height())
+        painter.end()